@@ -0,0 +1,41 @@
+<?php
+
+namespace App\Command;
+
+use App\Service\CalendarioService;
+use Symfony\Component\Console\Attribute\AsCommand;
+use Symfony\Component\Console\Command\Command;
+use Symfony\Component\Console\Input\InputInterface;
+use Symfony\Component\Console\Output\OutputInterface;
+use Symfony\Component\Console\Style\SymfonyStyle;
+
+#[AsCommand(
+    name: 'app:calendario:reconstruir',
+    description: 'Regenera el índice del calendario de defensas a partir de todas las defensas',
+)]
+class ReconstruirCalendarioCommand extends Command
+{
+    public function __construct(
+        private CalendarioService $calendarioService
+    ) {
+        parent::__construct();
+    }
+
+    protected function execute(InputInterface $input, OutputInterface $output): int
+    {
+        $io = new SymfonyStyle($input, $output);
+
+        try {
+            $start = microtime(true);
+            $total = $this->calendarioService->reconstruir();
+
+            $io->success(sprintf('Calendario reconstruido: %d defensas indexadas en %.1fs', $total, microtime(true) - $start));
+
+            return Command::SUCCESS;
+
+        } catch (\Exception $e) {
+            $io->error("Error al reconstruir el calendario: " . $e->getMessage());
+            return Command::FAILURE;
+        }
+    }
+}
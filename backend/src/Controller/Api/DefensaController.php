@@ -13,6 +13,10 @@ use App\Repository\TribunalRepository;
 use App\Repository\CalificacionRepository;
 use App\Service\NotificacionService;
 use App\Service\ActaService;
+use App\Service\CalendarioService;
+use App\Service\PaginationService;
+use App\Service\ProgramacionService;
+use Doctrine\DBAL\Exception\UniqueConstraintViolationException;
 use Doctrine\ORM\EntityManagerInterface;
 use Symfony\Bundle\FrameworkBundle\Controller\AbstractController;
 use Symfony\Component\HttpFoundation\JsonResponse;
@@ -20,6 +24,7 @@ use Symfony\Component\HttpFoundation\Request;
 use Symfony\Component\HttpFoundation\Response;
 use Symfony\Component\HttpFoundation\BinaryFileResponse;
 use Symfony\Component\HttpFoundation\ResponseHeaderBag;
+use Symfony\Component\HttpKernel\Exception\ConflictHttpException;
 use Symfony\Component\Routing\Annotation\Route;
 use Symfony\Component\Security\Http\Attribute\IsGranted;
 use Symfony\Component\Serializer\SerializerInterface;
@@ -38,12 +43,18 @@ class DefensaController extends AbstractController
         private SerializerInterface $serializer,
         private ValidatorInterface $validator,
         private NotificacionService $notificacionService,
-        private ActaService $actaService
+        private ActaService $actaService,
+        private PaginationService $paginationService,
+        private CalendarioService $calendarioService,
+        private ProgramacionService $programacionService
     ) {}
 
     /**
      * GET /api/defensas
      * Listar defensas según rol del usuario
+     *
+     * Con ?after=<cursor> (vacío para la primera página) o ?pagination=cursor
+     * se pagina por cursor; ver UserController::index
      */
     #[Route('', name: 'api_defensas_index', methods: ['GET'])]
     public function index(Request $request): JsonResponse
@@ -57,6 +68,38 @@ class DefensaController extends AbstractController
         $fechaInicio = $request->query->get('fecha_inicio');
         $fechaFin = $request->query->get('fecha_fin');
 
+        if ($request->query->has('after') || $request->query->get('pagination') === 'cursor') {
+            $queryBuilder = match(true) {
+                in_array('ROLE_ADMIN', $roles) =>
+                    $this->defensaRepository->createAllQueryBuilder($estado, $fechaInicio, $fechaFin),
+                in_array('ROLE_PRESIDENTE_TRIBUNAL', $roles) || in_array('ROLE_PROFESOR', $roles) =>
+                    $this->defensaRepository->createTribunalMemberQueryBuilder($user, $estado, $fechaInicio, $fechaFin),
+                default =>
+                    null
+            };
+
+            if (!$queryBuilder) {
+                return $this->json([
+                    'data' => [],
+                    'meta' => ['per_page' => $perPage, 'has_next' => false, 'next_cursor' => null, 'total' => 0]
+                ]);
+            }
+
+            try {
+                $defensas = $this->paginationService->paginateByCursor(
+                    $queryBuilder,
+                    'd.fechaDefensa',
+                    $request->query->get('after'),
+                    $perPage,
+                    $request->query->getBoolean('with_total')
+                );
+            } catch (\InvalidArgumentException $e) {
+                return $this->json(['error' => $e->getMessage()], 400);
+            }
+
+            return $this->json($defensas, 200, [], ['groups' => ['defensa:read', 'tfg:basic', 'tribunal:basic', 'user:basic']]);
+        }
+
         // Determinar qué defensas puede ver según su rol
         $defensas = match(true) {
             in_array('ROLE_ADMIN', $roles) => 
@@ -81,6 +124,9 @@ class DefensaController extends AbstractController
     /**
      * GET /api/defensas/calendario
      * Vista de calendario de defensas para FullCalendar.js
+     *
+     * Se sirve desde el índice materializado por usuario (CalendarioService) y
+     * admite If-None-Match: con el mismo ETag responde 304 sin cuerpo
      */
     #[Route('/calendario', name: 'api_defensas_calendario', methods: ['GET'])]
     public function calendario(Request $request): JsonResponse
@@ -106,44 +152,17 @@ class DefensaController extends AbstractController
             return $this->json(['error' => 'Formato de fecha inválido'], 400);
         }
 
-        $defensas = $this->defensaRepository->findForCalendar($user, $inicio, $fin);
+        // Revalidación barata: si el índice del usuario no ha cambiado en la ventana, 304 sin cuerpo
+        $response = new JsonResponse();
+        $response->setEtag($this->calendarioService->getEtag($user, $inicio, $fin));
+        $response->setPrivate();
+        $response->headers->addCacheControlDirective('no-cache');
 
-        $events = [];
-        foreach ($defensas as $defensa) {
-            $tfg = $defensa->getTfg();
-            $estudiante = $tfg->getEstudiante();
-            
-            $color = match($defensa->getEstado()) {
-                'programada' => '#28a745',
-                'completada' => '#007bff',
-                'cancelada' => '#dc3545',
-                default => '#6c757d'
-            };
-
-            $events[] = [
-                'id' => $defensa->getId(),
-                'title' => "Defensa: {$tfg->getTitulo()}",
-                'start' => $defensa->getFechaDefensa()->format('c'),
-                'end' => $defensa->getFechaDefensa()->add(
-                    new \DateInterval('PT' . ($defensa->getDuracionEstimada() ?? 30) . 'M')
-                )->format('c'),
-                'backgroundColor' => $color,
-                'borderColor' => $color,
-                'textColor' => '#ffffff',
-                'extendedProps' => [
-                    'defensa_id' => $defensa->getId(),
-                    'tfg_id' => $tfg->getId(),
-                    'estudiante' => $estudiante->getNombreCompleto(),
-                    'tribunal' => $defensa->getTribunal()->getNombre(),
-                    'aula' => $defensa->getAula(),
-                    'estado' => $defensa->getEstado(),
-                    'duracion' => $defensa->getDuracionEstimada(),
-                    'observaciones' => $defensa->getObservaciones()
-                ]
-            ];
+        if ($response->isNotModified($request)) {
+            return $response;
         }
 
-        return $this->json($events);
+        return $response->setData($this->calendarioService->getEventos($user, $inicio, $fin));
     }
 
     /**
@@ -339,6 +358,85 @@ class DefensaController extends AbstractController
         return $this->json($defensa, 201, [], ['groups' => ['defensa:read', 'tfg:basic', 'tribunal:basic', 'user:basic']]);
     }
 
+    /**
+     * POST /api/defensas/batch
+     * Programar un lote de defensas de una vez (solo presidentes de tribunal y admin)
+     *
+     * Body: {"defensas": [{tfg_id, tribunal_id, fecha_defensa, aula, duracion_estimada, observaciones}, ...],
+     *        "dry_run": false, "notificar": true}
+     *
+     * Los conflictos de tribunal, miembros del tribunal, aula y TFG se comprueban
+     * para todo el lote a la vez (ProgramacionService). Es todo o nada: con
+     * cualquier error responde 400 con los errores por índice y no programa ninguna.
+     * Responde 409 si otro lote sigue en curso o si un TFG recibe defensa a la vez.
+     */
+    #[Route('/batch', name: 'api_defensas_batch', methods: ['POST'])]
+    public function batch(Request $request): JsonResponse
+    {
+        /** @var User $user */
+        $user = $this->getUser();
+
+        $data = json_decode($request->getContent(), true);
+
+        if (!$data || empty($data['defensas']) || !is_array($data['defensas'])) {
+            return $this->json(['error' => "Campo 'defensas' requerido (lista de defensas)"], 400);
+        }
+
+        if (count($data['defensas']) > ProgramacionService::MAX_LOTE) {
+            return $this->json(['error' => 'El lote no puede superar las ' . ProgramacionService::MAX_LOTE . ' defensas'], 400);
+        }
+
+        $dryRun = (bool) ($data['dry_run'] ?? false);
+        try {
+            $resultado = $this->programacionService->programarLote($data['defensas'], $user, $dryRun);
+        } catch (ConflictHttpException $e) {
+            return $this->json(['error' => $e->getMessage()], 409);
+        } catch (UniqueConstraintViolationException $e) {
+            // Un TFG del lote recibió defensa por otra vía (POST /api/defensas) mientras se validaba
+            return $this->json(['error' => 'Algún TFG del lote ya tiene una defensa programada; no se ha programado ninguna'], 409);
+        }
+
+        if ($resultado['errores']) {
+            return $this->json([
+                'error' => 'El lote tiene errores; no se ha programado ninguna defensa',
+                'total_errores' => count($resultado['errores']),
+                'errores' => $resultado['errores']
+            ], 400);
+        }
+
+        if ($dryRun) {
+            return $this->json([
+                'message' => 'El lote es válido',
+                'dry_run' => true,
+                'total' => count($data['defensas'])
+            ]);
+        }
+
+        // Notificaciones de todo el lote con un único flush
+        $notificaciones = ($data['notificar'] ?? true)
+            ? $this->notificacionService->notificarDefensasProgramadas($resultado['defensas'])
+            : 0;
+
+        $creadas = [];
+        foreach ($resultado['defensas'] as $indice => $defensa) {
+            $creadas[] = [
+                'indice' => $indice,
+                'id' => $defensa->getId(),
+                'tfg_id' => $defensa->getTfg()->getId(),
+                'tribunal_id' => $defensa->getTribunal()->getId(),
+                'fecha_defensa' => $defensa->getFechaDefensa()->format('c'),
+                'aula' => $defensa->getAula()
+            ];
+        }
+
+        return $this->json([
+            'message' => 'Defensas programadas correctamente',
+            'total' => count($creadas),
+            'notificaciones' => $notificaciones,
+            'data' => $creadas
+        ], 201);
+    }
+
     /**
      * GET /api/defensas/pendientes-calificar
      * Obtener defensas pendientes de calificar para el usuario actual
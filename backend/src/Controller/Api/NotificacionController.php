@@ -5,11 +5,14 @@ namespace App\Controller\Api;
 use App\Entity\Notificacion;
 use App\Entity\User;
 use App\Repository\NotificacionRepository;
+use App\Service\ExportService;
 use App\Service\NotificacionService;
+use App\Service\PaginationService;
 use Doctrine\ORM\EntityManagerInterface;
 use Symfony\Bundle\FrameworkBundle\Controller\AbstractController;
 use Symfony\Component\HttpFoundation\JsonResponse;
 use Symfony\Component\HttpFoundation\Request;
+use Symfony\Component\HttpFoundation\Response;
 use Symfony\Component\Routing\Annotation\Route;
 use Symfony\Component\Security\Http\Attribute\IsGranted;
 use Symfony\Component\Serializer\SerializerInterface;
@@ -22,12 +25,17 @@ class NotificacionController extends AbstractController
         private NotificacionRepository $notificacionRepository,
         private NotificacionService $notificacionService,
         private EntityManagerInterface $entityManager,
-        private SerializerInterface $serializer
+        private SerializerInterface $serializer,
+        private PaginationService $paginationService,
+        private ExportService $exportService
     ) {}
 
     /**
      * GET /api/notificaciones
      * Obtener notificaciones del usuario actual
+     *
+     * Con ?after=<cursor> (vacío para la primera página) o ?pagination=cursor
+     * se pagina por cursor; ver UserController::index
      */
     #[Route('', name: 'api_notificaciones_index', methods: ['GET'])]
     public function index(Request $request): JsonResponse
@@ -39,12 +47,35 @@ class NotificacionController extends AbstractController
         $leida = $request->query->get('leida'); // null, 'true', 'false'
         $tipo = $request->query->get('tipo'); // info, warning, success, error
 
-        $notificaciones = $this->notificacionRepository->findByUser($user, [
+        $filters = [
             'page' => $page,
             'per_page' => $perPage,
             'leida' => $leida === null ? null : ($leida === 'true'),
             'tipo' => $tipo
-        ]);
+        ];
+
+        if ($request->query->has('after') || $request->query->get('pagination') === 'cursor') {
+            try {
+                $notificaciones = $this->paginationService->paginateByCursor(
+                    $this->notificacionRepository->createUserQueryBuilder($user, $filters),
+                    'n.createdAt',
+                    $request->query->get('after'),
+                    $perPage,
+                    $request->query->getBoolean('with_total')
+                );
+            } catch (\InvalidArgumentException $e) {
+                return $this->json(['error' => $e->getMessage()], 400);
+            }
+
+            return $this->json([
+                'data' => $notificaciones['data'],
+                'meta' => $notificaciones['meta'] + [
+                    'no_leidas' => $this->notificacionService->contarNoLeidas($user)
+                ]
+            ], 200, [], ['groups' => ['notificacion:read']]);
+        }
+
+        $notificaciones = $this->notificacionRepository->findByUser($user, $filters);
 
         // Contar no leídas para el badge del frontend
         $noLeidas = $this->notificacionService->contarNoLeidas($user);
@@ -385,17 +416,23 @@ class NotificacionController extends AbstractController
 
     /**
      * GET /api/notificaciones/admin/export
-     * Exportar notificaciones para análisis (solo admin)
+     * Exportar notificaciones para análisis (solo admin) en JSON, NDJSON o CSV
+     *
+     * La respuesta se envía en streaming mientras se leen las notificaciones por lotes
      */
     #[Route('/admin/export', name: 'api_notificaciones_admin_export', methods: ['GET'])]
     #[IsGranted('ROLE_ADMIN')]
-    public function export(Request $request): JsonResponse
+    public function export(Request $request): Response
     {
         $fechaInicio = $request->query->get('fecha_inicio');
         $fechaFin = $request->query->get('fecha_fin');
         $tipo = $request->query->get('tipo');
         $formato = $request->query->get('formato', 'json');
 
+        if (!in_array($formato, ExportService::FORMATOS, true)) {
+            return $this->json(['error' => 'Formato no soportado. Usa: ' . implode(', ', ExportService::FORMATOS)], 400);
+        }
+
         try {
             $inicio = $fechaInicio ? new \DateTime($fechaInicio) : new \DateTime('-30 days');
             $fin = $fechaFin ? new \DateTime($fechaFin) : new \DateTime();
@@ -403,11 +440,31 @@ class NotificacionController extends AbstractController
             return $this->json(['error' => 'Formato de fecha inválido'], 400);
         }
 
-        $notificaciones = $this->notificacionRepository->findForExport($inicio, $fin, $tipo);
+        $notificaciones = $this->paginationService->iterateInBatches(
+            $this->notificacionRepository->createExportQueryBuilder($inicio, $fin, $tipo),
+            ['n.createdAt'],
+            'DESC'
+        );
+
+        $filename = 'notificaciones_' . $inicio->format('Y-m-d') . '_' . $fin->format('Y-m-d') . '.' . $formato;
 
-        $exportData = [];
+        return $this->exportService->stream($this->exportRows($notificaciones), $formato, $filename, [
+            'periodo' => [
+                'inicio' => $inicio->format('Y-m-d'),
+                'fin' => $fin->format('Y-m-d')
+            ],
+            'formato' => $formato,
+            'filename' => $filename
+        ]);
+    }
+
+    /**
+     * Fila de exportación de cada notificación (generador: una fila cada vez)
+     */
+    private function exportRows(iterable $notificaciones): \Generator
+    {
         foreach ($notificaciones as $notif) {
-            $exportData[] = [
+            yield [
                 'ID' => $notif->getId(),
                 'Usuario' => $notif->getUsuario()->getEmail(),
                 'Nombre Usuario' => $notif->getUsuario()->getNombreCompleto(),
@@ -420,16 +477,5 @@ class NotificacionController extends AbstractController
                 'Metadata' => json_encode($notif->getMetadata())
             ];
         }
-
-        return $this->json([
-            'data' => $exportData,
-            'total' => count($exportData),
-            'periodo' => [
-                'inicio' => $inicio->format('Y-m-d'),
-                'fin' => $fin->format('Y-m-d')
-            ],
-            'formato' => $formato,
-            'filename' => 'notificaciones_' . $inicio->format('Y-m-d') . '_' . $fin->format('Y-m-d') . '.' . $formato
-        ]);
     }
 }
\ No newline at end of file
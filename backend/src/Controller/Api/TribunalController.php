@@ -425,7 +425,8 @@ class TribunalController extends AbstractController
                 'fecha' => $defensa->getFechaDefensa()->format('c'),
                 'tfg' => $defensa->getTfg()->getTitulo(),
                 'estudiante' => $defensa->getTfg()->getEstudiante()->getNombreCompleto(),
-                'aula' => $defensa->getAula()
+                'aula' => $defensa->getAula(),
+                'duracion' => $defensa->getDuracionEstimada() ?? 30
             ];
         }
 
@@ -4,11 +4,14 @@ namespace App\Controller\Api;
 
 use App\Entity\User;
 use App\Repository\UserRepository;
+use App\Service\ExportService;
 use App\Service\NotificacionService;
+use App\Service\PaginationService;
 use Doctrine\ORM\EntityManagerInterface;
 use Symfony\Bundle\FrameworkBundle\Controller\AbstractController;
 use Symfony\Component\HttpFoundation\JsonResponse;
 use Symfony\Component\HttpFoundation\Request;
+use Symfony\Component\HttpFoundation\Response;
 use Symfony\Component\Routing\Annotation\Route;
 use Symfony\Component\Security\Http\Attribute\IsGranted;
 use Symfony\Component\Serializer\SerializerInterface;
@@ -25,12 +28,18 @@ class UserController extends AbstractController
         private SerializerInterface $serializer,
         private ValidatorInterface $validator,
         private UserPasswordHasherInterface $passwordHasher,
-        private NotificacionService $notificacionService
+        private NotificacionService $notificacionService,
+        private PaginationService $paginationService,
+        private ExportService $exportService
     ) {}
 
     /**
      * GET /api/users
      * Listar todos los usuarios con filtros y paginación
+     *
+     * Con ?after=<cursor> (vacío para la primera página) o ?pagination=cursor
+     * se pagina por cursor: sin COUNT ni OFFSET, con meta.next_cursor para la
+     * siguiente página y el total solo si se pide con ?with_total=true
      */
     #[Route('', name: 'api_users_index', methods: ['GET'])]
     public function index(Request $request): JsonResponse
@@ -41,13 +50,42 @@ class UserController extends AbstractController
         $activo = $request->query->get('activo');
         $search = $request->query->get('search');
 
-        $usuarios = $this->userRepository->findWithFilters([
+        $filters = [
             'page' => $page,
             'per_page' => $perPage,
             'role' => $role,
             'activo' => $activo === null ? null : ($activo === 'true'),
             'search' => $search
-        ]);
+        ];
+
+        $rolesDisponibles = [
+            'ROLE_ESTUDIANTE' => 'Estudiante',
+            'ROLE_PROFESOR' => 'Profesor',
+            'ROLE_PRESIDENTE_TRIBUNAL' => 'Presidente Tribunal',
+            'ROLE_ADMIN' => 'Administrador'
+        ];
+
+        if ($request->query->has('after') || $request->query->get('pagination') === 'cursor') {
+            try {
+                $usuarios = $this->paginationService->paginateByCursor(
+                    $this->userRepository->createFilteredQueryBuilder($filters),
+                    'u.createdAt',
+                    $request->query->get('after'),
+                    $perPage,
+                    $request->query->getBoolean('with_total')
+                );
+            } catch (\InvalidArgumentException $e) {
+                return $this->json(['error' => $e->getMessage()], 400);
+            }
+
+            return $this->json([
+                'data' => $usuarios['data'],
+                'meta' => $usuarios['meta'],
+                'filters' => ['roles_disponibles' => $rolesDisponibles]
+            ], 200, [], ['groups' => ['user:read']]);
+        }
+
+        $usuarios = $this->userRepository->findWithFilters($filters);
 
         return $this->json([
             'data' => $usuarios['data'],
@@ -58,12 +96,7 @@ class UserController extends AbstractController
                 'total_pages' => ceil($usuarios['total'] / $perPage)
             ],
             'filters' => [
-                'roles_disponibles' => [
-                    'ROLE_ESTUDIANTE' => 'Estudiante',
-                    'ROLE_PROFESOR' => 'Profesor',
-                    'ROLE_PRESIDENTE_TRIBUNAL' => 'Presidente Tribunal',
-                    'ROLE_ADMIN' => 'Administrador'
-                ]
+                'roles_disponibles' => $rolesDisponibles
             ]
         ], 200, [], ['groups' => ['user:read']]);
     }
@@ -156,7 +189,7 @@ class UserController extends AbstractController
      * GET /api/users/{id}
      * Ver usuario específico
      */
-    #[Route('/{id}', name: 'api_users_show', methods: ['GET'])]
+    #[Route('/{id}', name: 'api_users_show', methods: ['GET'], requirements: ['id' => '\d+'])]
     public function show(int $id): JsonResponse
     {
         $usuario = $this->userRepository->find($id);
@@ -507,24 +540,46 @@ class UserController extends AbstractController
 
     /**
      * GET /api/users/export
-     * Exportar usuarios a CSV/Excel
+     * Exportar usuarios en CSV, NDJSON o JSON
+     *
+     * La respuesta se envía en streaming mientras se leen los usuarios por lotes
      */
     #[Route('/export', name: 'api_users_export', methods: ['GET'])]
-    public function export(Request $request): JsonResponse
+    public function export(Request $request): Response
     {
         $format = $request->query->get('format', 'csv');
+        if (!in_array($format, ExportService::FORMATOS, true)) {
+            return $this->json(['error' => 'Formato no soportado. Usa: ' . implode(', ', ExportService::FORMATOS)], 400);
+        }
+
         $filters = [
             'role' => $request->query->get('role'),
             'activo' => $request->query->get('activo'),
             'search' => $request->query->get('search')
         ];
 
-        $usuarios = $this->userRepository->findForExport($filters);
-        
-        // Preparar datos para export
-        $exportData = [];
+        $usuarios = $this->paginationService->iterateInBatches(
+            $this->userRepository->createExportQueryBuilder($filters),
+            ['u.apellidos', 'u.nombre']
+        );
+
+        $filename = 'usuarios_' . date('Y-m-d_H-i-s') . '.' . $format;
+
+        return $this->exportService->stream(
+            $this->exportRows($usuarios),
+            $format,
+            $filename,
+            ['format' => $format, 'filename' => $filename]
+        );
+    }
+
+    /**
+     * Fila de exportación de cada usuario (generador: una fila cada vez)
+     */
+    private function exportRows(iterable $usuarios): \Generator
+    {
         foreach ($usuarios as $usuario) {
-            $exportData[] = [
+            yield [
                 'ID' => $usuario->getId(),
                 'Email' => $usuario->getEmail(),
                 'Nombre Completo' => $usuario->getNombreCompleto(),
@@ -538,12 +593,5 @@ class UserController extends AbstractController
                 'Fecha Creación' => $usuario->getCreatedAt()?->format('Y-m-d H:i:s')
             ];
         }
-
-        return $this->json([
-            'data' => $exportData,
-            'total' => count($exportData),
-            'format' => $format,
-            'filename' => 'usuarios_' . date('Y-m-d_H-i-s') . '.' . $format
-        ]);
     }
 }
\ No newline at end of file
@@ -0,0 +1,68 @@
+<?php
+
+namespace App\Entity;
+
+use App\Repository\CalendarioEntradaRepository;
+use Doctrine\DBAL\Types\Types;
+use Doctrine\ORM\Mapping as ORM;
+
+/**
+ * Índice materializado del calendario: una fila por defensa y participante
+ * (estudiante, tutor, cotutor y miembros del tribunal) con el evento de
+ * FullCalendar ya calculado. Las filas con usuario NULL forman la vista
+ * global que ven los administradores.
+ *
+ * Lo mantiene CalendarioService desde DefensaCalendarioListener; no se
+ * modifica directamente.
+ */
+#[ORM\Entity(repositoryClass: CalendarioEntradaRepository::class)]
+#[ORM\Table(name: 'calendario_entradas')]
+#[ORM\Index(name: 'idx_calendario_entradas_usuario_fecha', columns: ['usuario_id', 'fecha_defensa'])]
+#[ORM\Index(name: 'idx_calendario_entradas_defensa', columns: ['defensa_id'])]
+class CalendarioEntrada
+{
+    #[ORM\Id]
+    #[ORM\GeneratedValue]
+    #[ORM\Column]
+    private ?int $id = null;
+
+    // NULL: entrada de la vista global (administradores)
+    #[ORM\ManyToOne(targetEntity: User::class)]
+    #[ORM\JoinColumn(nullable: true, onDelete: 'CASCADE')]
+    private ?User $usuario = null;
+
+    #[ORM\ManyToOne(targetEntity: Defensa::class)]
+    #[ORM\JoinColumn(nullable: false, onDelete: 'CASCADE')]
+    private ?Defensa $defensa = null;
+
+    #[ORM\Column(type: Types::DATETIME_MUTABLE)]
+    private ?\DateTimeInterface $fechaDefensa = null;
+
+    #[ORM\Column(type: Types::JSON)]
+    private array $evento = [];
+
+    public function getId(): ?int
+    {
+        return $this->id;
+    }
+
+    public function getUsuario(): ?User
+    {
+        return $this->usuario;
+    }
+
+    public function getDefensa(): ?Defensa
+    {
+        return $this->defensa;
+    }
+
+    public function getFechaDefensa(): ?\DateTimeInterface
+    {
+        return $this->fechaDefensa;
+    }
+
+    public function getEvento(): array
+    {
+        return $this->evento;
+    }
+}
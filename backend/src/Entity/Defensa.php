@@ -30,6 +30,8 @@ use ApiPlatform\Doctrine\Orm\Filter\OrderFilter;
 // #[ApiFilter(DateFilter::class, properties: ['fecha_defensa'])]
 // #[ApiFilter(OrderFilter::class, properties: ['fecha_defensa' => 'ASC'])]
 #[ORM\Table(name: 'defensas')]
+// Índice para la paginación por cursor (PaginationService::paginateByCursor)
+#[ORM\Index(name: 'idx_defensas_fecha_defensa_id', columns: ['fecha_defensa', 'id'])]
 #[ORM\HasLifecycleCallbacks]
 class Defensa
 {
@@ -44,6 +46,10 @@ class Defensa
         self::ESTADO_CANCELADA,
     ];
 
+    // Duración estimada permitida (minutos)
+    public const DURACION_MINIMA = 15;
+    public const DURACION_MAXIMA = 180;
+
     #[Groups(['defensa:read', 'defensa:write', 'tfg:read', 'defensa:student'])]
     #[ORM\Id]
     #[ORM\GeneratedValue]
@@ -76,8 +82,8 @@ class Defensa
 
     #[Groups(['defensa:read', 'defensa:write'])]
     #[Assert\Range(
-        min: 15,
-        max: 180,
+        min: self::DURACION_MINIMA,
+        max: self::DURACION_MAXIMA,
         notInRangeMessage: 'La duración debe estar entre {{ min }} y {{ max }} minutos'
     )]
     #[ORM\Column(options: ['default' => 30])]
@@ -10,6 +10,8 @@ use Symfony\Component\Validator\Constraints as Assert;
 
 #[ORM\Entity(repositoryClass: NotificacionRepository::class)]
 #[ORM\Table(name: 'notificaciones')]
+// Índice para la paginación por cursor (PaginationService::paginateByCursor)
+#[ORM\Index(name: 'idx_notificaciones_usuario_created_at_id', columns: ['usuario_id', 'created_at', 'id'])]
 #[ORM\HasLifecycleCallbacks]
 class Notificacion
 {
@@ -41,6 +41,8 @@ use ApiPlatform\Metadata\Delete;
     formats: ['json' => ['application/json']]
 )]
 #[ORM\Table(name: 'users')]
+// Índice para la paginación por cursor (PaginationService::paginateByCursor)
+#[ORM\Index(name: 'idx_users_created_at_id', columns: ['created_at', 'id'])]
 #[ORM\HasLifecycleCallbacks]
 #[UniqueEntity(fields: ['email'], message: 'Ya existe un usuario con este email')]
 #[UniqueEntity(fields: ['dni'], message: 'Ya existe un usuario con este DNI')]
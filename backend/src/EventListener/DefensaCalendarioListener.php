@@ -0,0 +1,95 @@
+<?php
+
+namespace App\EventListener;
+
+use App\Entity\Defensa;
+use App\Entity\TFG;
+use App\Entity\Tribunal;
+use App\Entity\User;
+use App\Repository\DefensaRepository;
+use App\Service\CalendarioService;
+use Doctrine\Bundle\DoctrineBundle\Attribute\AsEntityListener;
+use Doctrine\ORM\Event\PostPersistEventArgs;
+use Doctrine\ORM\Event\PostUpdateEventArgs;
+use Doctrine\ORM\Events;
+
+/**
+ * Mantiene el índice del calendario (CalendarioEntrada) al crear, mover o
+ * eliminar defensas, y al cambiar los datos que se copian en cada entrada:
+ * miembros o nombre del tribunal, título y participantes del TFG y nombre
+ * del estudiante. Las filas del índice de una defensa se borran en cascada
+ * con ella.
+ */
+#[AsEntityListener(event: Events::postPersist, method: 'postPersist', entity: Defensa::class)]
+#[AsEntityListener(event: Events::postUpdate, method: 'postUpdate', entity: Defensa::class)]
+#[AsEntityListener(event: Events::postUpdate, method: 'postUpdateTribunal', entity: Tribunal::class)]
+#[AsEntityListener(event: Events::postUpdate, method: 'postUpdateTfg', entity: TFG::class)]
+#[AsEntityListener(event: Events::postUpdate, method: 'postUpdateUser', entity: User::class)]
+class DefensaCalendarioListener
+{
+    // Campos del tribunal que cambian quién ve sus defensas o cómo se muestran
+    private const TRIBUNAL_FIELDS = ['presidente', 'secretario', 'vocal', 'nombre'];
+    // Campos del TFG que se copian en el evento o deciden quién lo ve
+    private const TFG_FIELDS = ['titulo', 'estudiante', 'tutor', 'cotutor'];
+    // Campos del usuario que forman el nombre del estudiante en el evento
+    private const USER_FIELDS = ['nombre', 'apellidos'];
+
+    public function __construct(
+        private CalendarioService $calendarioService,
+        private DefensaRepository $defensaRepository
+    ) {}
+
+    public function postPersist(Defensa $defensa, PostPersistEventArgs $args): void
+    {
+        // La programación en lote indexa todas sus defensas juntas al final
+        if ($this->calendarioService->isDiferido()) {
+            return;
+        }
+
+        $this->calendarioService->indexarDefensa($defensa);
+    }
+
+    public function postUpdate(Defensa $defensa, PostUpdateEventArgs $args): void
+    {
+        $this->calendarioService->indexarDefensa($defensa);
+    }
+
+    public function postUpdateTribunal(Tribunal $tribunal, PostUpdateEventArgs $args): void
+    {
+        if (!$this->hasChanged($tribunal, $args, self::TRIBUNAL_FIELDS)) {
+            return;
+        }
+
+        foreach ($tribunal->getDefensas() as $defensa) {
+            $this->calendarioService->indexarDefensa($defensa);
+        }
+    }
+
+    public function postUpdateTfg(TFG $tfg, PostUpdateEventArgs $args): void
+    {
+        if (!$tfg->getDefensa() || !$this->hasChanged($tfg, $args, self::TFG_FIELDS)) {
+            return;
+        }
+
+        $this->calendarioService->indexarDefensa($tfg->getDefensa());
+    }
+
+    public function postUpdateUser(User $user, PostUpdateEventArgs $args): void
+    {
+        if (!$this->hasChanged($user, $args, self::USER_FIELDS)) {
+            return;
+        }
+
+        // El nombre solo aparece en los eventos de las defensas de las que es estudiante
+        foreach ($this->defensaRepository->findByEstudiante($user) as $defensa) {
+            $this->calendarioService->indexarDefensa($defensa);
+        }
+    }
+
+    private function hasChanged(object $entity, PostUpdateEventArgs $args, array $fields): bool
+    {
+        $changes = $args->getObjectManager()->getUnitOfWork()->getEntityChangeSet($entity);
+
+        return (bool) array_intersect($fields, array_keys($changes));
+    }
+}
@@ -0,0 +1,43 @@
+<?php
+
+namespace App\Repository;
+
+use App\Entity\CalendarioEntrada;
+use App\Entity\User;
+use Doctrine\Bundle\DoctrineBundle\Repository\ServiceEntityRepository;
+use Doctrine\Persistence\ManagerRegistry;
+
+/**
+ * @extends ServiceEntityRepository<CalendarioEntrada>
+ */
+class CalendarioEntradaRepository extends ServiceEntityRepository
+{
+    public function __construct(ManagerRegistry $registry)
+    {
+        parent::__construct($registry, CalendarioEntrada::class);
+    }
+
+    /**
+     * Eventos de FullCalendar de un usuario (NULL: vista global) entre dos fechas.
+     * Consulta de una sola tabla sobre (usuario_id, fecha_defensa), sin joins ni
+     * hidratación de entidades.
+     */
+    public function findEventos(?User $usuario, \DateTimeInterface $inicio, \DateTimeInterface $fin): array
+    {
+        $qb = $this->createQueryBuilder('c')
+            ->select('c.evento')
+            ->where('c.fechaDefensa BETWEEN :inicio AND :fin')
+            ->setParameter('inicio', $inicio)
+            ->setParameter('fin', $fin)
+            ->orderBy('c.fechaDefensa', 'ASC');
+
+        if ($usuario) {
+            $qb->andWhere('c.usuario = :usuario')
+               ->setParameter('usuario', $usuario);
+        } else {
+            $qb->andWhere('c.usuario IS NULL');
+        }
+
+        return array_column($qb->getQuery()->getScalarResult(), 'evento');
+    }
+}
@@ -6,6 +6,7 @@ use App\Entity\Defensa;
 use App\Entity\User;
 use App\Entity\Tribunal;
 use Doctrine\Bundle\DoctrineBundle\Repository\ServiceEntityRepository;
+use Doctrine\ORM\QueryBuilder;
 use Doctrine\Persistence\ManagerRegistry;
 
 /**
@@ -28,6 +29,34 @@ class DefensaRepository extends ServiceEntityRepository
         ?string $fechaInicio = null,
         ?string $fechaFin = null
     ): array {
+        $qb = $this->createAllQueryBuilder($estado, $fechaInicio, $fechaFin);
+
+        // Total count
+        $totalQb = clone $qb;
+        $total = $totalQb->select('COUNT(DISTINCT d.id)')->getQuery()->getSingleScalarResult();
+
+        // Paginated results
+        $results = $qb
+            ->setFirstResult(($page - 1) * $perPage)
+            ->setMaxResults($perPage)
+            ->getQuery()
+            ->getResult();
+
+        return [
+            'data' => $results,
+            'total' => $total
+        ];
+    }
+
+    /**
+     * Consulta de todas las defensas con filtros (estado, rango de fechas), de la
+     * más reciente a la más antigua; la paginan findAllPaginated o PaginationService
+     */
+    public function createAllQueryBuilder(
+        ?string $estado = null,
+        ?string $fechaInicio = null,
+        ?string $fechaFin = null
+    ): QueryBuilder {
         $qb = $this->createQueryBuilder('d')
             ->leftJoin('d.tfg', 't')
             ->leftJoin('t.estudiante', 'e')
@@ -59,6 +88,22 @@ class DefensaRepository extends ServiceEntityRepository
             } catch (\Exception $e) {}
         }
 
+        return $qb;
+    }
+
+    /**
+     * Encuentra defensas donde el usuario es miembro del tribunal
+     */
+    public function findByTribunalMember(
+        User $usuario,
+        int $page = 1,
+        int $perPage = 10,
+        ?string $estado = null,
+        ?string $fechaInicio = null,
+        ?string $fechaFin = null
+    ): array {
+        $qb = $this->createTribunalMemberQueryBuilder($usuario, $estado, $fechaInicio, $fechaFin);
+
         // Total count
         $totalQb = clone $qb;
         $total = $totalQb->select('COUNT(DISTINCT d.id)')->getQuery()->getSingleScalarResult();
@@ -77,16 +122,15 @@ class DefensaRepository extends ServiceEntityRepository
     }
 
     /**
-     * Encuentra defensas donde el usuario es miembro del tribunal
+     * Consulta de las defensas en cuyo tribunal participa el usuario, con los
+     * mismos filtros; la paginan findByTribunalMember o PaginationService
      */
-    public function findByTribunalMember(
+    public function createTribunalMemberQueryBuilder(
         User $usuario,
-        int $page = 1,
-        int $perPage = 10,
         ?string $estado = null,
         ?string $fechaInicio = null,
         ?string $fechaFin = null
-    ): array {
+    ): QueryBuilder {
         $qb = $this->createQueryBuilder('d')
             ->leftJoin('d.tfg', 't')
             ->leftJoin('t.estudiante', 'e')
@@ -121,21 +165,7 @@ class DefensaRepository extends ServiceEntityRepository
             } catch (\Exception $e) {}
         }
 
-        // Total count
-        $totalQb = clone $qb;
-        $total = $totalQb->select('COUNT(DISTINCT d.id)')->getQuery()->getSingleScalarResult();
-
-        // Paginated results
-        $results = $qb
-            ->setFirstResult(($page - 1) * $perPage)
-            ->setMaxResults($perPage)
-            ->getQuery()
-            ->getResult();
-
-        return [
-            'data' => $results,
-            'total' => $total
-        ];
+        return $qb;
     }
 
     /**
@@ -174,6 +204,29 @@ class DefensaRepository extends ServiceEntityRepository
         return $qb->getQuery()->getResult();
     }
 
+    /**
+     * Defensas no canceladas que pueden solaparse con el intervalo [inicio, fin):
+     * las que empiezan antes del fin y como mucho una duración máxima antes del
+     * inicio. Incluye el tribunal y el TFG para describir los conflictos.
+     */
+    public function findActivasEntre(\DateTimeInterface $inicio, \DateTimeInterface $fin): array
+    {
+        $desde = (clone $inicio)->sub(new \DateInterval('PT' . Defensa::DURACION_MAXIMA . 'M'));
+
+        return $this->createQueryBuilder('d')
+            ->leftJoin('d.tribunal', 'tr')
+            ->leftJoin('d.tfg', 't')
+            ->addSelect('tr', 't')
+            ->where('d.fechaDefensa >= :desde')
+            ->andWhere('d.fechaDefensa < :fin')
+            ->andWhere('d.estado != :cancelada')
+            ->setParameter('desde', $desde)
+            ->setParameter('fin', $fin)
+            ->setParameter('cancelada', Defensa::ESTADO_CANCELADA)
+            ->getQuery()
+            ->getResult();
+    }
+
     /**
      * Busca conflictos de horario para un tribunal en una fecha específica
      */
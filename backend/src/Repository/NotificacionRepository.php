@@ -5,6 +5,7 @@ namespace App\Repository;
 use App\Entity\Notificacion;
 use App\Entity\User;
 use Doctrine\Bundle\DoctrineBundle\Repository\ServiceEntityRepository;
+use Doctrine\ORM\QueryBuilder;
 use Doctrine\Persistence\ManagerRegistry;
 
 /**
@@ -24,6 +25,32 @@ class NotificacionRepository extends ServiceEntityRepository
     {
         $page = $filters['page'] ?? 1;
         $perPage = $filters['per_page'] ?? 20;
+
+        $qb = $this->createUserQueryBuilder($usuario, $filters);
+
+        // Total count
+        $totalQb = clone $qb;
+        $total = $totalQb->select('COUNT(n.id)')->getQuery()->getSingleScalarResult();
+
+        // Paginated results
+        $results = $qb
+            ->setFirstResult(($page - 1) * $perPage)
+            ->setMaxResults($perPage)
+            ->getQuery()
+            ->getResult();
+
+        return [
+            'data' => $results,
+            'total' => $total
+        ];
+    }
+
+    /**
+     * Consulta de las notificaciones de un usuario con filtros (leída, tipo),
+     * de más reciente a más antigua; la paginan findByUser o PaginationService
+     */
+    public function createUserQueryBuilder(User $usuario, array $filters = []): QueryBuilder
+    {
         $leida = $filters['leida'] ?? null;
         $tipo = $filters['tipo'] ?? null;
 
@@ -44,21 +71,7 @@ class NotificacionRepository extends ServiceEntityRepository
                ->setParameter('tipo', $tipo);
         }
 
-        // Total count
-        $totalQb = clone $qb;
-        $total = $totalQb->select('COUNT(n.id)')->getQuery()->getSingleScalarResult();
-
-        // Paginated results
-        $results = $qb
-            ->setFirstResult(($page - 1) * $perPage)
-            ->setMaxResults($perPage)
-            ->getQuery()
-            ->getResult();
-
-        return [
-            'data' => $results,
-            'total' => $total
-        ];
+        return $qb;
     }
 
     /**
@@ -323,6 +336,18 @@ class NotificacionRepository extends ServiceEntityRepository
         \DateTimeInterface $fin, 
         ?string $tipo = null
     ): array {
+        return $this->createExportQueryBuilder($inicio, $fin, $tipo)->getQuery()->getResult();
+    }
+
+    /**
+     * Consulta de la exportación de notificaciones, para recorrerla por lotes
+     * (PaginationService::iterateInBatches) sin cargarla entera en memoria
+     */
+    public function createExportQueryBuilder(
+        \DateTimeInterface $inicio,
+        \DateTimeInterface $fin,
+        ?string $tipo = null
+    ): QueryBuilder {
         $qb = $this->createQueryBuilder('n')
             ->leftJoin('n.usuario', 'u')
             ->addSelect('u')
@@ -336,7 +361,7 @@ class NotificacionRepository extends ServiceEntityRepository
                ->setParameter('tipo', $tipo);
         }
 
-        return $qb->getQuery()->getResult();
+        return $qb;
     }
 
     /**
@@ -17,6 +17,29 @@ class TFGRepository extends ServiceEntityRepository
         parent::__construct($registry, TFG::class);
     }
 
+    /**
+     * TFGs indexados por id con su defensa, estudiante y tutor en una sola
+     * consulta (programación de defensas en lote)
+     *
+     * @return array<int, TFG>
+     */
+    public function findForScheduling(array $ids): array
+    {
+        if (!$ids) {
+            return [];
+        }
+
+        return $this->createQueryBuilder('t', 't.id')
+            ->leftJoin('t.defensa', 'd')
+            ->leftJoin('t.estudiante', 'e')
+            ->leftJoin('t.tutor', 'tu')
+            ->addSelect('d', 'e', 'tu')
+            ->where('t.id IN (:ids)')
+            ->setParameter('ids', $ids)
+            ->getQuery()
+            ->getResult();
+    }
+
     /**
      * Encuentra TFGs de un estudiante específico con paginación
      */
@@ -17,6 +17,28 @@ class TribunalRepository extends ServiceEntityRepository
         parent::__construct($registry, Tribunal::class);
     }
 
+    /**
+     * Tribunales indexados por id con sus tres miembros (programación en lote)
+     *
+     * @return array<int, Tribunal>
+     */
+    public function findForScheduling(array $ids): array
+    {
+        if (!$ids) {
+            return [];
+        }
+
+        return $this->createQueryBuilder('t', 't.id')
+            ->leftJoin('t.presidente', 'p')
+            ->leftJoin('t.secretario', 's')
+            ->leftJoin('t.vocal', 'v')
+            ->addSelect('p', 's', 'v')
+            ->where('t.id IN (:ids)')
+            ->setParameter('ids', $ids)
+            ->getQuery()
+            ->getResult();
+    }
+
     /**
      * Encuentra todos los tribunales paginados
      */
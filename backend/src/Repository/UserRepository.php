@@ -4,6 +4,7 @@ namespace App\Repository;
 
 use App\Entity\User;
 use Doctrine\Bundle\DoctrineBundle\Repository\ServiceEntityRepository;
+use Doctrine\ORM\QueryBuilder;
 use Doctrine\Persistence\ManagerRegistry;
 use Symfony\Component\Security\Core\Exception\UnsupportedUserException;
 use Symfony\Component\Security\Core\User\PasswordAuthenticatedUserInterface;
@@ -40,6 +41,32 @@ class UserRepository extends ServiceEntityRepository implements PasswordUpgrader
     {
         $page = $filters['page'] ?? 1;
         $perPage = $filters['per_page'] ?? 10;
+
+        $qb = $this->createFilteredQueryBuilder($filters);
+
+        // Total count
+        $totalQb = clone $qb;
+        $total = $totalQb->select('COUNT(u.id)')->getQuery()->getSingleScalarResult();
+
+        // Paginated results
+        $results = $qb
+            ->setFirstResult(($page - 1) * $perPage)
+            ->setMaxResults($perPage)
+            ->getQuery()
+            ->getResult();
+
+        return [
+            'data' => $results,
+            'total' => $total
+        ];
+    }
+
+    /**
+     * Consulta de usuarios con los filtros del listado (rol, activo, búsqueda),
+     * ordenada por fecha de alta; la paginan findWithFilters o PaginationService
+     */
+    public function createFilteredQueryBuilder(array $filters): QueryBuilder
+    {
         $role = $filters['role'] ?? null;
         $activo = $filters['activo'] ?? null;
         $search = $filters['search'] ?? null;
@@ -65,21 +92,7 @@ class UserRepository extends ServiceEntityRepository implements PasswordUpgrader
                ->setParameter('search', '%' . $search . '%');
         }
 
-        // Total count
-        $totalQb = clone $qb;
-        $total = $totalQb->select('COUNT(u.id)')->getQuery()->getSingleScalarResult();
-
-        // Paginated results
-        $results = $qb
-            ->setFirstResult(($page - 1) * $perPage)
-            ->setMaxResults($perPage)
-            ->getQuery()
-            ->getResult();
-
-        return [
-            'data' => $results,
-            'total' => $total
-        ];
+        return $qb;
     }
 
     /**
@@ -346,6 +359,15 @@ class UserRepository extends ServiceEntityRepository implements PasswordUpgrader
      * Encuentra usuarios para exportación
      */
     public function findForExport(array $filters = []): array
+    {
+        return $this->createExportQueryBuilder($filters)->getQuery()->getResult();
+    }
+
+    /**
+     * Consulta de la exportación de usuarios, para recorrerla por lotes
+     * (PaginationService::iterateInBatches) sin cargarla entera en memoria
+     */
+    public function createExportQueryBuilder(array $filters = []): QueryBuilder
     {
         $qb = $this->createQueryBuilder('u')
             ->orderBy('u.apellidos', 'ASC')
@@ -367,7 +389,7 @@ class UserRepository extends ServiceEntityRepository implements PasswordUpgrader
                ->setParameter('search', '%' . $filters['search'] . '%');
         }
 
-        return $qb->getQuery()->getResult();
+        return $qb;
     }
 
     /**
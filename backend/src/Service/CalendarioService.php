@@ -0,0 +1,262 @@
+<?php
+
+namespace App\Service;
+
+use App\Entity\Defensa;
+use App\Entity\User;
+use App\Repository\CalendarioEntradaRepository;
+use Doctrine\DBAL\ArrayParameterType;
+use Doctrine\DBAL\Types\Types;
+use Doctrine\ORM\EntityManagerInterface;
+
+/**
+ * Calendario de defensas servido desde el índice materializado
+ * (CalendarioEntrada) en lugar de la consulta con joins y filtro por rol.
+ *
+ * El índice se actualiza cuando se crea, modifica o elimina una defensa (y
+ * cuando cambian los miembros de un tribunal) desde DefensaCalendarioListener.
+ * Los datos que no son de la defensa (título del TFG, nombre del estudiante)
+ * se copian al indexar; app:calendario:reconstruir rehace el índice completo.
+ */
+class CalendarioService
+{
+    public function __construct(
+        private EntityManagerInterface $entityManager,
+        private CalendarioEntradaRepository $calendarioEntradaRepository,
+        private PaginationService $paginationService
+    ) {}
+
+    /**
+     * Eventos de FullCalendar visibles para el usuario entre dos fechas
+     */
+    public function getEventos(User $user, \DateTimeInterface $inicio, \DateTimeInterface $fin): array
+    {
+        return $this->calendarioEntradaRepository->findEventos($this->alcance($user), $inicio, $fin);
+    }
+
+    /**
+     * ETag del calendario de un usuario en una ventana de fechas.
+     *
+     * Cada cambio borra y vuelve a insertar las entradas de la defensa, así que
+     * el número de entradas de la ventana y su id máximo cambian con cualquier
+     * alta, baja o modificación dentro de ella. Se leen con la misma consulta
+     * sobre el índice (usuario_id, fecha_defensa) y en la misma transacción que
+     * los datos, sin cachés aparte que invalidar.
+     */
+    public function getEtag(User $user, \DateTimeInterface $inicio, \DateTimeInterface $fin): string
+    {
+        $usuario = $this->alcance($user);
+
+        $qb = $this->calendarioEntradaRepository->createQueryBuilder('c')
+            ->select('COUNT(c.id) AS entradas', 'MAX(c.id) AS ultima')
+            ->where('c.fechaDefensa BETWEEN :inicio AND :fin')
+            ->setParameter('inicio', $inicio)
+            ->setParameter('fin', $fin);
+
+        if ($usuario) {
+            $qb->andWhere('c.usuario = :usuario')
+               ->setParameter('usuario', $usuario);
+        } else {
+            $qb->andWhere('c.usuario IS NULL');
+        }
+
+        $version = $qb->getQuery()->getSingleResult();
+
+        return sha1(implode('|', [
+            $usuario?->getId() ?? 'global',
+            $inicio->format('c'),
+            $fin->format('c'),
+            $version['entradas'],
+            $version['ultima'] ?? 0
+        ]));
+    }
+
+    // Filas por INSERT multi-fila (4 parámetros por fila, lejos del límite de MySQL)
+    private const FILAS_POR_INSERT = 1000;
+
+    private bool $diferido = false;
+
+    /**
+     * Rehace las entradas de una defensa: una por participante más la de la
+     * vista global. Se escribe con DBAL en la conexión del EntityManager, así
+     * que durante un flush forma parte de la misma transacción.
+     */
+    public function indexarDefensa(Defensa $defensa): void
+    {
+        $this->indexarDefensas([$defensa]);
+    }
+
+    /**
+     * Rehace las entradas de varias defensas con un DELETE y INSERTs multi-fila
+     * en lugar de un INSERT por entrada (programación en lote).
+     *
+     * @param Defensa[] $defensas
+     */
+    public function indexarDefensas(array $defensas): void
+    {
+        $defensas = array_filter($defensas, fn(Defensa $defensa) => $defensa->getId() && $defensa->getFechaDefensa());
+        if (!$defensas) {
+            return;
+        }
+
+        $connection = $this->entityManager->getConnection();
+        $connection->executeStatement(
+            'DELETE FROM calendario_entradas WHERE defensa_id IN (?)',
+            [array_map(fn(Defensa $defensa) => $defensa->getId(), array_values($defensas))],
+            [ArrayParameterType::INTEGER]
+        );
+
+        $filas = [];
+        foreach ($defensas as $defensa) {
+            $evento = $this->buildEvento($defensa);
+            foreach ([null, ...$this->getParticipantes($defensa)] as $usuarioId) {
+                $filas[] = [$usuarioId, $defensa->getId(), $defensa->getFechaDefensa(), $evento];
+            }
+        }
+
+        foreach (array_chunk($filas, self::FILAS_POR_INSERT) as $lote) {
+            $params = [];
+            $types = [];
+            foreach ($lote as $fila) {
+                array_push($params, ...$fila);
+                array_push($types, Types::INTEGER, Types::INTEGER, Types::DATETIME_MUTABLE, Types::JSON);
+            }
+
+            $connection->executeStatement(
+                'INSERT INTO calendario_entradas (usuario_id, defensa_id, fecha_defensa, evento) VALUES '
+                    . implode(', ', array_fill(0, count($lote), '(?, ?, ?, ?)')),
+                $params,
+                $types
+            );
+        }
+    }
+
+    /**
+     * Ejecuta $callback sin que DefensaCalendarioListener indexe cada defensa;
+     * quien lo llama indexa después todas juntas con indexarDefensas().
+     */
+    public function sinIndexar(callable $callback): mixed
+    {
+        $this->diferido = true;
+        try {
+            return $callback();
+        } finally {
+            $this->diferido = false;
+        }
+    }
+
+    public function isDiferido(): bool
+    {
+        return $this->diferido;
+    }
+
+    public function eliminarDefensa(Defensa $defensa): void
+    {
+        if (!$defensa->getId()) {
+            return;
+        }
+
+        $this->entityManager->getConnection()->delete('calendario_entradas', ['defensa_id' => $defensa->getId()]);
+    }
+
+    /**
+     * Vacía el índice y lo vuelve a generar a partir de todas las defensas.
+     * Necesario tras cargar defensas por SQL (seed_dataset.py --mode db).
+     *
+     * Todo ocurre en una transacción: mientras dura, las lecturas siguen viendo
+     * el índice anterior, y si falla a mitad no se queda vacío.
+     *
+     * @return int defensas indexadas
+     */
+    public function reconstruir(): int
+    {
+        return $this->entityManager->wrapInTransaction(function () {
+            $this->entityManager->getConnection()->executeStatement('DELETE FROM calendario_entradas');
+
+            $queryBuilder = $this->entityManager->getRepository(Defensa::class)->createQueryBuilder('d')
+                ->leftJoin('d.tfg', 't')
+                ->leftJoin('t.estudiante', 'e')
+                ->leftJoin('d.tribunal', 'tr')
+                ->addSelect('t', 'e', 'tr');
+
+            $total = 0;
+            foreach ($this->paginationService->iterateInBatches($queryBuilder, ['d.fechaDefensa']) as $defensa) {
+                $this->indexarDefensa($defensa);
+                $total++;
+            }
+
+            return $total;
+        });
+    }
+
+    /**
+     * Evento en formato FullCalendar.js
+     */
+    public function buildEvento(Defensa $defensa): array
+    {
+        $tfg = $defensa->getTfg();
+        $estudiante = $tfg?->getEstudiante();
+
+        $color = match($defensa->getEstado()) {
+            'programada' => '#28a745',
+            'completada' => '#007bff',
+            'cancelada' => '#dc3545',
+            default => '#6c757d'
+        };
+
+        return [
+            'id' => $defensa->getId(),
+            'title' => "Defensa: {$tfg?->getTitulo()}",
+            'start' => $defensa->getFechaDefensa()->format('c'),
+            'end' => (clone $defensa->getFechaDefensa())->add(
+                new \DateInterval('PT' . ($defensa->getDuracionEstimada() ?? 30) . 'M')
+            )->format('c'),
+            'backgroundColor' => $color,
+            'borderColor' => $color,
+            'textColor' => '#ffffff',
+            'extendedProps' => [
+                'defensa_id' => $defensa->getId(),
+                'tfg_id' => $tfg?->getId(),
+                'estudiante' => $estudiante?->getNombreCompleto(),
+                'tribunal' => $defensa->getTribunal()?->getNombre(),
+                'aula' => $defensa->getAula(),
+                'estado' => $defensa->getEstado(),
+                'duracion' => $defensa->getDuracionEstimada(),
+                'observaciones' => $defensa->getObservaciones()
+            ]
+        ];
+    }
+
+    /**
+     * IDs de los usuarios que ven la defensa en su calendario (los mismos que
+     * filtraba DefensaRepository::findForCalendar)
+     *
+     * @return int[]
+     */
+    private function getParticipantes(Defensa $defensa): array
+    {
+        $tfg = $defensa->getTfg();
+        $tribunal = $defensa->getTribunal();
+
+        $usuarios = [
+            $tfg?->getEstudiante(),
+            $tfg?->getTutor(),
+            $tfg?->getCotutor(),
+            $tribunal?->getPresidente(),
+            $tribunal?->getSecretario(),
+            $tribunal?->getVocal()
+        ];
+
+        $ids = array_map(fn(?User $usuario) => $usuario?->getId(), $usuarios);
+
+        return array_values(array_unique(array_filter($ids)));
+    }
+
+    /**
+     * Los administradores ven la vista global (usuario NULL)
+     */
+    private function alcance(User $user): ?User
+    {
+        return in_array('ROLE_ADMIN', $user->getRoles()) ? null : $user;
+    }
+}
@@ -0,0 +1,77 @@
+<?php
+
+namespace App\Service;
+
+use Symfony\Component\HttpFoundation\StreamedResponse;
+
+class ExportService
+{
+    public const FORMATOS = ['csv', 'ndjson', 'json'];
+
+    // Filas escritas entre cada flush al cliente
+    private const FLUSH_EVERY = 200;
+
+    /**
+     * Respuesta que escribe las filas a medida que se generan (transferencia
+     * chunked, sin Content-Length): nunca se tiene la exportación completa en
+     * memoria. $rows debe ser un generador que lea la base de datos por lotes
+     * (PaginationService::iterateInBatches) y produzca arrays asociativos.
+     *
+     * - csv: cabecera con las claves de la primera fila y una línea por fila
+     * - ndjson: un objeto JSON por línea
+     * - json: {"data": [...], "total": N, ...$meta}, el total al final
+     */
+    public function stream(iterable $rows, string $formato, string $filename, array $meta = []): StreamedResponse
+    {
+        $response = new StreamedResponse(function () use ($rows, $formato, $meta) {
+            $output = fopen('php://output', 'w');
+            $total = 0;
+
+            if ($formato === 'json') {
+                fwrite($output, '{"data":[');
+            }
+
+            foreach ($rows as $row) {
+                match ($formato) {
+                    'csv' => $this->writeCsvRow($output, $row, $total === 0),
+                    'ndjson' => fwrite($output, json_encode($row, JSON_UNESCAPED_UNICODE) . "\n"),
+                    'json' => fwrite($output, ($total > 0 ? ',' : '') . json_encode($row, JSON_UNESCAPED_UNICODE)),
+                };
+
+                if (++$total % self::FLUSH_EVERY === 0) {
+                    fflush($output);
+                    flush();
+                }
+            }
+
+            if ($formato === 'json') {
+                $trailer = json_encode(['total' => $total] + $meta, JSON_UNESCAPED_UNICODE);
+                fwrite($output, '],' . substr($trailer, 1));
+            }
+
+            fclose($output);
+        });
+
+        $contentType = match ($formato) {
+            'csv' => 'text/csv; charset=UTF-8',
+            'ndjson' => 'application/x-ndjson',
+            default => 'application/json'
+        };
+
+        $response->headers->set('Content-Type', $contentType);
+        $response->headers->set('Content-Disposition', 'attachment; filename="' . $filename . '"');
+        // Sin buffering en nginx: cada lote llega al cliente en cuanto se escribe
+        $response->headers->set('X-Accel-Buffering', 'no');
+        $response->headers->set('Cache-Control', 'no-store');
+
+        return $response;
+    }
+
+    private function writeCsvRow($output, array $row, bool $withHeader): void
+    {
+        if ($withHeader) {
+            fputcsv($output, array_keys($row));
+        }
+        fputcsv($output, array_map(fn($value) => $value ?? '', $row));
+    }
+}
@@ -2,6 +2,7 @@
 
 namespace App\Service;
 
+use App\Entity\Defensa;
 use App\Entity\Notificacion;
 use App\Entity\User;
 use App\Repository\NotificacionRepository;
@@ -102,7 +103,7 @@ class NotificacionService
     /**
      * Enviar notificación por email
      */
-    public function enviarNotificacionPorEmail(Notificacion $notificacion): void
+    public function enviarNotificacionPorEmail(Notificacion $notificacion, bool $flush = true): void
     {
         try {
             $usuario = $notificacion->getUsuario();
@@ -130,7 +131,9 @@ class NotificacionService
 
             // Marcar como enviada por email
             $notificacion->setEnviadaPorEmail(true);
-            $this->entityManager->flush();
+            if ($flush) {
+                $this->entityManager->flush();
+            }
 
             $this->logger->info('Email de notificación enviado', [
                 'notificacion_id' => $notificacion->getId(),
@@ -254,7 +257,96 @@ class NotificacionService
         string $aula,
         array $tribunal
     ): void {
-        $this->crearNotificacion(
+        foreach ($this->buildDefensaProgramada($estudiante, $tituloTfg, $fechaDefensa, $aula, $tribunal) as [$usuario, $titulo, $mensaje, $tipo, $metadata]) {
+            $this->crearNotificacion($usuario, $titulo, $mensaje, $tipo, $metadata, true);
+        }
+    }
+
+    /**
+     * Notificaciones de un lote de defensas recién programadas: las mismas que
+     * notificarDefensaProgramada (estudiante y tribunal) más la del tutor, con
+     * un único flush para todo el lote en lugar de uno por notificación
+     *
+     * @param Defensa[] $defensas
+     * @return int notificaciones creadas
+     */
+    public function notificarDefensasProgramadas(array $defensas): int
+    {
+        $notificaciones = [];
+
+        foreach ($defensas as $defensa) {
+            $tfg = $defensa->getTfg();
+            $tribunal = $defensa->getTribunal();
+            $estudiante = $tfg->getEstudiante();
+            $miembros = [$tribunal->getPresidente(), $tribunal->getSecretario(), $tribunal->getVocal()];
+
+            $specs = $this->buildDefensaProgramada(
+                $estudiante,
+                $tfg->getTitulo(),
+                $defensa->getFechaDefensa(),
+                $defensa->getAula(),
+                $miembros
+            );
+
+            if ($tfg->getTutor()) {
+                $specs[] = [
+                    $tfg->getTutor(),
+                    'Defensa Programada',
+                    "La defensa del TFG '{$tfg->getTitulo()}' de {$estudiante->getNombreCompleto()} ha sido programada para el " .
+                    $defensa->getFechaDefensa()->format('d/m/Y \a \l\a\s H:i') . " en {$defensa->getAula()}.",
+                    'success',
+                    [
+                        'tipo_evento' => 'defensa_programada_tutor',
+                        'defensa_id' => $defensa->getId(),
+                        'tfg_id' => $tfg->getId()
+                    ]
+                ];
+            }
+
+            foreach ($specs as [$usuario, $titulo, $mensaje, $tipo, $metadata]) {
+                $notificacion = new Notificacion();
+                $notificacion->setUsuario($usuario);
+                $notificacion->setTitulo($titulo);
+                $notificacion->setMensaje($mensaje);
+                $notificacion->setTipo($tipo);
+                $notificacion->setMetadata($metadata);
+                $notificacion->setEnviadaPorEmail(true);
+
+                $this->entityManager->persist($notificacion);
+                $notificaciones[] = $notificacion;
+            }
+        }
+
+        $this->entityManager->flush();
+
+        // Los emails van a la cola de messenger; se marcan todos con un último flush
+        foreach ($notificaciones as $notificacion) {
+            if ($notificacion->getUsuario()->getEmail()) {
+                $this->enviarNotificacionPorEmail($notificacion, false);
+            }
+        }
+        $this->entityManager->flush();
+
+        $this->logger->info('Notificaciones de defensas programadas en lote', [
+            'defensas' => count($defensas),
+            'notificaciones' => count($notificaciones)
+        ]);
+
+        return count($notificaciones);
+    }
+
+    /**
+     * Notificaciones de una defensa programada para el estudiante y cada miembro
+     * del tribunal, como [usuario, título, mensaje, tipo, metadata]
+     */
+    private function buildDefensaProgramada(
+        User $estudiante,
+        string $tituloTfg,
+        \DateTimeInterface $fechaDefensa,
+        string $aula,
+        array $tribunal
+    ): array {
+        $specs = [[
             $estudiante,
             'Defensa Programada',
             "Tu defensa del TFG '{$tituloTfg}' ha sido programada para el " . 
@@ -266,14 +358,13 @@ class NotificacionService
                 'fecha_defensa' => $fechaDefensa->format('c'),
                 'aula' => $aula,
                 'tribunal' => $tribunal
-            ],
-            true
-        );
+            ]
+        ]];
 
         // Notificar también al tribunal
         foreach ($tribunal as $miembro) {
             if ($miembro instanceof User) {
-                $this->crearNotificacion(
+                $specs[] = [
                     $miembro,
                     'Defensa Asignada',
                     "Se te ha asignado la defensa del TFG '{$tituloTfg}' de {$estudiante->getNombreCompleto()} " .
@@ -285,11 +376,12 @@ class NotificacionService
                         'estudiante_id' => $estudiante->getId(),
                         'fecha_defensa' => $fechaDefensa->format('c'),
                         'aula' => $aula
-                    ],
-                    true
-                );
+                    ]
+                ];
             }
         }
+
+        return $specs;
     }
 
     /**
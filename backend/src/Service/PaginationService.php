@@ -31,4 +31,176 @@ class PaginationService
             ]
         ];
     }
+
+    /**
+     * Paginación por cursor (keyset) en orden descendente de $sortField.
+     *
+     * En lugar de OFFSET filtra a partir de la última fila de la página anterior
+     * (codificada en el cursor opaco 'after'), así que el coste de una página no
+     * depende de su profundidad. El id de la entidad raíz desempata filas con el
+     * mismo valor de $sortField.
+     *
+     * No se ejecuta COUNT en cada página: con $withTotal se cuenta una sola vez en
+     * la primera página y el total viaja en el cursor como estimación (puede
+     * desviarse si se crean o borran filas mientras se recorre la lista).
+     *
+     * @throws \InvalidArgumentException si el cursor no es válido
+     */
+    public function paginateByCursor(
+        QueryBuilder $queryBuilder,
+        string $sortField,
+        ?string $after = null,
+        int $limit = 10,
+        bool $withTotal = false
+    ): array {
+        $alias = $queryBuilder->getRootAliases()[0];
+        $idField = $alias . '.id';
+        $cursor = $after ? $this->decodeCursor($after) : null;
+
+        $total = $cursor['total'] ?? null;
+        if ($cursor === null && $withTotal) {
+            $totalQb = clone $queryBuilder;
+            $total = (int) $totalQb->select("COUNT(DISTINCT $idField)")
+                ->resetDQLPart('orderBy')
+                ->getQuery()
+                ->getSingleScalarResult();
+        }
+
+        if ($cursor !== null) {
+            $queryBuilder
+                ->andWhere("($sortField < :cursorValue OR ($sortField = :cursorValue AND $idField < :cursorId))")
+                ->setParameter('cursorValue', $cursor['value'])
+                ->setParameter('cursorId', $cursor['id']);
+        }
+
+        // Una fila de más indica si hay página siguiente sin necesidad de contar
+        $items = $queryBuilder
+            ->orderBy($sortField, 'DESC')
+            ->addOrderBy($idField, 'DESC')
+            ->setMaxResults($limit + 1)
+            ->getQuery()
+            ->getResult();
+
+        $hasNext = count($items) > $limit;
+        $items = array_slice($items, 0, $limit);
+
+        $nextCursor = null;
+        if ($hasNext) {
+            $last = end($items);
+            $metadata = $queryBuilder->getEntityManager()->getClassMetadata(get_class($last));
+            $nextCursor = $this->encodeCursor(
+                $metadata->getFieldValue($last, substr($sortField, strlen($alias) + 1)),
+                $metadata->getFieldValue($last, 'id'),
+                $total
+            );
+        }
+
+        return [
+            'data' => $items,
+            'meta' => [
+                'per_page' => $limit,
+                'has_next' => $hasNext,
+                'next_cursor' => $nextCursor,
+                'total' => $total,
+                'total_is_estimate' => $cursor !== null && $total !== null
+            ]
+        ];
+    }
+
+    /**
+     * Recorre todos los resultados de la consulta en lotes de $batchSize filas
+     * (keyset sobre $sortFields más el id, todos en la misma dirección) y vacía
+     * el EntityManager tras cada lote, así que la memoria no crece con el número
+     * de filas. Pensado para exportaciones: las entidades devueltas quedan
+     * desasociadas del EntityManager en cuanto se pide el siguiente lote.
+     *
+     * @param string[] $sortFields p.ej. ['u.apellidos', 'u.nombre']
+     */
+    public function iterateInBatches(
+        QueryBuilder $queryBuilder,
+        array $sortFields,
+        string $direction = 'ASC',
+        int $batchSize = 500
+    ): \Generator {
+        $alias = $queryBuilder->getRootAliases()[0];
+        $fields = [...$sortFields, $alias . '.id'];
+        $operator = $direction === 'DESC' ? '<' : '>';
+        $entityManager = $queryBuilder->getEntityManager();
+
+        $queryBuilder->resetDQLPart('orderBy');
+        foreach ($fields as $field) {
+            $queryBuilder->addOrderBy($field, $direction);
+        }
+
+        $lastKey = null;
+        do {
+            $batchQb = clone $queryBuilder;
+            if ($lastKey !== null) {
+                // (a > :k0) OR (a = :k0 AND b > :k1) OR (a = :k0 AND b = :k1 AND id > :k2)
+                $conditions = [];
+                foreach ($fields as $i => $field) {
+                    $parts = [];
+                    for ($j = 0; $j < $i; $j++) {
+                        $parts[] = "{$fields[$j]} = :batchKey$j";
+                    }
+                    $parts[] = "$field $operator :batchKey$i";
+                    $conditions[] = '(' . implode(' AND ', $parts) . ')';
+                }
+                $batchQb->andWhere('(' . implode(' OR ', $conditions) . ')');
+                foreach ($lastKey as $i => $value) {
+                    $batchQb->setParameter("batchKey$i", $value);
+                }
+            }
+
+            $rows = $batchQb->setMaxResults($batchSize)->getQuery()->getResult();
+            if (!$rows) {
+                return;
+            }
+
+            $last = end($rows);
+            $metadata = $entityManager->getClassMetadata(get_class($last));
+            $lastKey = array_map(
+                fn(string $field) => $metadata->getFieldValue($last, substr($field, strlen($alias) + 1)),
+                $fields
+            );
+
+            yield from $rows;
+
+            $entityManager->clear();
+        } while (count($rows) === $batchSize);
+    }
+
+    private function encodeCursor(mixed $value, int $id, ?int $total): string
+    {
+        if ($value instanceof \DateTimeInterface) {
+            $value = ['datetime' => $value->format('Y-m-d H:i:s')];
+        }
+
+        $json = json_encode(['v' => $value, 'id' => $id, 't' => $total]);
+
+        return rtrim(strtr(base64_encode($json), '+/', '-_'), '=');
+    }
+
+    private function decodeCursor(string $after): array
+    {
+        $data = json_decode((string) base64_decode(strtr($after, '-_', '+/'), true), true);
+
+        if (!is_array($data) || !array_key_exists('v', $data) || !is_int($data['id'] ?? null)) {
+            throw new \InvalidArgumentException('Cursor de paginación inválido');
+        }
+
+        $value = $data['v'];
+        if (is_array($value)) {
+            $value = \DateTime::createFromFormat('Y-m-d H:i:s', (string) ($value['datetime'] ?? ''));
+            if ($value === false) {
+                throw new \InvalidArgumentException('Cursor de paginación inválido');
+            }
+        }
+
+        return [
+            'value' => $value,
+            'id' => $data['id'],
+            'total' => is_int($data['t'] ?? null) ? $data['t'] : null
+        ];
+    }
 }
\ No newline at end of file
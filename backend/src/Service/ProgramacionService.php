@@ -0,0 +1,358 @@
+<?php
+
+namespace App\Service;
+
+use App\Entity\Defensa;
+use App\Entity\TFG;
+use App\Entity\User;
+use App\Repository\DefensaRepository;
+use App\Repository\TFGRepository;
+use App\Repository\TribunalRepository;
+use Doctrine\ORM\EntityManagerInterface;
+use Symfony\Component\HttpKernel\Exception\ConflictHttpException;
+use Symfony\Component\Validator\Validator\ValidatorInterface;
+
+/**
+ * Programación de defensas en lote (POST /api/defensas/batch).
+ *
+ * En lugar de consultar findConflict/findAulaConflict defensa a defensa, carga
+ * de una vez los TFGs, los tribunales y las defensas existentes en el periodo
+ * del lote y detecta los solapes con un índice de intervalos en memoria por
+ * recurso (tribunal, cada miembro del tribunal y aula). El lote se valida y se
+ * guarda en una transacción: o se programan todas las defensas o ninguna.
+ *
+ * Los lotes se programan de uno en uno (GET_LOCK de MySQL): dos lotes a la vez
+ * con tribunales distintos podrían compartir un profesor o un aula y ninguno
+ * vería las defensas del otro al comprobar los solapes.
+ */
+class ProgramacionService
+{
+    public const MAX_LOTE = 1000;
+
+    private const CAMPOS_REQUERIDOS = ['tfg_id', 'tribunal_id', 'fecha_defensa', 'aula'];
+
+    private const LOCK_NAME = 'programacion_defensas';
+    // Segundos que un lote espera a que termine el anterior
+    private const LOCK_TIMEOUT = 10;
+
+    public function __construct(
+        private EntityManagerInterface $entityManager,
+        private DefensaRepository $defensaRepository,
+        private TFGRepository $tfgRepository,
+        private TribunalRepository $tribunalRepository,
+        private CalendarioService $calendarioService,
+        private ValidatorInterface $validator
+    ) {}
+
+    /**
+     * Valida el lote y, si no hay errores y no es $dryRun, crea las defensas.
+     *
+     * Devuelve ['defensas' => Defensa[] creadas, 'errores' => [...]]; cada error
+     * lleva el 'indice' de la defensa en el lote y, si es un solape, el
+     * 'conflicto' con la defensa existente o la otra defensa del lote.
+     *
+     * @throws ConflictHttpException si otro lote sigue en curso tras LOCK_TIMEOUT
+     */
+    public function programarLote(array $items, User $user, bool $dryRun = false): array
+    {
+        $connection = $this->entityManager->getConnection();
+
+        if (!$connection->fetchOne('SELECT GET_LOCK(?, ?)', [self::LOCK_NAME, self::LOCK_TIMEOUT])) {
+            throw new ConflictHttpException('Hay otra programación de defensas en curso; inténtalo de nuevo');
+        }
+
+        // El bloqueo es de la conexión: se libera después del commit
+        try {
+            return $this->programar($items, $user, $dryRun);
+        } finally {
+            $connection->fetchOne('SELECT RELEASE_LOCK(?)', [self::LOCK_NAME]);
+        }
+    }
+
+    private function programar(array $items, User $user, bool $dryRun): array
+    {
+        return $this->entityManager->wrapInTransaction(function () use ($items, $user, $dryRun) {
+            [$filas, $errores] = $this->parseItems($items);
+
+            $tfgs = $this->tfgRepository->findForScheduling(array_unique(array_column($filas, 'tfg_id')));
+            $tribunales = $this->tribunalRepository->findForScheduling(array_unique(array_column($filas, 'tribunal_id')));
+
+            $esAdmin = in_array('ROLE_ADMIN', $user->getRoles());
+            $esPresidenteGlobal = in_array('ROLE_PRESIDENTE_TRIBUNAL', $user->getRoles());
+            $tfgsDelLote = [];
+
+            foreach ($filas as $indice => $fila) {
+                $tfg = $tfgs[$fila['tfg_id']] ?? null;
+                $tribunal = $tribunales[$fila['tribunal_id']] ?? null;
+
+                $error = match(true) {
+                    !$tfg => 'TFG no encontrado',
+                    !$tribunal => 'Tribunal no encontrado',
+                    !$esAdmin && !$esPresidenteGlobal && $tribunal->getPresidente() !== $user =>
+                        'No tienes permisos para programar defensas con este tribunal',
+                    $tfg->getEstado() !== TFG::ESTADO_APROBADO => 'El TFG debe estar aprobado para programar defensa',
+                    $tfg->getDefensa() !== null => 'El TFG ya tiene una defensa programada',
+                    isset($tfgsDelLote[$tfg->getId()]) => "El TFG ya aparece en la defensa {$tfgsDelLote[$tfg->getId()]} del lote",
+                    !$tribunal->isActivo() => 'El tribunal no está activo',
+                    default => null
+                };
+
+                if ($error) {
+                    $errores[] = ['indice' => $indice, 'error' => $error];
+                    unset($filas[$indice]);
+                    continue;
+                }
+
+                $tfgsDelLote[$tfg->getId()] = $indice;
+                $filas[$indice]['tfg'] = $tfg;
+                $filas[$indice]['tribunal'] = $tribunal;
+            }
+
+            array_push($errores, ...$this->findConflictos($filas));
+
+            if ($errores || $dryRun) {
+                usort($errores, fn(array $a, array $b) => $a['indice'] <=> $b['indice']);
+                return ['defensas' => [], 'errores' => $errores];
+            }
+
+            $defensas = [];
+            foreach ($filas as $indice => $fila) {
+                $defensa = new Defensa();
+                $defensa->setTfg($fila['tfg']);
+                $defensa->setTribunal($fila['tribunal']);
+                $defensa->setFechaDefensa($fila['inicio']);
+                $defensa->setAula($fila['aula']);
+                $defensa->setDuracionEstimada($fila['duracion']);
+                $defensa->setObservaciones($fila['observaciones']);
+                $defensa->setEstado(Defensa::ESTADO_PROGRAMADA);
+
+                foreach ($this->validator->validate($defensa) as $violation) {
+                    $errores[] = ['indice' => $indice, 'error' => $violation->getMessage()];
+                }
+
+                $defensas[$indice] = $defensa;
+            }
+
+            if ($errores) {
+                return ['defensas' => [], 'errores' => $errores];
+            }
+
+            // Sin indexar cada defensa en el flush: todo el lote con INSERTs multi-fila
+            $this->calendarioService->sinIndexar(function () use ($defensas) {
+                foreach ($defensas as $defensa) {
+                    $this->entityManager->persist($defensa);
+                }
+                $this->entityManager->flush();
+            });
+            $this->calendarioService->indexarDefensas($defensas);
+
+            return ['defensas' => $defensas, 'errores' => []];
+        });
+    }
+
+    /**
+     * Comprueba los campos de cada defensa del lote. Devuelve las filas válidas
+     * (por índice) y los errores de las demás.
+     */
+    private function parseItems(array $items): array
+    {
+        $filas = [];
+        $errores = [];
+        $ahora = new \DateTime();
+
+        foreach (array_values($items) as $indice => $item) {
+            if (!is_array($item)) {
+                $errores[] = ['indice' => $indice, 'error' => 'Defensa inválida'];
+                continue;
+            }
+
+            foreach (self::CAMPOS_REQUERIDOS as $field) {
+                if (!isset($item[$field]) || empty($item[$field])) {
+                    $errores[] = ['indice' => $indice, 'error' => "Campo '{$field}' requerido"];
+                    continue 2;
+                }
+            }
+
+            $error = match(true) {
+                !$this->esEntero($item['tfg_id']) => "Campo 'tfg_id' debe ser un entero",
+                !$this->esEntero($item['tribunal_id']) => "Campo 'tribunal_id' debe ser un entero",
+                !is_string($item['fecha_defensa']) => 'Formato de fecha inválido',
+                !is_string($item['aula']) => "Campo 'aula' debe ser texto",
+                isset($item['duracion_estimada']) && !$this->esEntero($item['duracion_estimada']) =>
+                    "Campo 'duracion_estimada' debe ser un entero",
+                isset($item['observaciones']) && !is_string($item['observaciones']) => "Campo 'observaciones' debe ser texto",
+                default => null
+            };
+            if ($error) {
+                $errores[] = ['indice' => $indice, 'error' => $error];
+                continue;
+            }
+
+            try {
+                $inicio = new \DateTime($item['fecha_defensa']);
+            } catch (\Exception $e) {
+                $errores[] = ['indice' => $indice, 'error' => 'Formato de fecha inválido'];
+                continue;
+            }
+
+            if ($inicio <= $ahora) {
+                $errores[] = ['indice' => $indice, 'error' => 'La fecha de defensa debe ser futura'];
+                continue;
+            }
+
+            $duracion = (int) ($item['duracion_estimada'] ?? 30);
+            if ($duracion < Defensa::DURACION_MINIMA || $duracion > Defensa::DURACION_MAXIMA) {
+                $errores[] = [
+                    'indice' => $indice,
+                    'error' => sprintf('La duración debe estar entre %d y %d minutos', Defensa::DURACION_MINIMA, Defensa::DURACION_MAXIMA)
+                ];
+                continue;
+            }
+
+            $filas[$indice] = [
+                'tfg_id' => (int) $item['tfg_id'],
+                'tribunal_id' => (int) $item['tribunal_id'],
+                'inicio' => $inicio,
+                'fin' => (clone $inicio)->add(new \DateInterval('PT' . $duracion . 'M')),
+                'duracion' => $duracion,
+                'aula' => trim($item['aula']),
+                'observaciones' => $item['observaciones'] ?? ''
+            ];
+        }
+
+        return [$filas, $errores];
+    }
+
+    private function esEntero(mixed $valor): bool
+    {
+        return is_int($valor) || (is_string($valor) && ctype_digit($valor));
+    }
+
+    /**
+     * Solapes de las defensas del lote entre sí y con las defensas existentes.
+     *
+     * Cada defensa ocupa el intervalo [inicio, fin) en su tribunal, en cada uno
+     * de sus tres miembros y en su aula. Los intervalos de cada recurso se
+     * ordenan por inicio y se recorren una vez manteniendo el que termina más
+     * tarde: si el siguiente empieza antes de ese fin, se solapan. Coste
+     * O(n log n) para todo el lote, sin una consulta por defensa.
+     */
+    private function findConflictos(array $filas): array
+    {
+        if (!$filas) {
+            return [];
+        }
+
+        $inicio = min(array_column($filas, 'inicio'));
+        $fin = max(array_column($filas, 'fin'));
+
+        $intervalos = [];
+        foreach ($this->defensaRepository->findActivasEntre($inicio, $fin) as $existente) {
+            $this->addIntervalos(
+                $intervalos,
+                $existente->getTribunal(),
+                $existente->getAula(),
+                $existente->getFechaDefensa()->getTimestamp(),
+                $existente->getFechaDefensa()->getTimestamp() + 60 * ($existente->getDuracionEstimada() ?? 30),
+                ['defensa' => $existente]
+            );
+        }
+
+        foreach ($filas as $indice => $fila) {
+            $this->addIntervalos(
+                $intervalos,
+                $fila['tribunal'],
+                $fila['aula'],
+                $fila['inicio']->getTimestamp(),
+                $fila['fin']->getTimestamp(),
+                ['indice' => $indice]
+            );
+        }
+
+        $errores = [];
+        $reportados = [];
+        foreach ($intervalos as $recurso => $lista) {
+            usort($lista, fn(array $a, array $b) => $a[0] <=> $b[0]);
+
+            $activo = null;
+            foreach ($lista as $intervalo) {
+                if ($activo && $intervalo[0] < $activo[1]) {
+                    $this->addConflicto($errores, $reportados, $recurso, $intervalo, $activo);
+                }
+                if (!$activo || $intervalo[1] > $activo[1]) {
+                    $activo = $intervalo;
+                }
+            }
+        }
+
+        return $errores;
+    }
+
+    private function addIntervalos(array &$intervalos, $tribunal, ?string $aula, int $inicio, int $fin, array $ref): void
+    {
+        $ref['tribunal_id'] = $tribunal?->getId();
+        $recursos = ['tribunal:' . $tribunal?->getId()];
+
+        foreach ([$tribunal?->getPresidente(), $tribunal?->getSecretario(), $tribunal?->getVocal()] as $miembro) {
+            if ($miembro) {
+                $recursos[] = 'miembro:' . $miembro->getId();
+            }
+        }
+        if ($aula) {
+            $recursos[] = 'aula:' . mb_strtolower(trim($aula));
+        }
+
+        foreach (array_unique($recursos) as $recurso) {
+            $intervalos[$recurso][] = [$inicio, $fin, $ref];
+        }
+    }
+
+    /**
+     * Registra el solape entre dos intervalos si al menos uno es del lote. Cada
+     * par se informa una vez por tipo de recurso, y el solape de los miembros de
+     * un mismo tribunal solo como solape del tribunal.
+     */
+    private function addConflicto(array &$errores, array &$reportados, string $recurso, array $a, array $b): void
+    {
+        // El error se asigna a la defensa del lote; si ambas lo son, a la que aparece después
+        [$nueva, $otra] = match(true) {
+            !isset($a[2]['indice']) => [$b, $a],
+            !isset($b[2]['indice']) => [$a, $b],
+            default => $a[2]['indice'] > $b[2]['indice'] ? [$a, $b] : [$b, $a]
+        };
+        if (!isset($nueva[2]['indice'])) {
+            return;
+        }
+
+        $otraClave = isset($otra[2]['indice']) ? 'lote:' . $otra[2]['indice'] : 'defensa:' . $otra[2]['defensa']->getId();
+        $tipo = strstr($recurso, ':', true);
+        // Mismo tribunal: el solape de sus miembros ya está cubierto por el del tribunal
+        if ($tipo === 'miembro' && $nueva[2]['tribunal_id'] === $otra[2]['tribunal_id']) {
+            return;
+        }
+
+        $par = $nueva[2]['indice'] . '|' . $otraClave . '|' . $tipo;
+        if (isset($reportados[$par])) {
+            return;
+        }
+        $reportados[$par] = true;
+
+        $mensaje = match($tipo) {
+            'tribunal' => 'El tribunal ya tiene una defensa programada en ese horario',
+            'miembro' => 'Un miembro del tribunal ya tiene otra defensa en ese horario',
+            default => 'El aula ya está ocupada en ese horario'
+        };
+
+        $conflicto = ['tipo' => $tipo];
+        if (isset($otra[2]['indice'])) {
+            $conflicto['indice'] = $otra[2]['indice'];
+        } else {
+            $existente = $otra[2]['defensa'];
+            $conflicto['defensa_id'] = $existente->getId();
+            $conflicto['fecha'] = $existente->getFechaDefensa()->format('c');
+            $conflicto['tfg'] = $existente->getTfg()?->getTitulo();
+        }
+
+        $errores[] = ['indice' => $nueva[2]['indice'], 'error' => $mensaje, 'conflicto' => $conflicto];
+    }
+}
@@ -3,24 +3,29 @@
 Tests para endpoints de autenticación
 Base URL: https://tfg-backend.ddev.site
 """
-import requests
-import json
 import sys
 import os
 import urllib3
 
+# Capa de transporte compartida (backend/tests/http_client.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import create_session, run_concurrently
+from token_cache import TokenCache, TOKENS_FILE
+
 # Deshabilitar warnings SSL para entorno de desarrollo DDEV
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://tfg-backend.ddev.site"
 
 class AuthTestSuite:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, transport=None, reuse_tokens=False):
+        self.session = create_session(transport)
         # Deshabilitar verificación SSL para DDEV local
         self.session.verify = False
         self.tokens = {}
         self.test_results = []
+        # Con reuse_tokens los logins válidos salen de la caché o se renuevan con el refresh token
+        self.token_cache = TokenCache(BASE_URL) if reuse_tokens else None
         
     def log_test(self, test_name, status, details=None):
         """Registra el resultado de un test"""
@@ -34,6 +39,12 @@ class AuthTestSuite:
         if details and not status:
             print(f"    Details: {details}")
     
+    def login(self, payload):
+        """POST /api/auth/login, o el token de la caché si se reutilizan tokens"""
+        if self.token_cache:
+            return self.token_cache.login(self.session, payload['username'], payload['password'])
+        return self.session.post(f"{BASE_URL}/api/auth/login", json=payload)
+    
     def test_login_estudiante(self):
         """Test login con credenciales de estudiante"""
         try:
@@ -42,7 +53,7 @@ class AuthTestSuite:
                 "password": "123456"
             }
             
-            response = self.session.post(f"{BASE_URL}/api/auth/login", json=payload)
+            response = self.login(payload)
             
             if response.status_code == 200:
                 data = response.json()
@@ -70,7 +81,7 @@ class AuthTestSuite:
                 "password": "123456"
             }
             
-            response = self.session.post(f"{BASE_URL}/api/auth/login", json=payload)
+            response = self.login(payload)
             
             if response.status_code == 200:
                 data = response.json()
@@ -98,7 +109,7 @@ class AuthTestSuite:
                 "password": "123456"
             }
             
-            response = self.session.post(f"{BASE_URL}/api/auth/login", json=payload)
+            response = self.login(payload)
             
             if response.status_code == 200:
                 data = response.json()
@@ -147,7 +158,7 @@ class AuthTestSuite:
                 "password": "123456"
             }
             
-            response = self.session.post(f"{BASE_URL}/api/auth/login", json=payload)
+            response = self.login(payload)
             
             if response.status_code == 200:
                 data = response.json()
@@ -200,17 +211,17 @@ class AuthTestSuite:
         """Ejecuta todos los tests de autenticación"""
         print("=== TESTS DE AUTENTICACIÓN ===")
         
-        tests = [
+        # Los logins son independientes y pueden enviarse a la vez
+        run_concurrently(self.session, [
             self.test_login_estudiante,
             self.test_login_profesor,
             self.test_login_admin,
             self.test_login_presidente,
-            self.test_login_invalid,
-            self.test_refresh_token
-        ]
+            self.test_login_invalid
+        ])
         
-        for test in tests:
-            test()
+        # El refresh necesita el refresh token del login de estudiante
+        self.test_refresh_token()
         
         # Resumen
         passed = sum(1 for r in self.test_results if r['status'])
@@ -225,8 +236,7 @@ if __name__ == "__main__":
     auth_suite = AuthTestSuite()
     tokens, results = auth_suite.run_all_tests()
     
-    # Guardar tokens para otros tests
-    with open('/tmp/tfg_test_tokens.json', 'w') as f:
-        json.dump(tokens, f)
+    # Guardar tokens para otros tests (conservando la caché de tokens)
+    TokenCache(BASE_URL).save_tokens(tokens)
     
-    print("\nTokens guardados en /tmp/tfg_test_tokens.json para otros tests")
\ No newline at end of file
+    print(f"\nTokens guardados en {TOKENS_FILE} para otros tests")
\ No newline at end of file
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Compara las latencias de dos reportes JSON (tests o prueba de carga) y detecta
+regresiones de rendimiento por endpoint
+
+Para cada ruta presente en ambos reportes se aplica el test U de Mann-Whitney
+(unilateral: ¿es más lenta la ejecución actual?) sobre las muestras de los
+histogramas, y se marca como regresión si además la mediana crece por encima
+del umbral configurado.
+
+Uso:
+    python3 compare_reports.py baseline.json actual.json [--threshold 1.5] [--alpha 0.01]
+"""
+import sys
+import os
+import json
+import math
+import argparse
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from metrics import LatencyHistogram
+
+DEFAULT_THRESHOLD = 1.5
+DEFAULT_ALPHA = 0.01
+DEFAULT_MIN_SAMPLES = 3
+DEFAULT_MIN_DELTA_MS = 5.0
+
+def load_route_histograms(path):
+    """Histogramas de latencia total por ruta (sumando todos los roles) de un reporte"""
+    with open(path) as f:
+        report = json.load(f)
+
+    histograms = report.get('latency', {}).get('histograms')
+    if histograms is None:
+        raise ValueError(f"{path} no contiene histogramas de latencia (reporte anterior a las métricas)")
+
+    routes = {}
+    for key, phases in histograms.items():
+        route = key.rpartition('|')[0]
+        if 'total' in phases:
+            routes.setdefault(route, LatencyHistogram()).merge(LatencyHistogram.from_dict(phases['total']))
+    return routes
+
+def mann_whitney_greater(baseline, current):
+    """
+    Test U de Mann-Whitney con aproximación normal, corrección de empates y de
+    continuidad. Los buckets de los histogramas son grupos de valores empatados.
+    Devuelve (U de la ejecución actual, p-valor de H1: actual > baseline).
+    """
+    # Se combinan por clave de bucket: el valor representativo depende del
+    # máximo de cada histograma y partiría un mismo bucket en dos grupos
+    counts = {}
+    for key, count in baseline.buckets():
+        counts.setdefault(key, [0, 0])[0] += count
+    for key, count in current.buckets():
+        counts.setdefault(key, [0, 0])[1] += count
+
+    n1, n2 = baseline.count, current.count
+    n = n1 + n2
+    rank_sum = 0.0
+    ties = 0
+    next_rank = 1
+    for key in sorted(counts):
+        in_baseline, in_current = counts[key]
+        group = in_baseline + in_current
+        average_rank = next_rank + (group - 1) / 2
+        rank_sum += in_current * average_rank
+        ties += group ** 3 - group
+        next_rank += group
+
+    u = rank_sum - n2 * (n2 + 1) / 2
+    mean = n1 * n2 / 2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return u, 1.0
+
+    z = (u - mean - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))
+
+def compare_reports(baseline_path, current_path, threshold=DEFAULT_THRESHOLD, alpha=DEFAULT_ALPHA,
+                    min_samples=DEFAULT_MIN_SAMPLES, min_delta_ms=DEFAULT_MIN_DELTA_MS):
+    """Compara dos reportes y devuelve la lista de comparaciones por ruta"""
+    baseline = load_route_histograms(baseline_path)
+    current = load_route_histograms(current_path)
+
+    comparisons = []
+    for route in sorted(set(baseline) & set(current)):
+        before, after = baseline[route], current[route]
+        median_before = before.percentile(50) / 1000
+        median_after = after.percentile(50) / 1000
+        ratio = median_after / median_before if median_before > 0 else float('inf')
+
+        if before.count < min_samples or after.count < min_samples:
+            comparisons.append({
+                'route': route, 'baseline_ms': median_before, 'current_ms': median_after,
+                'ratio': ratio, 'p_value': None, 'status': 'insuficiente'
+            })
+            continue
+
+        _, p_value = mann_whitney_greater(before, after)
+        regression = (
+            p_value < alpha
+            and ratio >= threshold
+            and median_after - median_before >= min_delta_ms
+        )
+        comparisons.append({
+            'route': route, 'baseline_ms': median_before, 'current_ms': median_after,
+            'ratio': ratio, 'p_value': p_value, 'status': 'regresion' if regression else 'ok'
+        })
+
+    return comparisons
+
+def print_comparison(comparisons, threshold, alpha):
+    """Imprime la tabla de comparación y devuelve las regresiones detectadas"""
+    print("=" * 80)
+    print(f"📉 COMPARACIÓN DE LATENCIAS (umbral x{threshold:g} sobre la mediana, alpha {alpha:g})")
+    print("=" * 80)
+    print(f"{'Endpoint':<40}{'base ms':>9}{'actual ms':>10}{'ratio':>7}{'p-valor':>10}  Estado")
+    print("-" * 80)
+
+    for c in comparisons:
+        icon = {'ok': '✅', 'regresion': '❌', 'insuficiente': 'ℹ️'}[c['status']]
+        p_value = f"{c['p_value']:.4f}" if c['p_value'] is not None else '-'
+        print(f"{c['route'][:39]:<40}{c['baseline_ms']:>9.1f}{c['current_ms']:>10.1f}"
+              f"{c['ratio']:>7.2f}{p_value:>10}  {icon} {c['status']}")
+
+    regressions = [c for c in comparisons if c['status'] == 'regresion']
+    print("-" * 80)
+    if regressions:
+        print(f"💥 {len(regressions)} endpoint(s) con regresión de rendimiento")
+    else:
+        print(f"✅ Sin regresiones en {len(comparisons)} endpoint(s) comparados")
+    print("=" * 80)
+    return regressions
+
+def add_threshold_arguments(parser):
+    """Argumentos del umbral de regresión, compartidos con run_all_tests.py"""
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Ratio de medianas actual/baseline a partir del cual hay regresión (por defecto: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA,
+                        help=f"Nivel de significación del test de Mann-Whitney (por defecto: {DEFAULT_ALPHA})")
+    parser.add_argument('--min-samples', type=int, default=DEFAULT_MIN_SAMPLES,
+                        help=f"Muestras mínimas por endpoint en cada reporte (por defecto: {DEFAULT_MIN_SAMPLES})")
+    parser.add_argument('--min-delta-ms', type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help=f"Diferencia mínima de medianas en ms para considerar regresión (por defecto: {DEFAULT_MIN_DELTA_MS})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Detecta regresiones de latencia entre dos reportes de tests")
+    parser.add_argument('baseline', help="Reporte JSON de referencia")
+    parser.add_argument('current', help="Reporte JSON de la ejecución actual")
+    add_threshold_arguments(parser)
+    args = parser.parse_args()
+
+    try:
+        comparisons = compare_reports(args.baseline, args.current, args.threshold, args.alpha,
+                                      args.min_samples, args.min_delta_ms)
+    except (OSError, ValueError) as e:
+        print(f"❌ {str(e)}")
+        sys.exit(2)
+
+    regressions = print_comparison(comparisons, args.threshold, args.alpha)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
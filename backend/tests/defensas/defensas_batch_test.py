@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Tests para POST /api/defensas/batch (programación de defensas en lote)
+Base URL: https://tfg-backend.ddev.site
+
+Programa BATCH_SIZE defensas de una vez sobre los TFGs aprobados sin defensa
+del dataset sintético y mide el tiempo de la validación (dry_run) y de la
+programación real. Necesita un dataset con suficientes TFGs libres:
+
+    python3 seed_dataset.py --scale medium --defensas 1000
+    python3 defensas/defensas_batch_test.py --manifest /tmp/tfg_seed_manifest_s42.json
+
+Sin manifiesto o con menos de BATCH_SIZE TFGs libres, los tests que lo
+necesitan se omiten.
+"""
+import json
+import sys
+import os
+import argparse
+from datetime import timedelta
+import urllib3
+
+# Capa de transporte compartida (backend/tests/http_client.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import create_session, run_concurrently
+from seed_dataset import term_start
+from defensas_batch import DEFAULT_MANIFEST, load_seed_resources, build_schedule, post_batch
+
+# Deshabilitar warnings SSL para entorno de desarrollo DDEV
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+BASE_URL = "https://tfg-backend.ddev.site"
+
+# Defensas del lote que se programa y mide
+BATCH_SIZE = 500
+
+class DefensasBatchTestSuite:
+    def __init__(self, tokens=None, namespace=None, transport=None, manifest_path=DEFAULT_MANIFEST):
+        self.session = create_session(transport)
+        # Deshabilitar verificación SSL para DDEV local
+        self.session.verify = False
+        self.tokens = tokens or {}
+        self.namespace = namespace
+        self.suffix = f" [{namespace}]" if namespace else ""
+        self.test_results = []
+        self.created_defensas = []  # Para cleanup
+
+        # Recursos del dataset sintético; sin manifiesto los tests de volumen se omiten
+        self.tfg_ids = []
+        self.tribunales = []
+        self.skip_reason = None
+        try:
+            self.tfg_ids, self.tribunales = load_seed_resources(manifest_path)
+        except (OSError, ValueError, KeyError) as e:
+            self.skip_reason = f"sin manifiesto de seed_dataset.py ({str(e)})"
+
+        if not self.skip_reason and len(self.tfg_ids) < BATCH_SIZE + 1:
+            self.skip_reason = (f"solo {len(self.tfg_ids)} TFGs aprobados sin defensa en el dataset "
+                                f"(se necesitan {BATCH_SIZE + 1}; seed_dataset.py --scale medium --defensas 1000)")
+
+        # Ventana lejana (un año después del cuatrimestre del dataset) y aulas propias
+        # para no chocar con las defensas ya sembradas ni con otras ejecuciones
+        self.window_start = term_start() + timedelta(weeks=52)
+        self.aula_prefix = f"Aula Lote{self.suffix}"
+
+        # Headers para cada rol
+        self.headers = {}
+        if self.tokens.get('estudiante'):
+            self.headers['estudiante'] = {'Authorization': f'Bearer {self.tokens["estudiante"]}'}
+        if self.tokens.get('profesor'):
+            self.headers['profesor'] = {'Authorization': f'Bearer {self.tokens["profesor"]}'}
+        if self.tokens.get('admin'):
+            self.headers['admin'] = {'Authorization': f'Bearer {self.tokens["admin"]}'}
+
+    def log_test(self, test_name, status, details=None):
+        """Registra el resultado de un test"""
+        result = {
+            "test": test_name,
+            "status": status,
+            "details": details or ""
+        }
+        self.test_results.append(result)
+        print(f"[{'PASS' if status else 'FAIL'}] {test_name}")
+        if details and not status:
+            print(f"    Details: {details}")
+
+    def log_skip(self, test_name, reason):
+        """Registra un test omitido: no cuenta como pasado ni como fallido"""
+        print(f"[SKIP] {test_name}")
+        print(f"    {reason}")
+
+    def schedule(self):
+        """Lote de BATCH_SIZE defensas sin conflictos en la ventana de la suite"""
+        return build_schedule(self.tfg_ids[:BATCH_SIZE], self.tribunales, self.window_start, self.aula_prefix)
+
+    def test_batch_invalid_payload(self):
+        """Test POST /api/defensas/batch sin lista de defensas"""
+        if 'admin' not in self.headers:
+            self.log_test("POST batch payload inválido", False, "No hay token de admin")
+            return False
+
+        try:
+            response = self.session.post(
+                f"{BASE_URL}/api/defensas/batch",
+                json={"dry_run": True},
+                headers=self.headers['admin']
+            )
+
+            if response.status_code == 400:
+                self.log_test("POST batch payload inválido", True, "Lote sin defensas rechazado correctamente")
+                return True
+            else:
+                self.log_test("POST batch payload inválido", False, f"Status inesperado: {response.status_code}")
+                return False
+
+        except Exception as e:
+            self.log_test("POST batch payload inválido", False, f"Exception: {str(e)}")
+            return False
+
+    def test_batch_estudiante_forbidden(self):
+        """Test POST /api/defensas/batch como estudiante (debe fallar)"""
+        if 'estudiante' not in self.headers:
+            self.log_test("POST batch estudiante (forbidden)", False, "No hay token de estudiante")
+            return False
+
+        try:
+            response, _ = post_batch(self.session, self.headers['estudiante'], [], dry_run=True)
+
+            if response.status_code == 403:
+                self.log_test("POST batch estudiante (forbidden)", True, "Acceso denegado correctamente")
+                return True
+            else:
+                self.log_test("POST batch estudiante (forbidden)", False, f"Status inesperado: {response.status_code}")
+                return False
+
+        except Exception as e:
+            self.log_test("POST batch estudiante (forbidden)", False, f"Exception: {str(e)}")
+            return False
+
+    def test_batch_tipos_invalidos(self):
+        """Test POST /api/defensas/batch con campos de tipo incorrecto (error por defensa, no 500)"""
+        if 'admin' not in self.headers:
+            self.log_test("POST batch tipos inválidos", False, "No hay token de admin")
+            return False
+
+        try:
+            valida = {
+                "tfg_id": 1,
+                "tribunal_id": 1,
+                "fecha_defensa": (self.window_start + timedelta(hours=9)).isoformat(),
+                "aula": f"{self.aula_prefix} Tipos"
+            }
+            defensas = [
+                dict(valida, fecha_defensa=["2030-01-01T09:00:00"]),
+                dict(valida, observaciones={"texto": "no es texto"}),
+                dict(valida, tfg_id="abc")
+            ]
+
+            response, _ = post_batch(self.session, self.headers['admin'], defensas, dry_run=True)
+
+            if response.status_code != 400:
+                self.log_test("POST batch tipos inválidos", False, f"Status inesperado: {response.status_code}")
+                return False
+
+            indices = {e['indice'] for e in response.json().get('errores', [])}
+            if {0, 1, 2} <= indices:
+                self.log_test("POST batch tipos inválidos", True, "Errores por defensa para los tres tipos incorrectos")
+                return True
+            else:
+                self.log_test("POST batch tipos inválidos", False, f"Errores inesperados: {response.json().get('errores')}")
+                return False
+
+        except Exception as e:
+            self.log_test("POST batch tipos inválidos", False, f"Exception: {str(e)}")
+            return False
+
+    def test_batch_conflicto_interno(self):
+        """Test POST /api/defensas/batch con dos defensas del lote en la misma aula y hora"""
+        if 'admin' not in self.headers:
+            self.log_test("POST batch conflicto dentro del lote", False, "No hay token de admin")
+            return False
+        if self.skip_reason:
+            self.log_skip("POST batch conflicto dentro del lote", f"Omitido: {self.skip_reason}")
+            return True
+
+        try:
+            primera, segunda = build_schedule(self.tfg_ids[:2], self.tribunales, self.window_start, self.aula_prefix)
+            # Misma franja y misma aula que la primera: la segunda debe chocar en el aula
+            segunda = dict(segunda, fecha_defensa=primera['fecha_defensa'], aula=primera['aula'])
+
+            response, _ = post_batch(self.session, self.headers['admin'], [primera, segunda], dry_run=True)
+
+            if response.status_code != 400:
+                self.log_test("POST batch conflicto dentro del lote", False, f"Status inesperado: {response.status_code}")
+                return False
+
+            errores = response.json().get('errores', [])
+            if any(e['indice'] == 1 and e.get('conflicto', {}).get('indice') == 0 for e in errores):
+                self.log_test("POST batch conflicto dentro del lote", True, f"Conflicto detectado: {errores[0]['error']}")
+                return True
+            else:
+                self.log_test("POST batch conflicto dentro del lote", False, f"Errores inesperados: {errores}")
+                return False
+
+        except Exception as e:
+            self.log_test("POST batch conflicto dentro del lote", False, f"Exception: {str(e)}")
+            return False
+
+    def test_batch_dry_run(self):
+        """Test POST /api/defensas/batch con dry_run: valida el lote completo sin programarlo"""
+        if 'admin' not in self.headers:
+            self.log_test(f"POST batch dry_run ({BATCH_SIZE})", False, "No hay token de admin")
+            return False
+        if self.skip_reason:
+            self.log_skip(f"POST batch dry_run ({BATCH_SIZE})", f"Omitido: {self.skip_reason}")
+            return True
+
+        try:
+            response, elapsed = post_batch(self.session, self.headers['admin'], self.schedule(), dry_run=True)
+
+            if response.status_code == 200 and response.json().get('total') == BATCH_SIZE:
+                self.log_test(f"POST batch dry_run ({BATCH_SIZE})", True, f"Lote válido en {elapsed:.0f} ms")
+                print(f"    ⏱️ Validación de {BATCH_SIZE} defensas: {elapsed:.0f} ms")
+                return True
+            else:
+                self.log_test(f"POST batch dry_run ({BATCH_SIZE})", False,
+                              f"Status inesperado: {response.status_code} - {response.text[:300]}")
+                return False
+
+        except Exception as e:
+            self.log_test(f"POST batch dry_run ({BATCH_SIZE})", False, f"Exception: {str(e)}")
+            return False
+
+    def test_batch_programar(self):
+        """Test POST /api/defensas/batch programando BATCH_SIZE defensas de una vez"""
+        if 'admin' not in self.headers:
+            self.log_test(f"POST batch programar ({BATCH_SIZE})", False, "No hay token de admin")
+            return False
+        if self.skip_reason:
+            self.log_skip(f"POST batch programar ({BATCH_SIZE})", f"Omitido: {self.skip_reason}")
+            return True
+
+        try:
+            response, elapsed = post_batch(self.session, self.headers['admin'], self.schedule())
+
+            if response.status_code != 201:
+                self.log_test(f"POST batch programar ({BATCH_SIZE})", False,
+                              f"Status inesperado: {response.status_code} - {response.text[:300]}")
+                return False
+
+            data = response.json()
+            self.created_defensas.extend(d['id'] for d in data.get('data', []))
+
+            if data.get('total') == BATCH_SIZE and len(data.get('data', [])) == BATCH_SIZE:
+                self.log_test(f"POST batch programar ({BATCH_SIZE})", True,
+                              f"{BATCH_SIZE} defensas en {elapsed:.0f} ms, {data.get('notificaciones', 0)} notificaciones")
+                print(f"    ⏱️ Programación de {BATCH_SIZE} defensas: {elapsed:.0f} ms "
+                      f"({elapsed / BATCH_SIZE:.1f} ms por defensa, {data.get('notificaciones', 0)} notificaciones)")
+                return True
+            else:
+                self.log_test(f"POST batch programar ({BATCH_SIZE})", False, f"Se programaron {data.get('total')} defensas")
+                return False
+
+        except Exception as e:
+            self.log_test(f"POST batch programar ({BATCH_SIZE})", False, f"Exception: {str(e)}")
+            return False
+
+    def test_batch_conflicto_existente(self):
+        """Test POST /api/defensas/batch que choca con una defensa ya programada por el lote anterior"""
+        if 'admin' not in self.headers:
+            self.log_test("POST batch conflicto con defensa existente", False, "No hay token de admin")
+            return False
+        if self.skip_reason or not self.created_defensas:
+            reason = self.skip_reason or "no se programó el lote anterior"
+            self.log_skip("POST batch conflicto con defensa existente", f"Omitido: {reason}")
+            return True
+
+        try:
+            # Un TFG libre en la primera franja y aula del lote ya programado
+            ocupada = self.schedule()[0]
+            nueva = dict(ocupada, tfg_id=self.tfg_ids[BATCH_SIZE])
+
+            response, _ = post_batch(self.session, self.headers['admin'], [nueva], dry_run=True)
+
+            if response.status_code != 400:
+                self.log_test("POST batch conflicto con defensa existente", False, f"Status inesperado: {response.status_code}")
+                return False
+
+            errores = response.json().get('errores', [])
+            if any('defensa_id' in e.get('conflicto', {}) for e in errores):
+                self.log_test("POST batch conflicto con defensa existente", True, f"Conflicto detectado: {errores[0]['error']}")
+                return True
+            else:
+                self.log_test("POST batch conflicto con defensa existente", False, f"Errores inesperados: {errores}")
+                return False
+
+        except Exception as e:
+            self.log_test("POST batch conflicto con defensa existente", False, f"Exception: {str(e)}")
+            return False
+
+    def cleanup_created_defensas(self):
+        """Elimina las defensas programadas por el lote"""
+        if not self.created_defensas:
+            return
+
+        print(f"\n=== LIMPIEZA: Eliminando {len(self.created_defensas)} defensas del lote ===")
+
+        if 'admin' not in self.headers:
+            print(f"⚠ No se pueden eliminar las defensas: no hay token de admin")
+            return
+
+        def delete(defensa_id):
+            def task():
+                response = self.session.delete(f"{BASE_URL}/api/defensas/{defensa_id}", headers=self.headers['admin'])
+                if response.status_code not in [200, 204]:
+                    print(f"✗ No se pudo eliminar defensa {defensa_id}: {response.status_code}")
+            return task
+
+        run_concurrently(self.session, [delete(defensa_id) for defensa_id in self.created_defensas])
+        print(f"✓ {len(self.created_defensas)} defensas eliminadas")
+        self.created_defensas = []
+
+    def run_all_tests(self):
+        """Ejecuta todos los tests de programación en lote"""
+        print("📅 EJECUTANDO TESTS DE PROGRAMACIÓN EN LOTE")
+        print("=" * 50)
+
+        # Tests de validación
+        run_concurrently(self.session, [
+            self.test_batch_invalid_payload,
+            self.test_batch_estudiante_forbidden,
+            self.test_batch_tipos_invalidos,
+            self.test_batch_conflicto_interno
+        ])
+
+        # Tests de volumen (en orden: el último depende del lote programado)
+        self.test_batch_dry_run()
+        self.test_batch_programar()
+        self.test_batch_conflicto_existente()
+
+        # Resumen
+        passed = sum(1 for r in self.test_results if r['status'])
+        total = len(self.test_results)
+
+        print(f"\n=== RESUMEN PROGRAMACIÓN EN LOTE ===")
+        print(f"Pasados: {passed}/{total}")
+
+        return self.test_results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tests de POST /api/defensas/batch")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help=f"Manifiesto de seed_dataset.py (por defecto: {DEFAULT_MANIFEST})")
+    parser.add_argument('--transport', default=None, help="Transporte HTTP (requests, async, http2)")
+    args = parser.parse_args()
+
+    # Cargar tokens de autenticación
+    try:
+        with open('/tmp/tfg_test_tokens.json', 'r') as f:
+            tokens = json.load(f)
+    except:
+        tokens = {}
+
+    batch_suite = DefensasBatchTestSuite(tokens, transport=args.transport, manifest_path=args.manifest)
+    results = batch_suite.run_all_tests()
+
+    # Cleanup
+    batch_suite.cleanup_created_defensas()
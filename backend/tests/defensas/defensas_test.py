@@ -3,24 +3,30 @@
 Tests para endpoints de gestión de Defensas
 Base URL: https://tfg-backend.ddev.site
 """
-import requests
 import json
 import sys
 import os
 from datetime import datetime, timedelta
 import urllib3
 
+# Capa de transporte compartida (backend/tests/http_client.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import create_session, run_concurrently
+
 # Deshabilitar warnings SSL para entorno de desarrollo DDEV
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://tfg-backend.ddev.site"
 
 class DefensasTestSuite:
-    def __init__(self, tokens=None):
-        self.session = requests.Session()
+    def __init__(self, tokens=None, namespace=None, transport=None):
+        self.session = create_session(transport)
         # Deshabilitar verificación SSL para DDEV local
         self.session.verify = False
         self.tokens = tokens or {}
+        # Sufijo para distinguir los datos creados por cada worker en ejecuciones paralelas
+        self.namespace = namespace
+        self.suffix = f" [{namespace}]" if namespace else ""
         self.test_results = []
         self.created_defensas = []  # Para cleanup
         
@@ -163,6 +169,47 @@ class DefensasTestSuite:
             self.log_test("GET calendario defensas admin", False, f"Exception: {str(e)}")
             return False
     
+    def test_calendario_etag_not_modified(self):
+        """Test GET /api/defensas/calendario con If-None-Match (304 si no ha cambiado)"""
+        if 'profesor' not in self.headers:
+            self.log_test("GET calendario con ETag (304)", False, "No hay token de profesor")
+            return False
+            
+        try:
+            params = {
+                "start": datetime.now().strftime("%Y-%m-01"),
+                "end": (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+            }
+            
+            response = self.session.get(
+                f"{BASE_URL}/api/defensas/calendario",
+                params=params,
+                headers=self.headers['profesor']
+            )
+            etag = response.headers.get('ETag')
+            if response.status_code != 200 or not etag:
+                self.log_test("GET calendario con ETag (304)", False, 
+                            f"Status: {response.status_code}, ETag: {etag}")
+                return False
+            
+            revalidation = self.session.get(
+                f"{BASE_URL}/api/defensas/calendario",
+                params=params,
+                headers={**self.headers['profesor'], 'If-None-Match': etag}
+            )
+            
+            if revalidation.status_code == 304 and not revalidation.content:
+                self.log_test("GET calendario con ETag (304)", True, f"Revalidado sin cuerpo con {etag}")
+                return True
+            else:
+                self.log_test("GET calendario con ETag (304)", False, 
+                            f"Status: {revalidation.status_code}, {len(revalidation.content)} bytes")
+                return False
+                
+        except Exception as e:
+            self.log_test("GET calendario con ETag (304)", False, f"Exception: {str(e)}")
+            return False
+    
     def test_create_defensa_admin(self):
         """Test POST /api/defensas como admin"""
         if 'admin' not in self.headers:
@@ -177,7 +224,7 @@ class DefensasTestSuite:
                 "tfg_id": self.test_tfg_id,
                 "tribunal_id": self.test_tribunal_id,
                 "fecha_defensa": fecha_defensa.isoformat() + "Z",
-                "aula": "Aula Test 101",
+                "aula": f"Aula Test 101{self.suffix}",
                 "duracion_estimada": 30,
                 "observaciones": "Defensa de prueba para testing de API"
             }
@@ -220,7 +267,7 @@ class DefensasTestSuite:
                 "tfg_id": self.test_tfg_id,
                 "tribunal_id": self.test_tribunal_id,
                 "fecha_defensa": fecha_defensa.isoformat() + "Z",
-                "aula": "Aula Test 102",
+                "aula": f"Aula Test 102{self.suffix}",
                 "duracion_estimada": 45,
                 "observaciones": "Defensa programada por presidente de tribunal"
             }
@@ -364,7 +411,7 @@ class DefensasTestSuite:
                 "tfg_id": self.test_tfg_id,
                 "tribunal_id": self.test_tribunal_id,
                 "fecha_defensa": fecha_defensa.isoformat() + "Z",
-                "aula": "Aula Test Conflicto",
+                "aula": f"Aula Test Conflicto{self.suffix}",
                 "duracion_estimada": 30,
                 "observaciones": "Test de conflicto de horario"
             }
@@ -382,7 +429,7 @@ class DefensasTestSuite:
                     self.created_defensas.append(data1['id'])
                 
                 # Intentar crear segunda defensa para el mismo TFG (debería fallar porque ya tiene defensa)
-                payload['aula'] = "Aula Test Conflicto 2"  # Cambiar aula
+                payload['aula'] = f"Aula Test Conflicto 2{self.suffix}"  # Cambiar aula
                 response2 = self.session.post(
                     f"{BASE_URL}/api/defensas",
                     json=payload,
@@ -432,10 +479,13 @@ class DefensasTestSuite:
         """Ejecuta todos los tests de defensas"""
         print("=== TESTS DE DEFENSAS ===")
         
-        # Tests de lectura del calendario
-        self.test_get_calendario_defensas_profesor()
-        self.test_get_calendario_defensas_estudiante()
-        self.test_get_calendario_defensas_admin()
+        # Tests de lectura del calendario (independientes entre sí)
+        run_concurrently(self.session, [
+            self.test_get_calendario_defensas_profesor,
+            self.test_get_calendario_defensas_estudiante,
+            self.test_get_calendario_defensas_admin
+        ])
+        self.test_calendario_etag_not_modified()
         
         # Tests de creación
         self.test_create_defensa_admin()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Cliente de POST /api/defensas/batch (programación de defensas en lote)
+Base URL: https://tfg-backend.ddev.site
+
+El endpoint recibe un calendario completo {"defensas": [...]} y lo valida y
+guarda de una vez: o se programan todas las defensas o ninguna. Este módulo
+lo usan la suite defensas/defensas_batch_test.py y quien quiera publicar un
+calendario desde un fichero JSON, como el que genera schedule_solver.py (con
+más de MAX_LOTE defensas se envía en varios lotes, cada uno todo o nada):
+
+    python3 defensas_batch.py calendario.json --dry-run
+    python3 defensas_batch.py calendario.json
+
+También reconstruye, a partir del manifiesto de seed_dataset.py, qué TFGs
+aprobados del dataset siguen sin defensa y qué profesores forman cada
+tribunal, para generar lotes grandes sin conflictos (build_schedule).
+"""
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+import urllib3
+
+from http_client import create_session
+from seed_dataset import BASE_URL, ADMIN_CREDENTIALS, DURACION_DEFENSA, build_plan, term_slots
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+BATCH_PATH = '/api/defensas/batch'
+DEFAULT_MANIFEST = '/tmp/tfg_seed_manifest_s42.json'
+# Mismo límite que ProgramacionService::MAX_LOTE
+MAX_LOTE = 1000
+
+def load_seed_resources(manifest_path=DEFAULT_MANIFEST, with_tutor=False):
+    """
+    Devuelve (TFGs aprobados sin defensa, tribunales) del dataset. Los TFGs son
+    sus IDs, o {'id', 'tutor'} con with_tutor. Cada tribunal es {'id',
+    'miembros': [presidente, secretario, vocal], 'ocupado'} con los IDs reales;
+    'ocupado' son sus defensas sembradas con la misma forma que
+    GET /api/tribunales/{id}/disponibilidad ({'fecha', 'aula', 'duracion'}).
+    El plan se regenera con la misma semilla, semanas de cuatrimestre y fecha
+    de carga, así que no hace falta consultar la API para saber qué TFGs
+    quedaron libres.
+    """
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    today = datetime.fromisoformat(manifest['created_at']) if manifest.get('created_at') else None
+    # Los manifiestos anteriores a 'term_weeks' se cargaron con el valor por defecto
+    plan = build_plan(manifest['volumes'], manifest['seed'], manifest['tag'],
+                      term_weeks=manifest.get('term_weeks', 16), today=today)
+    ids = manifest['ids']
+
+    con_defensa = {defensa['tfg'] for defensa in plan['defensas']}
+    tfg_ids = []
+    for i, tfg in enumerate(plan['tfgs']):
+        if tfg['estado'] != 'aprobado' or i in con_defensa or str(i) not in ids['tfgs']:
+            continue
+        if with_tutor:
+            tfg_ids.append({'id': ids['tfgs'][str(i)], 'tutor': ids['profesores'].get(str(tfg['tutor']))})
+        else:
+            tfg_ids.append(ids['tfgs'][str(i)])
+
+    ocupado = {}
+    for i, defensa in enumerate(plan['defensas']):
+        if str(i) in ids.get('defensas', {}):
+            ocupado.setdefault(defensa['tribunal'], []).append({
+                'fecha': defensa['fecha_defensa'],
+                'aula': defensa['aula'],
+                'duracion': defensa['duracion_estimada'],
+            })
+
+    tribunales = []
+    for i, tribunal in enumerate(plan['tribunales']):
+        miembros = [ids['profesores'].get(str(tribunal[rol])) for rol in ('presidente', 'secretario', 'vocal')]
+        if str(i) in ids['tribunales'] and all(miembros):
+            tribunales.append({'id': ids['tribunales'][str(i)], 'miembros': miembros, 'ocupado': ocupado.get(i, [])})
+
+    return tfg_ids, tribunales
+
+def build_schedule(tfg_ids, tribunales, start, aula_prefix, duracion=DURACION_DEFENSA):
+    """
+    Calendario sin conflictos para los TFGs dados, empezando en 'start'. En cada
+    franja de term_slots() entran los tribunales que no comparten ningún
+    miembro con otro ya ocupado en esa franja, cada uno en su propia aula.
+    """
+    defensas = []
+    pendientes = list(tfg_ids)
+    if not tribunales:
+        return defensas
+
+    for franja, slot in enumerate(term_slots(start, len(pendientes))):
+        if not pendientes:
+            break
+
+        ocupados = set()
+        aula = 0
+        # Rotar el orden para repartir las defensas entre todos los tribunales
+        offset = franja % len(tribunales)
+        for tribunal in tribunales[offset:] + tribunales[:offset]:
+            if not pendientes:
+                break
+            if ocupados.intersection(tribunal['miembros']):
+                continue
+            ocupados.update(tribunal['miembros'])
+            aula += 1
+            defensas.append({
+                'tfg_id': pendientes.pop(0),
+                'tribunal_id': tribunal['id'],
+                'fecha_defensa': slot.isoformat(),
+                'aula': f"{aula_prefix} {aula:03d}",
+                'duracion_estimada': duracion,
+            })
+
+    return defensas
+
+def post_batch(session, headers, defensas, dry_run=False, notificar=True, base_url=BASE_URL):
+    """Envía el lote; devuelve (respuesta, milisegundos de la petición)"""
+    payload = {'defensas': defensas, 'dry_run': dry_run, 'notificar': notificar}
+    start = time.perf_counter()
+    response = session.post(f"{base_url}{BATCH_PATH}", json=payload, headers=headers)
+    return response, (time.perf_counter() - start) * 1000
+
+def print_errors(errores, limit=20):
+    for error in errores[:limit]:
+        conflicto = error.get('conflicto')
+        detalle = f" ({json.dumps(conflicto, ensure_ascii=False)})" if conflicto else ""
+        print(f"   • defensa {error['indice']}: {error['error']}{detalle}")
+    if len(errores) > limit:
+        print(f"   … y {len(errores) - limit} errores más")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Programa un calendario de defensas con POST /api/defensas/batch")
+    parser.add_argument('schedule', help='Fichero JSON con {"defensas": [...]} (o la lista directamente)')
+    parser.add_argument('--dry-run', action='store_true', help="Solo validar el lote, sin programar nada")
+    parser.add_argument('--no-notificar', action='store_true', help="No enviar las notificaciones de defensa programada")
+    parser.add_argument('--email', default=ADMIN_CREDENTIALS[0], help=f"Usuario que programa (por defecto: {ADMIN_CREDENTIALS[0]})")
+    parser.add_argument('--password', default=ADMIN_CREDENTIALS[1])
+    parser.add_argument('--transport', default=None, help="Transporte HTTP (requests, async, http2)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        with open(args.schedule) as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo leer el calendario {args.schedule}: {str(e)}")
+        sys.exit(1)
+
+    defensas = data['defensas'] if isinstance(data, dict) else data
+    # Calendarios de más de MAX_LOTE defensas (p.ej. de schedule_solver.py) se envían en varios lotes
+    lotes = [defensas[i:i + MAX_LOTE] for i in range(0, len(defensas), MAX_LOTE)]
+
+    session = create_session(args.transport)
+    session.verify = False
+
+    response = session.post(f"{BASE_URL}/api/auth/login", json={'username': args.email, 'password': args.password})
+    if response.status_code != 200:
+        print(f"❌ Login de {args.email} fallido: {response.status_code}")
+        sys.exit(1)
+    headers = {'Authorization': f"Bearer {response.json()['token']}"}
+
+    print(f"📅 {'Validando' if args.dry_run else 'Programando'} {len(defensas)} defensas en {BASE_URL}{BATCH_PATH}"
+          + (f" ({len(lotes)} lotes de hasta {MAX_LOTE})" if len(lotes) > 1 else ""))
+    for numero, lote in enumerate(lotes, 1):
+        response, elapsed = post_batch(session, headers, lote, dry_run=args.dry_run, notificar=not args.no_notificar)
+        body = response.json()
+
+        if response.status_code not in (200, 201):
+            print(f"❌ Lote {numero}/{len(lotes)} - {response.status_code}: {body.get('error', body)}")
+            print_errors(body.get('errores', []))
+            if numero > 1 and not args.dry_run:
+                print(f"⚠️ Los {numero - 1} lotes anteriores ya están programados")
+            sys.exit(1)
+
+        print(f"✅ Lote {numero}/{len(lotes)} - {body['message']}: {body['total']} defensas en {elapsed:.0f} ms "
+              f"({elapsed / max(body['total'], 1):.1f} ms por defensa)")
+        if 'notificaciones' in body:
+            print(f"🔔 Notificaciones enviadas: {body['notificaciones']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Capa de transporte HTTP compartida por las suites de tests
+Permite ejecutar los mismos tests sobre requests (bloqueante) o sobre un
+cliente asyncio (httpx) con pool de conexiones y HTTP/2 opcional
+"""
+import os
+import socket
+import asyncio
+import threading
+from time import perf_counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from metrics import RECORDER
+
+# Transportes disponibles: 'requests' (por defecto), 'async' (httpx HTTP/1.1) y 'http2'
+TRANSPORTS = ('requests', 'async', 'http2')
+DEFAULT_TRANSPORT = os.environ.get('TFG_TEST_TRANSPORT', 'requests')
+
+# Tiempos de la petición en curso en cada hilo, rellenados por las conexiones de urllib3
+_local = threading.local()
+
+class _TimedHTTPConnection(HTTPConnection):
+    """Conexión de urllib3 que mide por separado la resolución DNS y el connect TCP"""
+
+    def _new_conn(self):
+        timing = getattr(_local, 'timing', None)
+        if timing is None:
+            return super()._new_conn()
+
+        dns_host = self._dns_host
+        start = perf_counter()
+        try:
+            resolved = socket.getaddrinfo(dns_host, self.port, 0, socket.SOCK_STREAM)[0][4][0]
+        except OSError:
+            resolved = None  # super() reproduce el error con las excepciones de urllib3
+        timing['dns'] = perf_counter() - start
+
+        start = perf_counter()
+        try:
+            if resolved:
+                self._dns_host = resolved
+            sock = super()._new_conn()
+        except Exception:
+            # Si falla la primera dirección, dejar que urllib3 pruebe todas las del host
+            self._dns_host = dns_host
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = dns_host
+        timing['connect'] = perf_counter() - start
+        return sock
+
+class _TimedHTTPSConnection(_TimedHTTPConnection, HTTPSConnection):
+    """Conexión HTTPS: lo que no es DNS ni connect dentro de connect() es el handshake TLS"""
+
+    def connect(self):
+        start = perf_counter()
+        super().connect()
+        timing = getattr(_local, 'timing', None)
+        if timing is not None:
+            timing['tls'] = max(0.0, perf_counter() - start - timing['dns'] - timing['connect'])
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class _TimingAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool,
+        }
+
+class TimedSession(requests.Session):
+    """
+    requests.Session que registra en metrics.RECORDER los tiempos de cada
+    petición: dns, connect y tls (solo en conexiones nuevas), ttfb (hasta
+    recibir las cabeceras) y total (incluida la descarga del cuerpo)
+    """
+
+    def __init__(self):
+        super().__init__()
+        adapter = _TimingAdapter()
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+
+    def send(self, request, **kwargs):
+        timing = {'dns': 0.0, 'connect': 0.0, 'tls': 0.0}
+        _local.timing = timing
+        start = perf_counter()
+        try:
+            response = super().send(request, **kwargs)
+        finally:
+            _local.timing = None
+
+        timing['total'] = perf_counter() - start
+        timing['ttfb'] = min(response.elapsed.total_seconds(), timing['total'])
+        RECORDER.record(request.method, request.url, request.headers.get('Authorization'), timing)
+        return response
+
+class _EventLoopThread:
+    """Event loop en un hilo de fondo compartido por todas las sesiones asíncronas del proceso"""
+    _instance = None
+    _lock = threading.Lock()
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="tfg-http-loop", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def get(cls):
+        with cls._lock:
+            # Tras un fork (workers de --jobs) el hilo del padre no existe en el hijo
+            if cls._instance is None or cls._instance.pid != os.getpid():
+                cls._instance = cls()
+            return cls._instance
+
+    def run(self, coro):
+        """Ejecuta una corrutina en el loop de fondo y espera su resultado"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+class AsyncSession:
+    """
+    Sesión con la misma interfaz que requests.Session (get/post/put/delete)
+    respaldada por httpx.AsyncClient. Las llamadas bloquean al hilo que las hace,
+    pero varias llamadas desde hilos distintos viajan a la vez por el mismo pool
+    de conexiones (multiplexadas sobre una conexión si se usa HTTP/2).
+    """
+    concurrent = True
+
+    def __init__(self, http2=False, max_connections=20):
+        try:
+            import httpx
+        except ImportError:
+            raise RuntimeError("El transporte asíncrono requiere httpx: pip install 'httpx[http2]'")
+
+        self.httpx = httpx
+        self.http2 = http2
+        self.max_connections = max_connections
+        self.verify = True
+        self.headers = {}
+        self._client = None
+        self._loop = _EventLoopThread.get()
+
+    async def _request(self, method, url, **kwargs):
+        if self._client is None:
+            try:
+                self._client = self.httpx.AsyncClient(
+                    verify=self.verify,
+                    http2=self.http2,
+                    headers=self.headers,
+                    follow_redirects=True,
+                    timeout=60.0,
+                    limits=self.httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections
+                    )
+                )
+            except ImportError:
+                raise RuntimeError("HTTP/2 requiere el paquete h2: pip install 'httpx[http2]'")
+
+        # Traducir los argumentos de requests que cambian de nombre en httpx
+        if 'allow_redirects' in kwargs:
+            kwargs['follow_redirects'] = kwargs.pop('allow_redirects')
+
+        # httpcore avisa del inicio y fin de cada fase; la resolución DNS va dentro de connect_tcp
+        marks = {}
+
+        async def trace(event_name, info):
+            marks[event_name] = perf_counter()
+
+        kwargs.setdefault('extensions', {})['trace'] = trace
+        start = perf_counter()
+        response = await self._client.request(method, url, **kwargs)
+        total = perf_counter() - start
+
+        def phase(name):
+            if f'connection.{name}.complete' in marks and f'connection.{name}.started' in marks:
+                return marks[f'connection.{name}.complete'] - marks[f'connection.{name}.started']
+            return 0.0
+
+        headers_received = [t for event, t in marks.items() if event.endswith('receive_response_headers.complete')]
+        RECORDER.record(method, str(response.request.url), response.request.headers.get('authorization'), {
+            'dns': 0.0,
+            'connect': phase('connect_tcp'),
+            'tls': phase('start_tls'),
+            'ttfb': (headers_received[0] - start) if headers_received else total,
+            'total': total,
+        })
+        return response
+
+    def request(self, method, url, **kwargs):
+        return self._loop.run(self._request(method, url, **kwargs))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def close(self):
+        if self._client is not None:
+            self._loop.run(self._client.aclose())
+            self._client = None
+
+def create_session(transport=None):
+    """Crea la sesión HTTP de una suite según el transporte elegido"""
+    transport = transport or DEFAULT_TRANSPORT
+
+    if transport == 'requests':
+        return TimedSession()
+    if transport == 'async':
+        return AsyncSession(http2=False)
+    if transport == 'http2':
+        return AsyncSession(http2=True)
+
+    raise ValueError(f"Transporte desconocido: {transport} (disponibles: {', '.join(TRANSPORTS)})")
+
+def run_concurrently(session, tests):
+    """
+    Ejecuta una lista de tests independientes. Con un transporte concurrente se
+    lanzan a la vez; con requests se ejecutan en orden como hasta ahora.
+    Devuelve los valores de retorno en el mismo orden que la lista.
+    """
+    if not getattr(session, 'concurrent', False) or len(tests) < 2:
+        return [test() for test in tests]
+
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        futures = [executor.submit(test) for test in tests]
+        return [future.result() for future in futures]
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Benchmark del calendario en la semana de programación de defensas
+Base URL: https://tfg-backend.ddev.site
+
+Reproduce la carga de cuando se publican las defensas y todos los estudiantes
+abren y refrescan el calendario a la vez: miles de usuarios del dataset
+sintético (seed_dataset.py) piden la vista de mes de FullCalendar de
+GET /api/defensas/calendario. La primera ronda es la carga inicial; las
+siguientes son refrescos con If-None-Match, que deberían resolverse con 304
+sin cuerpo mientras no cambie ninguna defensa.
+
+Uso:
+    python3 seed_dataset.py --scale medium --mode db
+    ddev exec bin/console app:calendario:reconstruir
+    python3 load/calendario_benchmark.py --users 3000 --rounds 3 --concurrency 64
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3
+
+# Directorio raíz de los tests para poder importar los módulos compartidos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import create_session
+from seed_dataset import BASE_URL, SEED_PASSWORD, term_start
+from load.load_test import percentile
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+DEFAULT_MANIFEST = '/tmp/tfg_seed_manifest_s42.json'
+# Fracción mínima de 304 en los refrescos: por debajo, el ETag no está funcionando
+MIN_NOT_MODIFIED = 0.95
+
+def month_window(month):
+    """Ventana que pide FullCalendar en la vista de mes: 6 semanas desde el lunes anterior al día 1"""
+    first = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start = first - timedelta(days=first.weekday())
+    return start.strftime('%Y-%m-%d'), (start + timedelta(days=42)).strftime('%Y-%m-%d')
+
+def seeded_students(manifest, limit):
+    """Emails de los estudiantes creados por seed_dataset.py (mismo formato que build_plan)"""
+    indexes = sorted(int(i) for i in manifest['ids'].get('estudiantes', {}))
+    return [f"{manifest['tag']}.est{i}@seed.uni.es" for i in indexes[:limit]]
+
+class CalendarBenchmark:
+    def __init__(self, emails, window, rounds=3, concurrency=64, transport=None):
+        self.emails = emails
+        self.window = window
+        self.rounds = rounds
+        self.concurrency = concurrency
+        self.transport = transport
+        self.local = threading.local()
+        self.headers = {}
+        self.etags = {}
+
+    def session(self):
+        """Sesión HTTP propia de cada hilo del pool"""
+        if not hasattr(self.local, 'session'):
+            self.local.session = create_session(self.transport)
+            self.local.session.verify = False
+        return self.local.session
+
+    def login(self, email):
+        response = self.session().post(f"{BASE_URL}/api/auth/login", json={'username': email, 'password': SEED_PASSWORD})
+        if response.status_code == 200:
+            self.headers[email] = {'Authorization': f"Bearer {response.json()['token']}"}
+
+    def load_calendar(self, email, revalidate):
+        """Una vista de mes; devuelve (latencia ms, status, bytes del cuerpo, eventos)"""
+        headers = dict(self.headers[email])
+        if revalidate and self.etags.get(email):
+            headers['If-None-Match'] = self.etags[email]
+
+        start = time.perf_counter()
+        try:
+            response = self.session().get(
+                f"{BASE_URL}/api/defensas/calendario",
+                params={'start': self.window[0], 'end': self.window[1]},
+                headers=headers
+            )
+        except Exception:
+            return (time.perf_counter() - start) * 1000, None, 0, 0
+        elapsed = (time.perf_counter() - start) * 1000
+
+        events = 0
+        if response.status_code == 200:
+            self.etags[email] = response.headers.get('ETag')
+            events = len(response.json())
+        return elapsed, response.status_code, len(response.content), events
+
+    def run_round(self, executor, name, revalidate):
+        users = list(self.headers)
+        start = time.monotonic()
+        results = list(executor.map(lambda email: self.load_calendar(email, revalidate), users))
+        elapsed = time.monotonic() - start
+
+        latencies = sorted(r[0] for r in results)
+        statuses = [r[1] for r in results]
+        errors = sum(1 for status in statuses if status not in (200, 304))
+        return {
+            'round': name,
+            'requests': len(results),
+            'errors': errors,
+            'not_modified': statuses.count(304),
+            'bytes': sum(r[2] for r in results),
+            'events': sum(r[3] for r in results),
+            'rps': len(results) / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': percentile(latencies, 50),
+                'p95': percentile(latencies, 95),
+                'p99': percentile(latencies, 99),
+                'max': latencies[-1] if latencies else 0.0,
+            },
+        }
+
+    def run(self):
+        print("=" * 80)
+        print("📅 BENCHMARK DEL CALENDARIO - SEMANA DE PROGRAMACIÓN")
+        print("=" * 80)
+        print(f"🌐 Base URL: {BASE_URL}")
+        print(f"🗓️ Ventana: {self.window[0]} → {self.window[1]} | Rondas de refresco: {self.rounds}")
+        print(f"👥 Estudiantes: {len(self.emails)} | Concurrencia: {self.concurrency}")
+
+        rounds = []
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # El login no forma parte de la medida
+            start = time.monotonic()
+            list(executor.map(self.login, self.emails))
+            print(f"🔑 {len(self.headers)}/{len(self.emails)} sesiones en {time.monotonic() - start:.1f}s")
+            if not self.headers:
+                print("❌ Ningún estudiante pudo iniciar sesión (¿dataset cargado con seed_dataset.py?)")
+                return None
+
+            rounds.append(self.run_round(executor, 'inicial', revalidate=False))
+            for i in range(self.rounds):
+                rounds.append(self.run_round(executor, f"refresco {i + 1}", revalidate=True))
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'base_url': BASE_URL,
+            'config': {
+                'users': len(self.headers),
+                'window': list(self.window),
+                'rounds': self.rounds,
+                'concurrency': self.concurrency,
+                'transport': self.transport,
+            },
+            'rounds': rounds,
+        }
+
+def print_report(report):
+    print("=" * 80)
+    print(f"{'Ronda':<14}{'Peticiones':>11}{'Errores':>9}{'304':>7}{'req/s':>8}{'KiB':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    print("-" * 80)
+    for r in report['rounds']:
+        lat = r['latency_ms']
+        print(f"{r['round']:<14}{r['requests']:>11}{r['errors']:>9}{r['not_modified']:>7}{r['rps']:>8.0f}"
+              f"{r['bytes'] / 1024:>8.0f}{lat['p50']:>9.0f}{lat['p95']:>9.0f}{lat['p99']:>9.0f}")
+    print("-" * 80)
+
+    initial = report['rounds'][0]
+    print(f"📊 Eventos en la carga inicial: {initial['events']} "
+          f"({initial['events'] / max(initial['requests'], 1):.1f} por estudiante)")
+    if not initial['events']:
+        print("⚠️ Ningún estudiante tiene defensas en la ventana: tras cargar con --mode db hay que "
+              "ejecutar bin/console app:calendario:reconstruir")
+    print("=" * 80)
+
+def check_report(report):
+    """True si no hubo errores y los refrescos se resolvieron con 304"""
+    ok = all(r['errors'] == 0 for r in report['rounds'])
+    for r in report['rounds'][1:]:
+        ratio = r['not_modified'] / r['requests'] if r['requests'] else 0.0
+        if ratio < MIN_NOT_MODIFIED:
+            print(f"❌ {r['round']}: solo {ratio * 100:.1f}% de 304 (mínimo {MIN_NOT_MODIFIED * 100:.0f}%)")
+            ok = False
+    return ok
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Vista de mes del calendario para miles de estudiantes con revalidación por ETag")
+    parser.add_argument('--manifest', default=DEFAULT_MANIFEST, help=f"Manifiesto de seed_dataset.py (por defecto: {DEFAULT_MANIFEST})")
+    parser.add_argument('--users', type=int, default=2000, help="Estudiantes del dataset que abren el calendario (por defecto: 2000)")
+    parser.add_argument('--rounds', type=int, default=3, help="Rondas de refresco con If-None-Match (por defecto: 3)")
+    parser.add_argument('--concurrency', type=int, default=64, help="Peticiones simultáneas (por defecto: 64)")
+    parser.add_argument('--month', help="Mes de la vista (YYYY-MM; por defecto el del inicio de las defensas del dataset)")
+    parser.add_argument('--transport', default=None, help="Transporte HTTP (requests, async, http2)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    try:
+        with open(args.manifest) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo leer el manifiesto {args.manifest}: {str(e)}")
+        sys.exit(1)
+
+    if args.month:
+        month = datetime.strptime(args.month, '%Y-%m')
+    else:
+        # Las defensas del dataset empiezan en term_start() del día en que se cargó
+        month = term_start(datetime.fromisoformat(manifest['created_at']))
+
+    emails = seeded_students(manifest, args.users)
+    benchmark = CalendarBenchmark(emails, month_window(month), args.rounds, args.concurrency, args.transport)
+    report = benchmark.run()
+    if not report:
+        sys.exit(1)
+
+    print_report(report)
+    report_file = f"/tmp/tfg_calendario_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(report_file, 'w') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"📄 Reporte guardado en: {report_file}")
+    sys.exit(0 if check_report(report) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Generador de carga que reutiliza las suites de tests como escenarios de tráfico
+Base URL: https://tfg-backend.ddev.site
+
+Cada usuario virtual tiene sus propias instancias de las suites (y por tanto su
+propia sesión HTTP) y repite una mezcla ponderada de escenarios con un tiempo
+de espera entre peticiones hasta que termina la duración configurada.
+
+Con un dataset de seed_dataset.py cada usuario virtual entra como un estudiante
+distinto del dataset y sube archivos a su propio TFG; sin él todos comparten el
+estudiante de pruebas y su TFG.
+"""
+import sys
+import os
+import re
+import json
+import time
+import random
+import threading
+import contextlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Directorio raíz de los tests para poder importar el resto de suites
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from auth.auth_test import AuthTestSuite, BASE_URL
+from tfgs.tfgs_test import TFGTestSuite
+from defensas.defensas_test import DefensasTestSuite
+from notifications.notifications_test import NotificationsTestSuite
+from metrics import RECORDER
+from seed_dataset import SEED_PASSWORD, build_plan
+
+DEFAULT_MANIFEST = '/tmp/tfg_seed_manifest_s42.json'
+# Logins simultáneos al preparar los estudiantes del dataset
+LOGIN_CONCURRENCY = 16
+
+# Peso por defecto de cada escenario en la mezcla de tráfico
+DEFAULT_MIX = {
+    'login': 1,
+    'mis_tfgs': 4,
+    'calendario': 3,
+    'notificaciones': 4,
+    'upload': 1,
+}
+
+def parse_duration(value):
+    """Convierte '90', '90s', '10m' o '1h' a segundos"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smh]?)\s*', str(value))
+    if not match:
+        raise ValueError(f"Duración inválida: {value} (usa p.ej. 30s, 10m, 1h)")
+
+    amount, unit = float(match.group(1)), match.group(2) or 's'
+    return amount * {'s': 1, 'm': 60, 'h': 3600}[unit]
+
+def parse_mix(value):
+    """Convierte 'login=1,mis_tfgs=4' a un diccionario de pesos"""
+    mix = {}
+    for item in value.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise ValueError(f"Escenario desconocido: {name} (disponibles: {', '.join(DEFAULT_MIX)})")
+        mix[name] = float(weight) if weight else 1.0
+    return mix
+
+def seeded_accounts(manifest, limit):
+    """
+    Hasta 'limit' estudiantes creados por seed_dataset.py como (email, ID de su
+    TFG si admite subidas o None). Primero van los que tienen el TFG en borrador
+    o revisión, los únicos estados en los que se puede subir archivo. El plan se
+    regenera con la misma semilla, como en defensas_batch.load_seed_resources.
+    """
+    today = datetime.fromisoformat(manifest['created_at']) if manifest.get('created_at') else None
+    plan = build_plan(manifest['volumes'], manifest['seed'], manifest['tag'],
+                      term_weeks=manifest.get('term_weeks', 16), today=today)
+    ids = manifest['ids']
+
+    editables = {
+        tfg['estudiante']: ids['tfgs'][str(i)]
+        for i, tfg in enumerate(plan['tfgs'])
+        if tfg['estado'] in ('borrador', 'revision') and str(i) in ids['tfgs']
+    }
+    students = sorted(int(i) for i in ids.get('estudiantes', {}))
+    students.sort(key=lambda i: i not in editables)
+    return [(plan['estudiantes'][i]['email'], editables.get(i)) for i in students[:limit]]
+
+def percentile(sorted_values, p):
+    """Percentil por rango más cercano sobre una lista ya ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(p / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class ScenarioStats:
+    """Contadores y latencias de un escenario (compartido entre usuarios virtuales)"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.errors = 0
+        self.latencies = []
+
+    def record(self, latency, ok):
+        with self.lock:
+            self.count += 1
+            if not ok:
+                self.errors += 1
+            self.latencies.append(latency)
+
+    def summary(self, elapsed):
+        with self.lock:
+            values = sorted(self.latencies)
+            count, errors = self.count, self.errors
+
+        return {
+            'requests': count,
+            'errors': errors,
+            'error_rate': errors / count if count else 0.0,
+            'rps': count / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': percentile(values, 50) * 1000,
+                'p90': percentile(values, 90) * 1000,
+                'p99': percentile(values, 99) * 1000,
+                'max': (values[-1] if values else 0.0) * 1000,
+            }
+        }
+
+class VirtualUser:
+    """Usuario virtual: instancias propias de las suites y un escenario por iteración"""
+    def __init__(self, tokens, tfg_id, email=None, transport=None):
+        self.auth = AuthTestSuite(transport=transport)
+        self.tfgs = TFGTestSuite(tokens, transport=transport)
+        self.defensas = DefensasTestSuite(tokens, transport=transport)
+        self.notifications = NotificationsTestSuite(tokens, transport=transport)
+        self.tfg_id = tfg_id
+        self.email = email
+
+        self.scenarios = {
+            'login': (self.auth, self.login),
+            'mis_tfgs': (self.tfgs, self.tfgs.test_get_mis_tfgs_estudiante),
+            # El calendario está abierto a ROLE_USER: se pide como estudiante, igual que el resto de escenarios
+            'calendario': (self.defensas, self.defensas.test_get_calendario_defensas_estudiante),
+            'notificaciones': (self.notifications, self.notifications.test_get_notifications_estudiante),
+            'upload': (self.tfgs, lambda: self.tfgs.test_upload_file_estudiante(self.tfg_id)),
+        }
+
+    def login(self):
+        """Login del estudiante de este usuario virtual (el de pruebas si no hay dataset)"""
+        if not self.email:
+            return self.auth.test_login_estudiante()
+        response = self.auth.login({'username': self.email, 'password': SEED_PASSWORD})
+        ok = response.status_code == 200
+        self.auth.log_test("Login estudiante", ok, f"{self.email}: status {response.status_code}")
+        return ok
+
+    def run_scenario(self, name):
+        """Ejecuta un escenario y devuelve (latencia en segundos, éxito)"""
+        suite, test = self.scenarios[name]
+        start = time.perf_counter()
+        try:
+            test()
+        except Exception:
+            pass
+        latency = time.perf_counter() - start
+
+        # Cada test registra su resultado en la suite; se consume y se descarta
+        ok = bool(suite.test_results) and suite.test_results[-1]['status']
+        suite.test_results.clear()
+        return latency, ok
+
+class LoadTestRunner:
+    def __init__(self, users=10, duration=60, ramp_up=0, think_time=1.0, mix=None, transport=None, reuse_tokens=False,
+                 manifest_path=DEFAULT_MANIFEST):
+        self.users = users
+        self.duration = duration
+        self.ramp_up = ramp_up
+        self.think_time = think_time
+        self.mix = dict(mix or DEFAULT_MIX)
+        self.transport = transport
+        # Solo afecta a la preparación: el escenario 'login' siempre hace login completo
+        self.reuse_tokens = reuse_tokens
+        self.manifest_path = manifest_path
+        self.tokens = {}
+        self.tfg_id = None
+        # Estudiantes del dataset: {'email', 'token', 'tfg_id'}; vacío si no hay dataset
+        self.accounts = []
+        self.stats = {name: ScenarioStats() for name in self.mix}
+        self.active_users = 0
+        self.active_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        # La salida de las suites se silencia durante la carga; el progreso va aquí
+        self.out = sys.stdout
+
+    def log(self, message):
+        print(message, file=self.out, flush=True)
+
+    def login_account(self, email, tfg_id):
+        """Login de un estudiante del dataset con su propia sesión; None si falla"""
+        auth_suite = AuthTestSuite(transport=self.transport, reuse_tokens=self.reuse_tokens)
+        try:
+            response = auth_suite.login({'username': email, 'password': SEED_PASSWORD})
+            if response.status_code == 200:
+                return {'email': email, 'token': response.json()['token'], 'tfg_id': tfg_id}
+        except Exception:
+            pass
+        return None
+
+    def prepare_accounts(self):
+        """Inicia sesión con un estudiante distinto del dataset por usuario virtual"""
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            self.log(f"⚠️ Sin dataset sintético ({self.manifest_path}): todos los usuarios virtuales "
+                     f"comparten el estudiante de pruebas y su TFG")
+            return
+
+        accounts = seeded_accounts(manifest, self.users)
+        with ThreadPoolExecutor(max_workers=LOGIN_CONCURRENCY) as executor:
+            self.accounts = [a for a in executor.map(lambda a: self.login_account(*a), accounts) if a]
+        for account in self.accounts:
+            RECORDER.register_tokens({'estudiante': account['token']})
+
+        with_tfg = sum(1 for account in self.accounts if account['tfg_id'])
+        self.log(f"👥 Estudiantes del dataset [{manifest['tag']}]: {len(self.accounts)}/{len(accounts)} "
+                 f"con sesión, {with_tfg} con TFG en el que subir archivos")
+        if len(self.accounts) < self.users:
+            self.log("⚠️ Hay menos estudiantes que usuarios virtuales: algunos se repiten")
+
+    def prepare(self):
+        """Obtiene tokens, los estudiantes del dataset y el TFG sobre el que se hacen las subidas"""
+        auth_suite = AuthTestSuite(transport=self.transport, reuse_tokens=self.reuse_tokens)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            auth_suite.test_login_estudiante()
+            auth_suite.test_login_profesor()
+        self.tokens = auth_suite.tokens
+        RECORDER.register_tokens(self.tokens)
+
+        if 'estudiante' not in self.tokens:
+            self.log("❌ No se pudo autenticar al estudiante de pruebas")
+            return False
+
+        self.prepare_accounts()
+        if self.accounts:
+            if 'upload' in self.mix and not any(account['tfg_id'] for account in self.accounts):
+                self.log("⚠️ Ningún estudiante del dataset tiene un TFG editable: se descarta el escenario 'upload'")
+                del self.mix['upload']
+                del self.stats['upload']
+        elif 'upload' in self.mix:
+            try:
+                response = auth_suite.session.get(
+                    f"{BASE_URL}/api/tfgs/mis-tfgs",
+                    headers={'Authorization': f'Bearer {self.tokens["estudiante"]}'}
+                )
+                tfgs = response.json().get('data', []) if response.status_code == 200 else []
+                self.tfg_id = tfgs[0]['id'] if tfgs else None
+            except Exception:
+                self.tfg_id = None
+
+            if not self.tfg_id:
+                self.log("⚠️ El estudiante no tiene TFG: se descarta el escenario 'upload'")
+                del self.mix['upload']
+                del self.stats['upload']
+
+        return bool(self.mix)
+
+    def virtual_user(self, index, deadline):
+        """Bucle de un usuario virtual: arranque escalonado, escenario, espera"""
+        if self.ramp_up > 0 and self.stop_event.wait(self.ramp_up * index / self.users):
+            return
+
+        if self.accounts:
+            account = self.accounts[index % len(self.accounts)]
+            tokens = dict(self.tokens, estudiante=account['token'])
+            user = VirtualUser(tokens, account['tfg_id'], account['email'], transport=self.transport)
+        else:
+            user = VirtualUser(self.tokens, self.tfg_id, transport=self.transport)
+        rng = random.Random(index)
+        # Los estudiantes sin TFG editable no pueden subir archivos: reparten su peso entre el resto
+        names = [name for name in self.mix if name != 'upload' or user.tfg_id]
+        if not names:
+            return
+        weights = [self.mix[name] for name in names]
+
+        with self.active_lock:
+            self.active_users += 1
+        try:
+            while not self.stop_event.is_set() and time.monotonic() < deadline:
+                name = rng.choices(names, weights)[0]
+                latency, ok = user.run_scenario(name)
+                self.stats[name].record(latency, ok)
+
+                # Tiempo de espera con ±50% de variación para no sincronizar a los usuarios
+                if self.think_time > 0:
+                    self.stop_event.wait(self.think_time * rng.uniform(0.5, 1.5))
+        finally:
+            with self.active_lock:
+                self.active_users -= 1
+
+    def print_progress(self, elapsed):
+        requests_total = sum(s.count for s in self.stats.values())
+        errors_total = sum(s.errors for s in self.stats.values())
+        rps = requests_total / elapsed if elapsed > 0 else 0.0
+        self.log(
+            f"⏱️ {elapsed:6.0f}s | usuarios activos: {self.active_users:>4} | "
+            f"peticiones: {requests_total:>7} ({rps:.1f}/s) | errores: {errors_total}"
+        )
+
+    def run(self):
+        """Lanza los usuarios virtuales y espera a que termine la prueba"""
+        self.log("=" * 80)
+        self.log("🔥 PRUEBA DE CARGA - PLATAFORMA TFG API")
+        self.log("=" * 80)
+        self.log(f"🌐 Base URL: {BASE_URL}")
+        self.log(f"👥 Usuarios: {self.users} (rampa de {self.ramp_up:.0f}s)")
+        self.log(f"⏱️ Duración: {self.duration:.0f}s | Tiempo de espera: {self.think_time}s")
+        self.log(f"🎲 Mezcla: {', '.join(f'{k}={v:g}' for k, v in self.mix.items())}")
+        self.log("=" * 80)
+
+        if not self.prepare():
+            return None
+
+        start = time.monotonic()
+        deadline = start + self.duration
+        threads = [
+            threading.Thread(target=self.virtual_user, args=(i, deadline), daemon=True)
+            for i in range(self.users)
+        ]
+
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            for thread in threads:
+                thread.start()
+
+            try:
+                next_progress = start + 10
+                while any(thread.is_alive() for thread in threads):
+                    time.sleep(0.5)
+                    if time.monotonic() >= next_progress:
+                        self.print_progress(time.monotonic() - start)
+                        next_progress += 10
+            except KeyboardInterrupt:
+                self.log("\n⚠️ Prueba interrumpida, esperando a los usuarios en curso...")
+                self.stop_event.set()
+                for thread in threads:
+                    thread.join()
+
+        return self.build_report(time.monotonic() - start)
+
+    def build_report(self, elapsed):
+        scenarios = {name: stats.summary(elapsed) for name, stats in self.stats.items()}
+        total_requests = sum(s['requests'] for s in scenarios.values())
+        total_errors = sum(s['errors'] for s in scenarios.values())
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'base_url': BASE_URL,
+            'config': {
+                'users': self.users,
+                'duration_seconds': self.duration,
+                'ramp_up_seconds': self.ramp_up,
+                'think_time_seconds': self.think_time,
+                'mix': self.mix,
+                'transport': self.transport,
+                # Estudiantes distintos entre los usuarios virtuales (1: el estudiante de pruebas)
+                'estudiantes': len(self.accounts) or 1,
+            },
+            'elapsed_seconds': elapsed,
+            'total_requests': total_requests,
+            'total_errors': total_errors,
+            'error_rate': total_errors / total_requests if total_requests else 0.0,
+            'rps': total_requests / elapsed if elapsed > 0 else 0.0,
+            'scenarios': scenarios,
+            # Latencias por petición HTTP, con fases y desglose por rol
+            'latency': RECORDER.report_section(),
+        }
+
+    def print_report(self, report):
+        self.log("=" * 80)
+        self.log("📊 RESULTADOS DE LA PRUEBA DE CARGA")
+        self.log("=" * 80)
+        self.log(f"{'Escenario':<16}{'Peticiones':>11}{'Errores':>9}{'req/s':>8}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+        self.log("-" * 80)
+        for name, s in report['scenarios'].items():
+            lat = s['latency_ms']
+            self.log(
+                f"{name:<16}{s['requests']:>11}{s['errors']:>9}{s['rps']:>8.1f}"
+                f"{lat['p50']:>9.0f}{lat['p90']:>9.0f}{lat['p99']:>9.0f}{lat['max']:>9.0f}"
+            )
+        self.log("-" * 80)
+        self.log(f"📈 Total: {report['total_requests']} peticiones en {report['elapsed_seconds']:.0f}s "
+                 f"({report['rps']:.1f}/s), tasa de error {report['error_rate'] * 100:.2f}%")
+        self.log("=" * 80)
+
+    def save_report(self, report):
+        report_file = f"/tmp/tfg_load_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        try:
+            with open(report_file, 'w') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            self.log(f"📄 Reporte de carga guardado en: {report_file}")
+            return report_file
+        except Exception as e:
+            self.log(f"⚠️ No se pudo guardar el reporte de carga: {str(e)}")
+            return None
+
+if __name__ == "__main__":
+    runner = LoadTestRunner(users=10, duration=30, ramp_up=5)
+    report = runner.run()
+    if report:
+        runner.print_report(report)
+        runner.save_report(report)
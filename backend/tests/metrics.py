@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Métricas de latencia de las peticiones HTTP hechas por las suites
+Histogramas estilo HDR (buckets log-lineales) por endpoint, rol y fase
+"""
+import re
+import math
+import threading
+from urllib.parse import urlparse
+
+# Fases medidas en cada petición (segundos). dns/connect/tls solo son > 0 cuando
+# se abre una conexión nueva; ttfb y total se miden desde el inicio de la petición.
+PHASES = ('dns', 'connect', 'tls', 'ttfb', 'total')
+PERCENTILES = (50, 90, 99)
+
+class LatencyHistogram:
+    """
+    Histograma de latencias en microsegundos con buckets log-lineales como
+    HdrHistogram: 2^(SUB_BUCKET_BITS - 1) sub-buckets por potencia de dos, lo
+    que da un error relativo máximo de ~1.6% con 7 bits. Se guardan solo los
+    buckets con cuentas, así que se puede serializar y combinar entre procesos.
+    """
+    SUB_BUCKET_BITS = 7
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _key(self, value):
+        shift = max(0, value.bit_length() - self.SUB_BUCKET_BITS)
+        return (shift << (self.SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+    def _highest_value(self, key):
+        half = 1 << (self.SUB_BUCKET_BITS - 1)
+        shift = max(0, key // half - 1)
+        sub = key - (shift << (self.SUB_BUCKET_BITS - 1))
+        return ((sub + 1) << shift) - 1
+
+    def record(self, seconds):
+        value = max(0, int(round(seconds * 1_000_000)))
+        key = self._key(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        """Valor (µs) por debajo del cual queda el p% de las muestras"""
+        if not self.count:
+            return 0
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= rank:
+                return self.bucket_value(key)
+        return self.max
+
+    def bucket_value(self, key):
+        """Valor representativo (µs) de un bucket: su límite superior, sin pasar del máximo"""
+        return min(self._highest_value(key), self.max)
+
+    def buckets(self):
+        """(clave, cuenta) de cada bucket con muestras, de menor a mayor valor"""
+        return [(key, self.counts[key]) for key in sorted(self.counts)]
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def summary(self):
+        """Resumen en milisegundos para el reporte"""
+        result = {'count': self.count}
+        for p in PERCENTILES:
+            result[f'p{p}'] = round(self.percentile(p) / 1000, 3)
+        result['max'] = round(self.max / 1000, 3)
+        result['mean'] = round(self.total / self.count / 1000, 3) if self.count else 0.0
+        return result
+
+    def to_dict(self):
+        return {
+            'unit': 'us',
+            'sub_bucket_bits': self.SUB_BUCKET_BITS,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'counts': {str(key): count for key, count in sorted(self.counts.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.counts = {int(key): count for key, count in data.get('counts', {}).items()}
+        histogram.count = data.get('count', 0)
+        histogram.total = data.get('total', 0)
+        histogram.min = data.get('min')
+        histogram.max = data.get('max', 0)
+        return histogram
+
+def normalize_route(method, url):
+    """'GET https://host/api/tfgs/12/download?x=1' -> 'GET /api/tfgs/{id}/download'"""
+    path = urlparse(url).path or '/'
+    path = re.sub(r'/\d+(?=/|$)', '/{id}', path)
+    return f"{method.upper()} {path}"
+
+class LatencyRecorder:
+    """Acumula histogramas por (ruta, rol) y fase. Es seguro entre hilos."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.token_roles = {}
+
+    def register_tokens(self, tokens):
+        """Asocia cada token JWT con su rol para etiquetar las peticiones"""
+        with self.lock:
+            for role, token in tokens.items():
+                # El fichero de tokens también guarda la caché ('_cache'), que no es un rol
+                if isinstance(token, str) and token and not role.endswith('_refresh'):
+                    self.token_roles[token] = role
+
+    def role_for(self, authorization):
+        if not authorization:
+            return 'anonimo'
+        token = authorization.split(' ', 1)[-1]
+        return self.token_roles.get(token, 'desconocido')
+
+    def record(self, method, url, authorization, timing):
+        route = normalize_route(method, url)
+        role = self.role_for(authorization)
+        with self.lock:
+            phases = self.histograms.setdefault((route, role), {phase: LatencyHistogram() for phase in PHASES})
+            for phase in PHASES:
+                if phase in timing:
+                    phases[phase].record(timing[phase])
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                f"{route}|{role}": {phase: h.to_dict() for phase, h in phases.items()}
+                for (route, role), phases in self.histograms.items()
+            }
+
+    def merge_dict(self, data):
+        """Combina histogramas serializados (p.ej. los de un worker de --jobs)"""
+        with self.lock:
+            for key, phases in data.items():
+                route, _, role = key.rpartition('|')
+                target = self.histograms.setdefault((route, role), {phase: LatencyHistogram() for phase in PHASES})
+                for phase, histogram in phases.items():
+                    target.setdefault(phase, LatencyHistogram()).merge(LatencyHistogram.from_dict(histogram))
+
+    def report(self):
+        """Percentiles por endpoint (todas las fases) con el desglose por rol"""
+        with self.lock:
+            endpoints = {}
+            for (route, role), phases in sorted(self.histograms.items()):
+                entry = endpoints.setdefault(route, {
+                    'phases': {phase: LatencyHistogram() for phase in PHASES},
+                    'roles': {}
+                })
+                for phase, histogram in phases.items():
+                    entry['phases'][phase].merge(histogram)
+                entry['roles'][role] = phases['total'].summary()
+
+            return {
+                route: {
+                    **entry['phases']['total'].summary(),
+                    'phases': {phase: h.summary() for phase, h in entry['phases'].items()},
+                    'roles': entry['roles']
+                }
+                for route, entry in endpoints.items()
+            }
+
+    def report_section(self):
+        """Sección 'latency' de los reportes JSON (resumen en ms y histogramas completos)"""
+        return {
+            'unit': 'ms',
+            'endpoints': self.report(),
+            # Histogramas completos (µs) por "ruta|rol" para poder combinarlos o compararlos
+            'histograms': self.to_dict()
+        }
+
+# Registro global del proceso; lo alimenta http_client en cada petición
+RECORDER = LatencyRecorder()
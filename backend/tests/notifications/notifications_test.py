@@ -3,23 +3,28 @@
 Tests para endpoints de Sistema de Notificaciones
 Base URL: https://tfg-backend.ddev.site
 """
-import requests
 import json
 import sys
 import os
 import urllib3
 
+# Capa de transporte compartida (backend/tests/http_client.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import create_session, run_concurrently
+from pagination_benchmark import run_deep_pagination, describe
+
 # Deshabilitar warnings SSL para entorno de desarrollo DDEV
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://tfg-backend.ddev.site"
 
 class NotificationsTestSuite:
-    def __init__(self, tokens=None):
-        self.session = requests.Session()
+    def __init__(self, tokens=None, namespace=None, transport=None):
+        self.session = create_session(transport)
         # Deshabilitar verificación SSL para DDEV local
         self.session.verify = False
         self.tokens = tokens or {}
+        # 'namespace' se acepta como en el resto de suites, pero esta no crea datos que distinguir
         self.test_results = []
         self.created_notifications = []  # Para cleanup
         
@@ -44,6 +49,11 @@ class NotificationsTestSuite:
         if details and not status:
             print(f"    Details: {details}")
     
+    def log_skip(self, test_name, reason):
+        """Registra un test omitido: no cuenta como pasado ni como fallido"""
+        print(f"[SKIP] {test_name}")
+        print(f"    {reason}")
+    
     def test_get_notifications_estudiante(self):
         """Test GET /api/notificaciones como estudiante"""
         if 'estudiante' not in self.headers:
@@ -362,6 +372,28 @@ class NotificationsTestSuite:
             self.log_test("Paginación de notificaciones", False, f"Exception: {str(e)}")
             return False
     
+    def test_notifications_cursor_deep_pagination(self):
+        """Benchmark GET /api/notificaciones?after=<cursor>: latencia plana en páginas profundas"""
+        if 'admin' not in self.headers:
+            self.log_test("Paginación profunda notificaciones (cursor)", False, "No hay token de admin")
+            return False
+            
+        try:
+            # seed_dataset.py da al admin su propio listado de hasta DEEP_PAGES páginas
+            summary = run_deep_pagination(self.session, f"{BASE_URL}/api/notificaciones", self.headers['admin'])
+            if 'skipped' in summary:
+                self.log_skip("Paginación profunda notificaciones (cursor)", describe(summary))
+                return True
+            ok = summary['flat']
+            self.log_test("Paginación profunda notificaciones (cursor)", ok, describe(summary))
+            if ok:
+                print(f"    {describe(summary)}")
+            return ok
+                
+        except Exception as e:
+            self.log_test("Paginación profunda notificaciones (cursor)", False, f"Exception: {str(e)}")
+            return False
+    
     def cleanup_created_notifications(self):
         """Limpia las notificaciones creadas durante las pruebas"""
         # En este caso, no creamos notificaciones manualmente, 
@@ -394,10 +426,12 @@ class NotificationsTestSuite:
         print("=== TESTS DE NOTIFICACIONES ===")
         
         # Tests de lectura
-        estudiante_notifications = self.test_get_notifications_estudiante()
-        profesor_notifications = self.test_get_notifications_profesor()
-        admin_notifications = self.test_get_notifications_admin()
-        self.test_get_notifications_unauthorized()
+        estudiante_notifications, profesor_notifications, admin_notifications, _ = run_concurrently(self.session, [
+            self.test_get_notifications_estudiante,
+            self.test_get_notifications_profesor,
+            self.test_get_notifications_admin,
+            self.test_get_notifications_unauthorized
+        ])
         
         # Tests de marcar como leída
         if estudiante_notifications:
@@ -413,6 +447,9 @@ class NotificationsTestSuite:
         self.test_notifications_filtering_by_type()
         self.test_notifications_pagination()
         
+        # Benchmark de paginación por cursor (significativo con un dataset de seed_dataset.py)
+        self.test_notifications_cursor_deep_pagination()
+        
         # Resumen
         passed = sum(1 for r in self.test_results if r['status'])
         total = len(self.test_results)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark de paginación profunda por cursor
+Recorre un listado con ?after=<cursor> midiendo cada página y compara la
+latencia de las primeras páginas con la de las últimas: con paginación por
+cursor (keyset) el coste no depende de la profundidad, así que debe ser plana.
+Como referencia se mide también una petición con ?page=N a la misma profundidad.
+
+Necesita un dataset grande (seed_dataset.py --scale medium o superior); con
+menos de MIN_PAGES páginas el benchmark no es significativo y se omite.
+"""
+import time
+import statistics
+
+# Páginas que se recorren como máximo y tamaño de página
+DEEP_PAGES = 500
+PER_PAGE = 50
+# Por debajo de estas páginas no hay profundidad suficiente para medir nada
+MIN_PAGES = 20
+# Fracción de páginas del principio y del final que se comparan
+WINDOW_FRACTION = 0.1
+# La mediana del final puede ser hasta FLAT_RATIO veces la del principio más
+# SLACK_MS de margen (con latencias de pocos ms el ruido pesa más que el ratio)
+FLAT_RATIO = 2.0
+SLACK_MS = 25.0
+
+def walk_cursor_pages(session, url, headers, params=None, max_pages=DEEP_PAGES, per_page=PER_PAGE):
+    """
+    Recorre el listado siguiendo meta.next_cursor. Devuelve (latencias en ms
+    por página, filas leídas, total estimado). Lanza RuntimeError si una
+    petición falla.
+    """
+    latencies = []
+    rows = 0
+    total = None
+    query = dict(params or {}, per_page=per_page, after='', with_total='true')
+    while len(latencies) < max_pages:
+        start = time.perf_counter()
+        response = session.get(url, params=query, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200:
+            raise RuntimeError(f"Página {len(latencies)}: status {response.status_code}, Body: {response.text[:200]}")
+
+        data = response.json()
+        meta = data.get('meta', {})
+        rows += len(data.get('data', []))
+        if total is None:
+            total = meta.get('total')
+        if not meta.get('has_next') or not meta.get('next_cursor'):
+            break
+        query = dict(params or {}, per_page=per_page, after=meta['next_cursor'])
+    return latencies, rows, total
+
+def offset_page_latency(session, url, headers, page, params=None, per_page=PER_PAGE):
+    """Latencia (ms) de la misma profundidad con la paginación por OFFSET, solo como referencia"""
+    start = time.perf_counter()
+    response = session.get(url, params=dict(params or {}, page=page, per_page=per_page), headers=headers)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed if response.status_code == 200 else None
+
+def run_deep_pagination(session, url, headers, params=None, max_pages=DEEP_PAGES, per_page=PER_PAGE):
+    """
+    Ejecuta el benchmark y devuelve un resumen con 'flat' (bool), o con
+    'skipped' si el listado no tiene páginas suficientes.
+    """
+    latencies, rows, total = walk_cursor_pages(session, url, headers, params, max_pages, per_page)
+    summary = {'pages': len(latencies), 'rows': rows, 'total': total}
+    if len(latencies) < MIN_PAGES:
+        summary['skipped'] = (f"solo {len(latencies)} páginas de {per_page} (mínimo {MIN_PAGES}); "
+                              f"carga un dataset con seed_dataset.py --scale medium")
+        return summary
+
+    # La primera página también cuenta el total (with_total): queda fuera de la comparación
+    measured = latencies[1:]
+    window = max(5, int(len(measured) * WINDOW_FRACTION))
+    first = statistics.median(measured[:window])
+    last = statistics.median(measured[-window:])
+    summary.update({
+        'first_ms': round(first, 1),
+        'last_ms': round(last, 1),
+        'ratio': round(last / first, 2) if first else None,
+        'offset_ms': offset_page_latency(session, url, headers, len(latencies), params, per_page),
+        'flat': last <= first * FLAT_RATIO + SLACK_MS
+    })
+    return summary
+
+def describe(summary):
+    """Texto del resultado para log_test"""
+    if 'skipped' in summary:
+        return f"Omitido: {summary['skipped']}"
+    text = (f"{summary['pages']} páginas ({summary['rows']} filas): mediana primeras {summary['first_ms']}ms, "
+            f"últimas {summary['last_ms']}ms (x{summary['ratio']})")
+    if summary.get('offset_ms') is not None:
+        text += f"; ?page={summary['pages']} con OFFSET: {summary['offset_ms']:.1f}ms"
+    return text
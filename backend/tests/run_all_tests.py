@@ -7,8 +7,12 @@ Base URL: https://tfg-backend.ddev.site
 
 import sys
 import os
+import io
 import json
 import time
+import argparse
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 
 # Agregar el directorio de tests al path para imports
@@ -21,12 +25,100 @@ from tribunales.tribunales_test import TribunalesTestSuite
 from defensas.defensas_test import DefensasTestSuite
 from users.users_test import UsersTestSuite
 from notifications.notifications_test import NotificationsTestSuite
+from http_client import TRANSPORTS
+from metrics import RECORDER
+from token_cache import TOKENS_FILE
+from compare_reports import compare_reports, print_comparison, add_threshold_arguments
+from load.load_test import LoadTestRunner, DEFAULT_MIX, DEFAULT_MANIFEST, parse_duration, parse_mix
+
+# Suites funcionales: (clase, método de limpieza, cabecera, cabecera de limpieza)
+SUITES = {
+    'tfgs': (TFGTestSuite, 'cleanup_created_tfgs', "📄 INICIANDO TESTS DE TFGs", "🧹 LIMPIEZA DE TFGs:"),
+    'tribunales': (TribunalesTestSuite, 'cleanup_created_tribunales', "⚖️ INICIANDO TESTS DE TRIBUNALES", "🧹 LIMPIEZA DE TRIBUNALES:"),
+    'defensas': (DefensasTestSuite, 'cleanup_created_defensas', "🛡️ INICIANDO TESTS DE DEFENSAS", "🧹 LIMPIEZA DE DEFENSAS:"),
+    'users': (UsersTestSuite, 'cleanup_created_users', "👥 INICIANDO TESTS DE USUARIOS", "🧹 LIMPIEZA DE USUARIOS:"),
+    'notifications': (NotificationsTestSuite, 'cleanup_created_notifications', "🔔 INICIANDO TESTS DE NOTIFICACIONES", "🧹 LIMPIEZA DE NOTIFICACIONES:"),
+}
+
+# Nombre de cada módulo en la cabecera y en el resumen
+MODULE_NAMES = {
+    'auth': 'Autenticación',
+    'tfgs': 'TFGs',
+    'tribunales': 'Tribunales',
+    'defensas': 'Defensas',
+    'users': 'Usuarios',
+    'notifications': 'Notificaciones'
+}
+
+# Grupos que se pueden ejecutar en paralelo. Las suites de un mismo grupo comparten
+# estado en el backend (el TFG activo del estudiante de pruebas) y van en serie.
+SUITE_LANES = [
+    ('tfgs', 'defensas'),
+    ('tribunales',),
+    ('users',),
+    ('notifications',),
+]
+
+def run_suites(module_names, tokens, run_id=None, transport=None):
+    """
+    Ejecuta las suites indicadas en orden, cada una seguida de su limpieza, y
+    devuelve los resultados por módulo. Con run_id los datos de prueba de cada
+    suite se marcan con un namespace propio.
+    """
+    results = {}
+    for module_name in module_names:
+        suite_class, cleanup_method, header, cleanup_header = SUITES[module_name]
+        print(header)
+        print("-" * 50)
+
+        namespace = f"{run_id}-{module_name}" if run_id else None
+        suite = suite_class(tokens, namespace=namespace, transport=transport)
+        try:
+            results[module_name] = suite.run_all_tests()
+        except Exception as e:
+            results[module_name] = suite.test_results + [{
+                "test": "Ejecución de la suite",
+                "status": False,
+                "details": f"Exception: {str(e)}"
+            }]
+        finally:
+            print(f"\n{cleanup_header}")
+            getattr(suite, cleanup_method)()
+
+        print("-" * 50)
+        print()
+
+    return results
+
+def run_suite_lane(lane, tokens, run_id, transport=None):
+    """
+    Ejecuta en un proceso aparte las suites de un grupo, cada una con su propia
+    sesión HTTP y con sus datos de prueba marcados con un namespace propio.
+    Devuelve los resultados por módulo, la salida capturada de la consola y
+    los histogramas de latencia serializados para combinarlos en el padre.
+    """
+    output = io.StringIO()
+
+    # El worker hereda (fork) las latencias de la autenticación, que ya tiene el padre
+    RECORDER.reset()
+    RECORDER.register_tokens(tokens)
+
+    with contextlib.redirect_stdout(output):
+        results = run_suites(lane, tokens, run_id, transport)
+
+    return results, output.getvalue(), RECORDER.to_dict()
 
 class TFGTestRunner:
-    def __init__(self):
+    def __init__(self, jobs=1, transport='requests', baseline=None, regression_options=None, reuse_tokens=False):
         self.start_time = datetime.now()
         self.all_results = {}
         self.tokens = {}
+        self.jobs = jobs
+        self.transport = transport
+        self.baseline = baseline
+        self.reuse_tokens = reuse_tokens
+        self.regression_options = regression_options or {}
+        self.run_id = f"{self.start_time.strftime('%H%M%S')}{os.getpid() % 1000:03d}"
         
     def print_header(self):
         """Imprime el header del test runner"""
@@ -35,13 +127,12 @@ class TFGTestRunner:
         print("=" * 80)
         print(f"📅 Fecha: {self.start_time.strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"🌐 Base URL: https://tfg-backend.ddev.site")
-        print(f"📋 Tests a ejecutar:")
-        print("   ✓ Autenticación (5 tests)")
-        print("   ✓ Gestión TFGs (8 tests)")
-        print("   ✓ Gestión Tribunales (8 tests)")
-        print("   ✓ Gestión Defensas (9 tests)")
-        print("   ✓ Gestión Usuarios (13 tests)")
-        print("   ✓ Sistema Notificaciones (11 tests)")
+        print(f"📋 Suites a ejecutar:")
+        for module_name in ['auth', *SUITES]:
+            print(f"   ✓ {MODULE_NAMES[module_name]}")
+        print(f"🔌 Transporte HTTP: {self.transport}")
+        if self.jobs > 1:
+            print(f"⚡ Ejecución paralela: {self.jobs} workers (namespace {self.run_id})")
         print("=" * 80)
         print()
     
@@ -50,101 +141,65 @@ class TFGTestRunner:
         print("🔐 INICIANDO TESTS DE AUTENTICACIÓN")
         print("-" * 50)
         
-        auth_suite = AuthTestSuite()
+        auth_suite = AuthTestSuite(transport=self.transport, reuse_tokens=self.reuse_tokens)
         tokens, results = auth_suite.run_all_tests()
         
         self.tokens = tokens
         self.all_results['auth'] = results
+        RECORDER.register_tokens(tokens)
         
         print("-" * 50)
         print()
         return tokens
     
-    def run_tfgs_tests(self):
-        """Ejecuta los tests de TFGs"""
-        print("📄 INICIANDO TESTS DE TFGs")
-        print("-" * 50)
-        
-        tfg_suite = TFGTestSuite(self.tokens)
-        results = tfg_suite.run_all_tests()
-        
-        self.all_results['tfgs'] = results
-        
-        # Cleanup
-        print("\n🧹 LIMPIEZA DE TFGs:")
-        tfg_suite.cleanup_created_tfgs()
-        
-        print("-" * 50)
-        print()
-    
-    def run_tribunales_tests(self):
-        """Ejecuta los tests de Tribunales"""
-        print("⚖️ INICIANDO TESTS DE TRIBUNALES")
-        print("-" * 50)
-        
-        tribunales_suite = TribunalesTestSuite(self.tokens)
-        results = tribunales_suite.run_all_tests()
-        
-        self.all_results['tribunales'] = results
-        
-        # Cleanup
-        print("\n🧹 LIMPIEZA DE TRIBUNALES:")
-        tribunales_suite.cleanup_created_tribunales()
-        
-        print("-" * 50)
-        print()
-    
-    def run_defensas_tests(self):
-        """Ejecuta los tests de Defensas"""
-        print("🛡️ INICIANDO TESTS DE DEFENSAS")
-        print("-" * 50)
-        
-        defensas_suite = DefensasTestSuite(self.tokens)
-        results = defensas_suite.run_all_tests()
-        
-        self.all_results['defensas'] = results
-        
-        # Cleanup
-        print("\n🧹 LIMPIEZA DE DEFENSAS:")
-        defensas_suite.cleanup_created_defensas()
-        
-        print("-" * 50)
-        print()
-    
-    def run_users_tests(self):
-        """Ejecuta los tests de Usuarios"""
-        print("👥 INICIANDO TESTS DE USUARIOS")
-        print("-" * 50)
-        
-        users_suite = UsersTestSuite(self.tokens)
-        results = users_suite.run_all_tests()
-        
-        self.all_results['users'] = results
-        
-        # Cleanup
-        print("\n🧹 LIMPIEZA DE USUARIOS:")
-        users_suite.cleanup_created_users()
-        
-        print("-" * 50)
-        print()
-    
-    def run_notifications_tests(self):
-        """Ejecuta los tests de Notificaciones"""
-        print("🔔 INICIANDO TESTS DE NOTIFICACIONES")
-        print("-" * 50)
-        
-        notifications_suite = NotificationsTestSuite(self.tokens)
-        results = notifications_suite.run_all_tests()
-        
-        self.all_results['notifications'] = results
-        
-        # Cleanup (aunque las notificaciones normalmente no se eliminan)
-        print("\n🧹 LIMPIEZA DE NOTIFICACIONES:")
-        notifications_suite.cleanup_created_notifications()
-        
-        print("-" * 50)
+    def run_parallel_tests(self):
+        """Ejecuta las suites funcionales en paralelo, un grupo de suites por worker"""
+        print(f"⚡ INICIANDO SUITES EN PARALELO ({self.jobs} workers)")
         print()
-    
+
+        lane_results = {}
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            futures = {
+                executor.submit(run_suite_lane, lane, self.tokens, self.run_id, self.transport): lane
+                for lane in SUITE_LANES
+            }
+
+            # La salida de cada grupo se imprime completa según van terminando
+            for future in as_completed(futures):
+                lane = futures[future]
+                try:
+                    results, output, latencies = future.result()
+                    print(output, end='')
+                    lane_results.update(results)
+                    RECORDER.merge_dict(latencies)
+                except Exception as e:
+                    print(f"❌ Error en el worker de {', '.join(lane)}: {str(e)}")
+                    for module_name in lane:
+                        lane_results[module_name] = [{
+                            "test": "Ejecución del worker",
+                            "status": False,
+                            "details": f"Exception: {str(e)}"
+                        }]
+
+        # Mantener el mismo orden de módulos que la ejecución secuencial
+        for module_name in SUITES:
+            if module_name in lane_results:
+                self.all_results[module_name] = lane_results[module_name]
+
+    def print_latency_summary(self, limit=10):
+        """Imprime los endpoints más lentos según el p99 de la latencia total"""
+        endpoints = RECORDER.report()
+        if not endpoints:
+            return
+
+        print("⏱️ LATENCIA POR ENDPOINT (ms, los más lentos por p99)")
+        print("-" * 80)
+        print(f"{'Endpoint':<44}{'n':>5}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}")
+        slowest = sorted(endpoints.items(), key=lambda item: item[1]['p99'], reverse=True)[:limit]
+        for route, stats in slowest:
+            print(f"{route[:43]:<44}{stats['count']:>5}{stats['p50']:>8.0f}{stats['p90']:>8.0f}{stats['p99']:>8.0f}{stats['max']:>8.0f}")
+        print("=" * 80)
+
     def print_final_summary(self):
         """Imprime el resumen final de todos los tests"""
         end_time = datetime.now()
@@ -166,14 +221,7 @@ class TFGTestRunner:
             total_tests += total
             
             status_icon = "✅" if passed == total else "❌" if passed == 0 else "⚠️"
-            module_display = {
-                'auth': 'Autenticación',
-                'tfgs': 'TFGs',
-                'tribunales': 'Tribunales', 
-                'defensas': 'Defensas',
-                'users': 'Usuarios',
-                'notifications': 'Notificaciones'
-            }.get(module_name, module_name.capitalize())
+            module_display = MODULE_NAMES.get(module_name, module_name.capitalize())
             
             print(f"{status_icon} {module_display:<15}: {passed:>2}/{total:<2} tests pasados")
         
@@ -198,14 +246,7 @@ class TFGTestRunner:
             for module_name, results in self.all_results.items():
                 failed_tests = [r for r in results if not r['status']]
                 if failed_tests:
-                    module_display = {
-                        'auth': 'Autenticación',
-                        'tfgs': 'TFGs',
-                        'tribunales': 'Tribunales',
-                        'defensas': 'Defensas', 
-                        'users': 'Usuarios',
-                        'notifications': 'Notificaciones'
-                    }.get(module_name, module_name.capitalize())
+                    module_display = MODULE_NAMES.get(module_name, module_name.capitalize())
                     
                     print(f"\n🔴 {module_display}:")
                     for test in failed_tests:
@@ -223,10 +264,14 @@ class TFGTestRunner:
         print("\n🧹 LIMPIEZA FINAL:")
         
         temp_files = [
-            '/tmp/tfg_test_tokens.json'
+            TOKENS_FILE
         ]
         
         for temp_file in temp_files:
+            # Con --reuse-tokens el fichero guarda la caché de tokens para la siguiente ejecución
+            if self.reuse_tokens and temp_file == TOKENS_FILE:
+                print(f"ℹ️ Conservado (caché de tokens): {temp_file}")
+                continue
             try:
                 if os.path.exists(temp_file):
                     os.remove(temp_file)
@@ -243,7 +288,10 @@ class TFGTestRunner:
                 'timestamp': self.start_time.isoformat(),
                 'duration_seconds': (datetime.now() - self.start_time).total_seconds(),
                 'base_url': 'https://tfg-backend.ddev.site',
+                'jobs': self.jobs,
+                'transport': self.transport,
                 'results': self.all_results,
+                'latency': RECORDER.report_section(),
                 'summary': {
                     'total_tests': sum(len(results) for results in self.all_results.values()),
                     'total_passed': sum(sum(1 for r in results if r['status']) for results in self.all_results.values()),
@@ -262,9 +310,11 @@ class TFGTestRunner:
                 json.dump(report, f, indent=2, ensure_ascii=False)
             
             print(f"📄 Reporte guardado en: {report_file}")
+            return report_file
             
         except Exception as e:
             print(f"⚠️ No se pudo guardar el reporte: {str(e)}")
+            return None
     
     def run_all_tests(self):
         """Ejecuta todos los tests en orden"""
@@ -280,20 +330,25 @@ class TFGTestRunner:
                 return False
             
             # 2. Tests de funcionalidad principal
-            self.run_tfgs_tests()
-            self.run_tribunales_tests()
-            self.run_defensas_tests()
-            self.run_users_tests()
-            self.run_notifications_tests()
+            if self.jobs > 1:
+                self.run_parallel_tests()
+            else:
+                self.all_results.update(run_suites(SUITES, self.tokens, transport=self.transport))
             
             # 3. Resumen final
+            self.print_latency_summary()
             passed, total = self.print_final_summary()
             
             # 4. Guardar reporte
-            self.save_results_report()
+            report_file = self.save_results_report()
+            
+            # 5. Comparar latencias con la ejecución de referencia
+            regressions = []
+            if self.baseline:
+                regressions = check_regressions(self.baseline, report_file, self.regression_options)
             
-            # 5. Exit code
-            return passed == total
+            # 6. Exit code
+            return passed == total and not regressions
             
         except KeyboardInterrupt:
             print("\n\n⚠️ TESTS INTERRUMPIDOS POR EL USUARIO")
@@ -307,9 +362,119 @@ class TFGTestRunner:
             self.cleanup_temp_files()
             return False
 
+def check_regressions(baseline, report_file, options):
+    """Compara el reporte con el de referencia; un reporte ilegible cuenta como regresión"""
+    print()
+    if not report_file:
+        print("❌ No hay reporte que comparar con la referencia")
+        return [None]
+
+    try:
+        comparisons = compare_reports(baseline, report_file, **options)
+    except (OSError, ValueError) as e:
+        print(f"❌ No se pudo comparar con la referencia: {str(e)}")
+        return [None]
+
+    return print_comparison(comparisons, options['threshold'], options['alpha'])
+
+def parse_args():
+    """Parsea los argumentos de línea de comandos"""
+    parser = argparse.ArgumentParser(description="Ejecuta todos los tests de la API TFG")
+    parser.add_argument(
+        '--jobs', '-j', type=int, default=1,
+        help=f"Número de workers para ejecutar las suites en paralelo (máx. útil: {len(SUITE_LANES)})"
+    )
+    parser.add_argument(
+        '--transport', choices=TRANSPORTS, default='requests',
+        help="Cliente HTTP: requests (bloqueante), async (httpx) o http2 (httpx con HTTP/2)"
+    )
+    parser.add_argument(
+        '--reuse-tokens', action='store_true',
+        help=f"Reutiliza los tokens JWT válidos guardados en {TOKENS_FILE} (o los renueva con el refresh token) en lugar de hacer login"
+    )
+
+    load_group = parser.add_argument_group("prueba de carga")
+    load_group.add_argument('--load', action='store_true', help="Ejecuta una prueba de carga en lugar de los tests funcionales")
+    load_group.add_argument('--users', type=int, default=10, help="Usuarios virtuales concurrentes (por defecto: 10)")
+    load_group.add_argument('--duration', type=parse_duration, default=60, help="Duración de la prueba: 90s, 10m, 1h (por defecto: 60s)")
+    load_group.add_argument('--ramp-up', type=parse_duration, default=0, help="Tiempo hasta tener todos los usuarios activos (por defecto: 0)")
+    load_group.add_argument('--think-time', type=float, default=1.0, help="Segundos de espera media entre peticiones de un usuario (por defecto: 1.0)")
+    load_group.add_argument(
+        '--mix', type=parse_mix, default=None,
+        help=f"Pesos de los escenarios, p.ej. login=1,mis_tfgs=4 (disponibles: {', '.join(DEFAULT_MIX)})"
+    )
+    load_group.add_argument(
+        '--manifest', default=DEFAULT_MANIFEST,
+        help=f"Manifiesto de seed_dataset.py: cada usuario virtual entra como un estudiante distinto del dataset (por defecto: {DEFAULT_MANIFEST})"
+    )
+    load_group.add_argument('--max-error-rate', type=float, default=0.05, help="Tasa de error máxima aceptada (por defecto: 0.05)")
+
+    regression_group = parser.add_argument_group("regresiones de rendimiento")
+    regression_group.add_argument('--baseline', help="Reporte JSON de referencia; falla si algún endpoint es significativamente más lento")
+    add_threshold_arguments(regression_group)
+    args = parser.parse_args()
+
+    if args.jobs < 1:
+        parser.error("--jobs debe ser mayor o igual que 1")
+    if args.users < 1:
+        parser.error("--users debe ser mayor o igual que 1")
+
+    return args
+
+def run_load_test(args):
+    """Ejecuta la prueba de carga y sale con error si se supera la tasa de error máxima"""
+    runner = LoadTestRunner(
+        users=args.users,
+        duration=args.duration,
+        ramp_up=args.ramp_up,
+        think_time=args.think_time,
+        mix=args.mix,
+        transport=args.transport,
+        reuse_tokens=args.reuse_tokens,
+        manifest_path=args.manifest
+    )
+    report = runner.run()
+
+    if not report:
+        print("\n💥 NO SE PUDO INICIAR LA PRUEBA DE CARGA")
+        sys.exit(1)
+
+    runner.print_report(report)
+    report_file = runner.save_report(report)
+
+    if report['error_rate'] > args.max_error_rate:
+        print(f"\n💥 TASA DE ERROR {report['error_rate'] * 100:.2f}% SUPERIOR AL {args.max_error_rate * 100:.2f}% PERMITIDO")
+        sys.exit(1)
+
+    if args.baseline and check_regressions(args.baseline, report_file, regression_options(args)):
+        print("\n💥 REGRESIÓN DE RENDIMIENTO RESPECTO A LA REFERENCIA")
+        sys.exit(1)
+
+    print("\n🎉 PRUEBA DE CARGA COMPLETADA")
+    sys.exit(0)
+
+def regression_options(args):
+    return {
+        'threshold': args.threshold,
+        'alpha': args.alpha,
+        'min_samples': args.min_samples,
+        'min_delta_ms': args.min_delta_ms
+    }
+
 def main():
     """Función principal"""
-    runner = TFGTestRunner()
+    args = parse_args()
+
+    if args.load:
+        run_load_test(args)
+
+    runner = TFGTestRunner(
+        jobs=min(args.jobs, len(SUITE_LANES)),
+        transport=args.transport,
+        baseline=args.baseline,
+        regression_options=regression_options(args),
+        reuse_tokens=args.reuse_tokens
+    )
     
     try:
         success = runner.run_all_tests()
@@ -0,0 +1,702 @@
+#!/usr/bin/env python3
+"""
+Generador automático del calendario de defensas
+Base URL: https://tfg-backend.ddev.site
+
+A partir de los TFGs aprobados, los tribunales (con la ocupación de sus
+miembros, la misma información que GET /api/tribunales/{id}/disponibilidad),
+las aulas y las ventanas horarias, genera un calendario sin conflictos en el
+formato que acepta POST /api/defensas/batch ({"defensas": [...]}).
+
+El horario se divide en franjas de 'duracion' minutos separadas por 'pausa'.
+Dos defensas solo pueden chocar si comparten franja, así que basta con que en
+cada franja ningún profesor esté en dos tribunales ni se repita el aula:
+
+  1. Voraz: cada TFG va a la primera franja libre del tribunal menos cargado
+     (un montículo por (franja, carga) con punteros que solo avanzan).
+  2. Reparación: los TFGs que no caben se intentan colocar moviendo la
+     defensa que les bloquea a otra franja.
+  3. Búsqueda local: mueve defensas a otras franjas si así los profesores
+     acuden menos días y con menos huecos entre defensas.
+
+Uso:
+    # Calendario para los TFGs libres del dataset de seed_dataset.py
+    python3 schedule_solver.py --manifest /tmp/tfg_seed_manifest_s42.json --aulas 20 -o /tmp/calendario.json
+    python3 defensas_batch.py /tmp/calendario.json --dry-run
+
+    # Instancia propia (formato en load_instance) y benchmark con instancias sintéticas
+    python3 schedule_solver.py --instance instancia.json -o calendario.json
+    python3 schedule_solver.py --benchmark --sizes 500,1000,2000,5000
+"""
+import sys
+import json
+import time
+import heapq
+import random
+import argparse
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import urllib3
+
+from http_client import create_session
+from token_cache import TokenCache
+from seed_dataset import BASE_URL, ADMIN_CREDENTIALS, DURACION_DEFENSA, term_start
+from defensas_batch import DEFAULT_MANIFEST, load_seed_resources
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# Minutos entre el final de una defensa y el inicio de la siguiente franja
+PAUSA = 15
+# Mismo valor que Defensa::DURACION_MAXIMA
+DURACION_MAXIMA = 180
+# Ventanas diarias por defecto: las franjas coinciden con HORAS_DEFENSA de seed_dataset.py
+HORARIO = [(9, 0, 14, 0), (16, 0, 19, 0)]
+# Peso de cada día que un profesor tiene que acudir y de cada franja libre entre dos de sus defensas
+PESO_DIA = 10
+PESO_HUECO = 1
+# Segundos de búsqueda local por defecto
+TIEMPO_BUSQUEDA = 2.0
+BENCHMARK_SIZES = [500, 1000, 2000, 5000]
+
+def parse_fecha(value):
+    """Fecha ISO 8601 como datetime sin zona (igual que las que genera seed_dataset.py)"""
+    fecha = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return fecha.replace(tzinfo=None)
+
+def ventanas_laborables(desde, dias, horario=HORARIO):
+    """Ventanas de 'dias' días laborables a partir de 'desde'"""
+    ventanas = []
+    dia = desde.replace(hour=0, minute=0, second=0, microsecond=0)
+    while len(ventanas) < dias * len(horario):
+        if dia.weekday() < 5:
+            for h_ini, m_ini, h_fin, m_fin in horario:
+                ventanas.append({
+                    'inicio': dia.replace(hour=h_ini, minute=m_ini).isoformat(),
+                    'fin': dia.replace(hour=h_fin, minute=m_fin).isoformat(),
+                })
+        dia += timedelta(days=1)
+    return ventanas
+
+def load_instance(data):
+    """
+    Normaliza una instancia. Formato de entrada (fechas en ISO 8601):
+
+        {
+          "duracion": 45, "pausa": 15,
+          "ventanas": [{"inicio": ..., "fin": ...}],
+          "aulas": ["Aula 1", ...],
+          "tfgs": [{"id": 12, "tutor": 7, "tribunales": [3, 5]}],
+          "tribunales": [{"id": 3, "miembros": [7, 8, 9],
+                          "ocupado": [{"fecha": ..., "aula": ..., "duracion": 45}]}],
+          "no_disponible": {"8": [{"inicio": ..., "fin": ...}]}
+        }
+
+    En "tfgs" basta con el id; "tutor" excluye los tribunales de los que forma
+    parte su tutor y "tribunales" limita los tribunales posibles. "ocupado" son
+    las defensas ya programadas del tribunal (las de su disponibilidad) y
+    "no_disponible" las ausencias de cada profesor.
+    """
+    duracion = int(data.get('duracion', DURACION_DEFENSA))
+    pausa = int(data.get('pausa', PAUSA))
+
+    # Franjas ordenadas y sin solaparse aunque las ventanas se solapen
+    inicios = []
+    for ventana in data['ventanas']:
+        inicio, fin = parse_fecha(ventana['inicio']), parse_fecha(ventana['fin'])
+        while inicio + timedelta(minutes=duracion) <= fin:
+            inicios.append(inicio)
+            inicio += timedelta(minutes=duracion + pausa)
+    slots = []
+    for inicio in sorted(set(inicios)):
+        if not slots or inicio >= slots[-1] + timedelta(minutes=duracion):
+            slots.append(inicio)
+
+    tfgs = []
+    for tfg in data['tfgs']:
+        tfg = tfg if isinstance(tfg, dict) else {'id': tfg}
+        tfgs.append({'id': tfg['id'], 'tutor': tfg.get('tutor'), 'tribunales': tfg.get('tribunales')})
+
+    ocupado_miembros = defaultdict(list)
+    ocupado_aulas = defaultdict(list)
+    tribunales = []
+    for tribunal in data['tribunales']:
+        tribunales.append({'id': tribunal['id'], 'miembros': [m for m in tribunal['miembros'] if m]})
+        for defensa in tribunal.get('ocupado', []):
+            inicio = parse_fecha(defensa['fecha'])
+            intervalo = (inicio, inicio + timedelta(minutes=int(defensa.get('duracion') or duracion)))
+            for miembro in tribunal['miembros']:
+                ocupado_miembros[miembro].append(intervalo)
+            if defensa.get('aula'):
+                ocupado_aulas[defensa['aula']].append(intervalo)
+
+    for miembro, ausencias in data.get('no_disponible', {}).items():
+        for ausencia in ausencias:
+            ocupado_miembros[int(miembro)].append((parse_fecha(ausencia['inicio']), parse_fecha(ausencia['fin'])))
+
+    return {
+        'duracion': duracion,
+        'pausa': pausa,
+        'slots': slots,
+        'ventanas': [(parse_fecha(v['inicio']), parse_fecha(v['fin'])) for v in data['ventanas']],
+        'aulas': list(dict.fromkeys(data['aulas'])),
+        'tfgs': tfgs,
+        'tribunales': tribunales,
+        'ocupado_miembros': dict(ocupado_miembros),
+        'ocupado_aulas': dict(ocupado_aulas),
+    }
+
+class ScheduleSolver:
+    def __init__(self, instancia, seed=42):
+        self.instancia = instancia
+        self.rng = random.Random(seed)
+        self.slots = instancia['slots']
+        self.duracion = timedelta(minutes=instancia['duracion'])
+        self.tfgs = instancia['tfgs']
+        self.tribunales = instancia['tribunales']
+        self.miembros = [tribunal['miembros'] for tribunal in self.tribunales]
+        self.aulas = instancia['aulas']
+
+        # Día y posición dentro del día de cada franja (para el coste de los profesores)
+        self.dia = []
+        self.posicion = []
+        self.franjas_dia = []
+        for s, inicio in enumerate(self.slots):
+            if not self.franjas_dia or self.slots[self.franjas_dia[-1][0]].date() != inicio.date():
+                self.franjas_dia.append([])
+            self.dia.append(len(self.franjas_dia) - 1)
+            self.posicion.append(len(self.franjas_dia[-1]))
+            self.franjas_dia[-1].append(s)
+
+        self.tribunales_miembro = defaultdict(set)
+        for t, miembros in enumerate(self.miembros):
+            for miembro in miembros:
+                self.tribunales_miembro[miembro].add(t)
+        indice_tribunal = {tribunal['id']: t for t, tribunal in enumerate(self.tribunales)}
+        self.candidatos = [
+            None if tfg['tribunales'] is None else [indice_tribunal[i] for i in tfg['tribunales'] if i in indice_tribunal]
+            for tfg in self.tfgs
+        ]
+        self.excluidos = [self.tribunales_miembro.get(tfg['tutor'], set()) for tfg in self.tfgs]
+
+        self.bloqueado = {m: self.franjas_ocupadas(intervalos) for m, intervalos in instancia['ocupado_miembros'].items()}
+        bloqueadas_aula = {a: self.franjas_ocupadas(instancia['ocupado_aulas'].get(aula, [])) for a, aula in enumerate(self.aulas)}
+        self.aulas_libres = [
+            {a for a in range(len(self.aulas)) if s not in bloqueadas_aula[a]}
+            for s in range(len(self.slots))
+        ]
+
+        self.asignacion = {}
+        self.ocupa = {}
+        self.carga = [0] * len(self.tribunales)
+        self.aula_tribunal = {}
+        self.posiciones = defaultdict(lambda: defaultdict(list))
+        self.sin_asignar = []
+
+    def franjas_ocupadas(self, intervalos):
+        """Franjas que se solapan con alguno de los intervalos [inicio, fin)"""
+        ocupadas = set()
+        for inicio, fin in intervalos:
+            desde = bisect_right(self.slots, inicio - self.duracion)
+            hasta = bisect_left(self.slots, fin)
+            ocupadas.update(range(desde, hasta))
+        return ocupadas
+
+    def libre(self, t, s):
+        if not self.aulas_libres[s]:
+            return False
+        for miembro in self.miembros[t]:
+            if (miembro, s) in self.ocupa or s in self.bloqueado.get(miembro, ()):
+                return False
+        return True
+
+    def asignar(self, i, s, t, a):
+        self.asignacion[i] = (s, t, a)
+        for miembro in self.miembros[t]:
+            self.ocupa[(miembro, s)] = i
+            self.posiciones[miembro][self.dia[s]].append(self.posicion[s])
+        self.aulas_libres[s].discard(a)
+        self.carga[t] += 1
+        self.aula_tribunal[t] = a
+
+    def desasignar(self, i):
+        s, t, a = self.asignacion.pop(i)
+        for miembro in self.miembros[t]:
+            del self.ocupa[(miembro, s)]
+            self.posiciones[miembro][self.dia[s]].remove(self.posicion[s])
+        self.aulas_libres[s].add(a)
+        self.carga[t] -= 1
+        return s, t, a
+
+    def elegir_aula(self, t, s):
+        """La última aula del tribunal si está libre, para que no cambie de sala"""
+        anterior = self.aula_tribunal.get(t)
+        return anterior if anterior in self.aulas_libres[s] else min(self.aulas_libres[s])
+
+    def permitido(self, i, t):
+        candidatos = self.candidatos[i]
+        return t not in self.excluidos[i] and (candidatos is None or t in candidatos)
+
+    # Fase 1: voraz
+
+    def greedy(self):
+        n_slots = len(self.slots)
+        puntero = [0] * len(self.tribunales)
+        version = [0] * len(self.tribunales)
+
+        def avanzar(t):
+            # Sin liberar franjas, lo que no está libre ya no lo estará: el puntero solo avanza
+            while puntero[t] < n_slots and not self.libre(t, puntero[t]):
+                puntero[t] += 1
+            return puntero[t]
+
+        def actualizar(t):
+            version[t] += 1
+            heapq.heappush(heap, (avanzar(t), self.carga[t], t, version[t]))
+
+        def mejor_del_monticulo(i):
+            apartados = []
+            mejor = None
+            while heap:
+                s, carga, t, v = heap[0]
+                if v != version[t]:
+                    heapq.heappop(heap)
+                    continue
+                if (avanzar(t), self.carga[t]) != (s, carga):
+                    heapq.heappop(heap)
+                    actualizar(t)
+                    continue
+                if s >= n_slots:
+                    break
+                if t in self.excluidos[i]:
+                    apartados.append(heapq.heappop(heap))
+                    continue
+                mejor = (s, t)
+                break
+            for entrada in apartados:
+                heapq.heappush(heap, entrada)
+            return mejor
+
+        heap = [(0, 0, t, 0) for t in range(len(self.tribunales))]
+        heapq.heapify(heap)
+
+        # Primero los TFGs más restringidos
+        orden = sorted(range(len(self.tfgs)), key=lambda i: (
+            len(self.candidatos[i]) if self.candidatos[i] is not None else len(self.tribunales),
+            -len(self.excluidos[i])
+        ))
+        for i in orden:
+            if self.candidatos[i] is not None:
+                opciones = [(avanzar(t), self.carga[t], t) for t in self.candidatos[i] if t not in self.excluidos[i]]
+                opciones = [opcion for opcion in opciones if opcion[0] < n_slots]
+                mejor = (min(opciones)[0], min(opciones)[2]) if opciones else None
+            else:
+                mejor = mejor_del_monticulo(i)
+
+            if not mejor:
+                self.sin_asignar.append(i)
+                continue
+
+            s, t = mejor
+            self.asignar(i, s, t, self.elegir_aula(t, s))
+            actualizar(t)
+
+    # Fase 2: reparación de los TFGs sin franja
+
+    def reparar(self, limite):
+        """Coloca TFGs sin asignar desplazando a otra franja la defensa que les bloquea"""
+        pendientes = []
+        for i in self.sin_asignar:
+            if time.monotonic() > limite or not self.colocar_desplazando(i):
+                pendientes.append(i)
+        self.sin_asignar = pendientes
+
+    def colocar_desplazando(self, i):
+        candidatos = self.candidatos[i] if self.candidatos[i] is not None else range(len(self.tribunales))
+        for t in candidatos:
+            if t in self.excluidos[i]:
+                continue
+            for s in range(len(self.slots)):
+                if self.libre(t, s):
+                    self.asignar(i, s, t, self.elegir_aula(t, s))
+                    return True
+
+                if any(s in self.bloqueado.get(m, ()) for m in self.miembros[t]):
+                    continue
+                bloqueantes = {self.ocupa[(m, s)] for m in self.miembros[t] if (m, s) in self.ocupa}
+                if len(bloqueantes) != 1:
+                    continue
+
+                j = bloqueantes.pop()
+                s_j, t_j, a_j = self.desasignar(j)
+                destino = next((s2 for s2 in range(len(self.slots)) if s2 != s and self.libre(t_j, s2)), None)
+                if destino is not None:
+                    self.asignar(j, destino, t_j, self.elegir_aula(t_j, destino))
+                    if self.libre(t, s):
+                        self.asignar(i, s, t, self.elegir_aula(t, s))
+                        return True
+                    self.desasignar(j)
+                self.asignar(j, s_j, t_j, a_j)
+        return False
+
+    # Fase 3: búsqueda local
+
+    def coste_miembros(self, miembros, dias):
+        coste = 0
+        for miembro in miembros:
+            por_dia = self.posiciones[miembro]
+            for dia in dias:
+                posiciones = por_dia.get(dia)
+                if posiciones:
+                    coste += PESO_DIA + PESO_HUECO * (max(posiciones) - min(posiciones) + 1 - len(posiciones))
+        return coste
+
+    def coste(self):
+        return sum(self.coste_miembros([miembro], self.posiciones[miembro]) for miembro in list(self.posiciones))
+
+    def destinos(self, i):
+        """Franjas a las que merece la pena mover la defensa: junto a otras de sus profesores"""
+        s, t, _ = self.asignacion[i]
+        miembro = self.rng.choice(self.miembros[t])
+        dias = [dia for dia, posiciones in self.posiciones[miembro].items() if posiciones]
+        dia = self.rng.choice(dias)
+        posiciones = self.posiciones[miembro][dia]
+        franjas = self.franjas_dia[dia]
+
+        candidatas = {min(posiciones) - 1, max(posiciones) + 1}
+        candidatas.update(p for p in range(min(posiciones), max(posiciones)) if p not in posiciones)
+        return [franjas[p] for p in candidatas if 0 <= p < len(franjas) and franjas[p] != s]
+
+    def mover(self, i):
+        """Mueve la defensa a la primera franja que reduce el coste; True si mejora"""
+        s, t, a = self.asignacion[i]
+        for destino in self.destinos(i):
+            if not self.libre(t, destino):
+                continue
+            dias = {self.dia[s], self.dia[destino]}
+            antes = self.coste_miembros(self.miembros[t], dias)
+            self.desasignar(i)
+            self.asignar(i, destino, t, self.elegir_aula(t, destino))
+            if self.coste_miembros(self.miembros[t], dias) < antes:
+                return True
+            self.desasignar(i)
+            self.asignar(i, s, t, a)
+        return False
+
+    def local_search(self, limite):
+        asignados = list(self.asignacion)
+        if not asignados:
+            return 0
+        mejoras = 0
+        sin_mejora = 0
+        while time.monotonic() < limite and sin_mejora < 20 * len(asignados):
+            if self.mover(self.rng.choice(asignados)):
+                mejoras += 1
+                sin_mejora = 0
+            else:
+                sin_mejora += 1
+        return mejoras
+
+    def solve(self, tiempo=TIEMPO_BUSQUEDA):
+        """Ejecuta las tres fases y devuelve el resumen con tiempos y costes"""
+        inicio = time.monotonic()
+        self.greedy()
+        t_voraz = time.monotonic() - inicio
+
+        sin_asignar_voraz = len(self.sin_asignar)
+        self.reparar(time.monotonic() + tiempo / 2)
+        t_reparacion = time.monotonic() - inicio - t_voraz
+
+        coste_inicial = self.coste()
+        mejoras = self.local_search(time.monotonic() + max(tiempo - t_reparacion, 0))
+        t_total = time.monotonic() - inicio
+
+        return {
+            'tfgs': len(self.tfgs),
+            'asignadas': len(self.asignacion),
+            'sin_asignar_voraz': sin_asignar_voraz,
+            'sin_asignar': len(self.sin_asignar),
+            'franjas': len(self.slots),
+            'dias_usados': len({self.dia[s] for s, _, _ in self.asignacion.values()}),
+            'coste_inicial': coste_inicial,
+            'coste_final': self.coste(),
+            'movimientos': mejoras,
+            'tiempo_s': {
+                'voraz': round(t_voraz, 3),
+                'reparacion': round(t_reparacion, 3),
+                'busqueda_local': round(t_total - t_voraz - t_reparacion, 3),
+                'total': round(t_total, 3),
+            },
+        }
+
+    def defensas(self):
+        """Calendario en el formato de POST /api/defensas/batch, ordenado por fecha"""
+        ordenadas = sorted(self.asignacion.items(), key=lambda item: (item[1][0], item[1][2]))
+        return [{
+            'tfg_id': self.tfgs[i]['id'],
+            'tribunal_id': self.tribunales[t]['id'],
+            'fecha_defensa': self.slots[s].isoformat(),
+            'aula': self.aulas[a],
+            'duracion_estimada': self.instancia['duracion'],
+        } for i, (s, t, a) in ordenadas]
+
+def verify_schedule(instancia, defensas):
+    """
+    Comprueba un calendario sin usar las estructuras del solver: solapes por
+    tribunal, profesor y aula (con las defensas ya programadas y las ausencias),
+    TFGs repetidos, tribunales no permitidos y defensas fuera de las ventanas.
+    Devuelve la lista de conflictos encontrados.
+    """
+    duracion = timedelta(minutes=instancia['duracion'])
+    miembros = {tribunal['id']: tribunal['miembros'] for tribunal in instancia['tribunales']}
+    tfgs = {tfg['id']: tfg for tfg in instancia['tfgs']}
+    conflictos = []
+
+    intervalos = defaultdict(list)
+    for miembro, ocupado in instancia['ocupado_miembros'].items():
+        intervalos[f"miembro:{miembro}"].extend((inicio, fin, 'ocupado') for inicio, fin in ocupado)
+    for aula, ocupado in instancia['ocupado_aulas'].items():
+        intervalos[f"aula:{aula}"].extend((inicio, fin, 'ocupado') for inicio, fin in ocupado)
+
+    vistos = set()
+    for k, defensa in enumerate(defensas):
+        tfg = tfgs.get(defensa['tfg_id'])
+        inicio = parse_fecha(defensa['fecha_defensa'])
+        fin = inicio + duracion
+        tribunal = miembros.get(defensa['tribunal_id'], [])
+
+        if not tfg or defensa['tfg_id'] in vistos:
+            conflictos.append(f"defensa {k}: TFG {defensa['tfg_id']} desconocido o repetido")
+        vistos.add(defensa['tfg_id'])
+        if tfg and tfg['tutor'] in tribunal:
+            conflictos.append(f"defensa {k}: el tutor forma parte del tribunal {defensa['tribunal_id']}")
+        if tfg and tfg['tribunales'] is not None and defensa['tribunal_id'] not in tfg['tribunales']:
+            conflictos.append(f"defensa {k}: tribunal {defensa['tribunal_id']} no permitido")
+        if not any(v_ini <= inicio and fin <= v_fin for v_ini, v_fin in instancia['ventanas']):
+            conflictos.append(f"defensa {k}: fuera de las ventanas horarias")
+
+        recursos = [f"tribunal:{defensa['tribunal_id']}", f"aula:{defensa['aula']}"]
+        recursos += [f"miembro:{miembro}" for miembro in tribunal]
+        for recurso in recursos:
+            intervalos[recurso].append((inicio, fin, k))
+
+    # Barrido por recurso guardando, por separado, la defensa y la ocupación previa
+    # que terminan más tarde (dos ocupaciones previas sí pueden solaparse)
+    for recurso, lista in intervalos.items():
+        lista.sort(key=lambda intervalo: intervalo[0])
+        activo = {'defensa': None, 'ocupado': None}
+        for intervalo in lista:
+            tipo = 'ocupado' if intervalo[2] == 'ocupado' else 'defensa'
+            rivales = [activo['defensa']] if tipo == 'ocupado' else [activo['defensa'], activo['ocupado']]
+            for rival in rivales:
+                if rival and intervalo[0] < rival[1]:
+                    conflictos.append(f"{recurso}: {intervalo[2]} se solapa con {rival[2]}")
+                    break
+            if not activo[tipo] or intervalo[1] > activo[tipo][1]:
+                activo[tipo] = intervalo
+
+    return conflictos
+
+def synthetic_instance(n, seed=42, desde=None):
+    """
+    Instancia sintética con n TFGs: un profesor por cada 8 TFGs, tribunales de
+    tres profesores, ausencias de media jornada, el tutor de cada TFG y un 20%
+    de TFGs limitados a 5 tribunales (p.ej. por área). Las ventanas dan un 25%
+    de margen sobre la capacidad de las aulas.
+    """
+    rng = random.Random(seed)
+    desde = desde or term_start()
+    n_profesores = max(30, n // 8)
+    n_tribunales = max(10, n // 10)
+    n_aulas = max(5, n // 100)
+    franjas_dia = sum(((h_fin * 60 + m_fin) - (h_ini * 60 + m_ini) + PAUSA) // (DURACION_DEFENSA + PAUSA)
+                      for h_ini, m_ini, h_fin, m_fin in HORARIO)
+    dias = -(-n * 5 // (4 * franjas_dia * n_aulas)) + 1
+    ventanas = ventanas_laborables(desde, dias)
+
+    profesores = list(range(1, n_profesores + 1))
+    tribunales = [{'id': t + 1, 'miembros': rng.sample(profesores, 3)} for t in range(n_tribunales)]
+
+    tfgs = []
+    for i in range(n):
+        tfg = {'id': i + 1, 'tutor': rng.choice(profesores)}
+        if rng.random() < 0.2:
+            tfg['tribunales'] = [tribunal['id'] for tribunal in rng.sample(tribunales, 5)]
+        tfgs.append(tfg)
+
+    no_disponible = {}
+    for profesor in rng.sample(profesores, n_profesores // 3):
+        ausencias = []
+        for ventana in rng.sample(ventanas, min(len(ventanas), rng.randint(1, 3))):
+            ausencias.append(ventana)
+        no_disponible[str(profesor)] = ausencias
+
+    return {
+        'duracion': DURACION_DEFENSA,
+        'pausa': PAUSA,
+        'ventanas': ventanas,
+        'aulas': [f"Aula {a + 1:03d}" for a in range(n_aulas)],
+        'tfgs': tfgs,
+        'tribunales': tribunales,
+        'no_disponible': no_disponible,
+    }
+
+def fetch_disponibilidad(tribunales, desde, hasta, transport=None, concurrency=16):
+    """
+    Sustituye 'ocupado' de cada tribunal por sus defensas actuales en la API.
+    La consulta filtra por la hora de inicio, así que empieza DURACION_MAXIMA
+    minutos antes para incluir las defensas que empiezan antes de la primera
+    ventana y terminan dentro.
+    """
+    session = create_session(transport)
+    session.verify = False
+    response = TokenCache(BASE_URL).login(session, *ADMIN_CREDENTIALS)
+    if response.status_code != 200:
+        raise RuntimeError(f"login de admin fallido: {response.status_code}")
+    headers = {'Authorization': f"Bearer {response.json()['token']}"}
+
+    def fetch(tribunal):
+        response = session.get(
+            f"{BASE_URL}/api/tribunales/{tribunal['id']}/disponibilidad",
+            params={'fecha_inicio': (desde - timedelta(minutes=DURACION_MAXIMA)).isoformat(), 'fecha_fin': hasta.isoformat()},
+            headers=headers
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"disponibilidad del tribunal {tribunal['id']}: {response.status_code}")
+        tribunal['ocupado'] = response.json()['defensas_programadas']
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(fetch, tribunales))
+
+def instance_from_manifest(manifest_path, desde, dias, n_aulas, disponibilidad=False, transport=None):
+    """Instancia con los TFGs aprobados sin defensa y los tribunales del dataset sintético"""
+    tfgs, tribunales = load_seed_resources(manifest_path, with_tutor=True)
+    ventanas = ventanas_laborables(desde, dias)
+    if disponibilidad:
+        fetch_disponibilidad(tribunales, parse_fecha(ventanas[0]['inicio']), parse_fecha(ventanas[-1]['fin']), transport)
+
+    return {
+        'duracion': DURACION_DEFENSA,
+        'pausa': PAUSA,
+        'ventanas': ventanas,
+        'aulas': [f"Aula Auto {a + 1:03d}" for a in range(n_aulas)],
+        'tfgs': tfgs,
+        'tribunales': tribunales,
+    }
+
+def print_summary(resumen):
+    tiempos = resumen['tiempo_s']
+    print(f"✅ Asignadas: {resumen['asignadas']}/{resumen['tfgs']} en {resumen['dias_usados']} días "
+          f"({resumen['franjas']} franjas disponibles)")
+    if resumen['sin_asignar']:
+        print(f"⚠️ Sin franja: {resumen['sin_asignar']} TFGs (más ventanas, aulas o tribunales)")
+    print(f"📉 Coste profesores (días + huecos): {resumen['coste_inicial']} → {resumen['coste_final']} "
+          f"({resumen['movimientos']} movimientos)")
+    print(f"⏱️ Voraz {tiempos['voraz']:.2f}s | Reparación {tiempos['reparacion']:.2f}s | "
+          f"Búsqueda local {tiempos['busqueda_local']:.2f}s | Total {tiempos['total']:.2f}s")
+
+def run_benchmark(sizes, seed, tiempo):
+    """Resuelve instancias sintéticas de varios tamaños y verifica cada calendario"""
+    print("=" * 80)
+    print("🧮 BENCHMARK DEL GENERADOR DE CALENDARIOS (instancias sintéticas)")
+    print("=" * 80)
+    print(f"{'TFGs':>6}{'Tribunales':>12}{'Aulas':>7}{'Asignadas':>11}{'Días':>6}{'Voraz s':>9}"
+          f"{'Total s':>9}{'Coste':>15}{'Conflictos':>12}")
+    print("-" * 80)
+
+    resultados = []
+    for n in sizes:
+        datos = synthetic_instance(n, seed)
+        instancia = load_instance(datos)
+        solver = ScheduleSolver(instancia, seed)
+        resumen = solver.solve(tiempo)
+        conflictos = verify_schedule(instancia, solver.defensas())
+        resumen.update({'tribunales': len(instancia['tribunales']), 'aulas': len(instancia['aulas']),
+                        'conflictos': len(conflictos)})
+        resultados.append(resumen)
+
+        print(f"{n:>6}{resumen['tribunales']:>12}{resumen['aulas']:>7}{resumen['asignadas']:>11}"
+              f"{resumen['dias_usados']:>6}{resumen['tiempo_s']['voraz']:>9.2f}{resumen['tiempo_s']['total']:>9.2f}"
+              f"{resumen['coste_inicial']:>7} → {resumen['coste_final']:<5}{len(conflictos):>12}")
+        for conflicto in conflictos[:5]:
+            print(f"   • {conflicto}")
+
+    print("=" * 80)
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'config': {'sizes': sizes, 'seed': seed, 'tiempo_busqueda': tiempo},
+        'resultados': resultados,
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Genera un calendario de defensas sin conflictos para POST /api/defensas/batch")
+    origen = parser.add_mutually_exclusive_group(required=True)
+    origen.add_argument('--instance', help="Instancia en JSON (ver load_instance)")
+    origen.add_argument('--manifest', nargs='?', const=DEFAULT_MANIFEST,
+                        help=f"TFGs libres y tribunales del dataset de seed_dataset.py (por defecto: {DEFAULT_MANIFEST})")
+    origen.add_argument('--benchmark', action='store_true', help="Resolver instancias sintéticas y medir tiempos")
+    parser.add_argument('-o', '--output', help="Fichero del calendario (por defecto se escribe en la salida estándar)")
+    parser.add_argument('--desde', help="Primer día con --manifest (YYYY-MM-DD; por defecto el lunes de dentro de una semana)")
+    parser.add_argument('--dias', type=int, default=20, help="Días laborables con --manifest (por defecto: 20)")
+    parser.add_argument('--aulas', type=int, default=20, help="Aulas disponibles con --manifest (por defecto: 20)")
+    parser.add_argument('--disponibilidad', action='store_true',
+                        help="Con --manifest, leer las defensas ya programadas de GET /api/tribunales/{id}/disponibilidad")
+    parser.add_argument('--sizes', default=','.join(map(str, BENCHMARK_SIZES)), help="TFGs de cada instancia del benchmark")
+    parser.add_argument('--tiempo', type=float, default=TIEMPO_BUSQUEDA, help=f"Segundos de reparación y búsqueda local (por defecto: {TIEMPO_BUSQUEDA})")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla (por defecto: 42)")
+    parser.add_argument('--transport', default=None, help="Transporte HTTP (requests, async, http2)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.benchmark:
+        report = run_benchmark([int(size) for size in args.sizes.split(',')], args.seed, args.tiempo)
+        report_file = f"/tmp/tfg_schedule_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"📄 Reporte guardado en: {report_file}")
+        sys.exit(0 if all(r['conflictos'] == 0 for r in report['resultados']) else 1)
+
+    try:
+        if args.instance:
+            with open(args.instance) as f:
+                datos = json.load(f)
+        else:
+            desde = datetime.strptime(args.desde, '%Y-%m-%d') if args.desde else term_start()
+            datos = instance_from_manifest(args.manifest, desde, args.dias, args.aulas, args.disponibilidad, args.transport)
+    except (OSError, ValueError, KeyError, RuntimeError) as e:
+        print(f"❌ No se pudo cargar la instancia: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    instancia = load_instance(datos)
+    solver = ScheduleSolver(instancia, args.seed)
+    resumen = solver.solve(args.tiempo)
+    defensas = solver.defensas()
+
+    conflictos = verify_schedule(instancia, defensas)
+    calendario = {
+        'defensas': defensas,
+        'sin_asignar': [solver.tfgs[i]['id'] for i in solver.sin_asignar],
+        'resumen': resumen,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(calendario, f, indent=1, ensure_ascii=False)
+        print_summary(resumen)
+        print(f"📄 Calendario guardado en: {args.output} ({len(defensas)} defensas)")
+    else:
+        json.dump(calendario, sys.stdout, indent=1, ensure_ascii=False)
+        print()
+
+    if conflictos:
+        print(f"❌ El calendario tiene {len(conflictos)} conflictos:", file=sys.stderr)
+        for conflicto in conflictos[:20]:
+            print(f"   • {conflicto}", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,783 @@
+#!/usr/bin/env python3
+"""
+Generador de datasets sintéticos para pruebas de escala
+Base URL: https://tfg-backend.ddev.site
+
+Genera un plan reproducible (misma semilla = mismos datos) de usuarios, TFGs en
+todos los estados, tribunales, defensas repartidas en un cuatrimestre y
+notificaciones, y lo carga a través de la API en lotes con concurrencia
+limitada. Los IDs creados se guardan en un manifiesto JSON tras cada lote, lo
+que permite reanudar una carga interrumpida (--resume) y limpiarla (--cleanup).
+
+Con --mode db el mismo plan se escribe directamente en MySQL con INSERTs
+multi-fila, sin validaciones ni notificaciones de Symfony: es el modo para
+cargar millones de filas; el modo api sigue sirviendo para comprobar que los
+datos pasan por las reglas de negocio.
+
+Uso:
+    python3 seed_dataset.py --scale small --seed 42
+    python3 seed_dataset.py --scale large --concurrency 32 --batch-size 500
+    python3 seed_dataset.py --scale large --mode db --database-url mysql://db:db@127.0.0.1:32768/db
+    python3 seed_dataset.py --cleanup /tmp/tfg_seed_manifest_s42.json
+"""
+import sys
+import os
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timedelta
+from urllib.parse import urlparse, unquote
+from concurrent.futures import ThreadPoolExecutor
+
+import urllib3
+
+try:
+    import pymysql
+except ImportError:  # Solo hace falta para --mode db
+    pymysql = None
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from http_client import create_session
+from token_cache import TokenCache
+from pagination_benchmark import DEEP_PAGES, PER_PAGE
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+BASE_URL = "https://tfg-backend.ddev.site"
+ADMIN_CREDENTIALS = ('admin@uni.es', '123456')
+# Contraseña de todos los usuarios generados (necesaria para crear TFGs y tribunales en su nombre)
+SEED_PASSWORD = '123456'
+# Base de datos de DDEV; el puerto publicado en el host se ve con 'ddev describe'
+DEFAULT_DATABASE_URL = os.environ.get('DATABASE_URL', 'mysql://db:db@127.0.0.1:3306/db')
+# Usuario existente con contraseña SEED_PASSWORD del que se copia el hash en --mode db
+PASSWORD_HASH_SOURCE = 'estudiante@uni.es'
+
+# Volumen de cada entidad por escala; cualquier valor se puede sobrescribir por argumento
+SCALES = {
+    'small': {'estudiantes': 200, 'profesores': 20, 'tfgs': 150, 'tribunales': 20, 'defensas': 80, 'notificaciones': 5_000},
+    'medium': {'estudiantes': 5_000, 'profesores': 300, 'tfgs': 3_000, 'tribunales': 500, 'defensas': 2_000, 'notificaciones': 200_000},
+    'large': {'estudiantes': 50_000, 'profesores': 2_000, 'tfgs': 30_000, 'tribunales': 5_000, 'defensas': 20_000, 'notificaciones': 2_000_000},
+}
+
+# Reparto de los TFGs por estado. Las defensas solo se programan sobre TFGs aprobados.
+ESTADOS_TFG = {'borrador': 0.15, 'revision': 0.10, 'aprobado': 0.70, 'defendido': 0.05}
+# Transiciones (PUT /api/tfgs/{id}/estado) para llegar a cada estado desde borrador
+TRANSICIONES = {
+    'borrador': [],
+    'revision': ['revision'],
+    'aprobado': ['revision', 'aprobado'],
+    'defendido': ['revision', 'aprobado', 'defendido'],
+}
+
+# Franjas de defensa: lunes a viernes, una defensa por hora y tribunal
+HORAS_DEFENSA = [9, 10, 11, 12, 13, 16, 17, 18]
+DURACION_DEFENSA = 45
+
+NOMBRES = ['Lucía', 'Hugo', 'Martina', 'Mateo', 'Sofía', 'Leo', 'María', 'Daniel', 'Julia', 'Pablo',
+           'Paula', 'Álvaro', 'Valeria', 'Manuel', 'Emma', 'Adrián', 'Carmen', 'Javier', 'Elena', 'Diego']
+APELLIDOS = ['García', 'Rodríguez', 'González', 'Fernández', 'López', 'Martínez', 'Sánchez', 'Pérez',
+             'Gómez', 'Martín', 'Jiménez', 'Ruiz', 'Hernández', 'Díaz', 'Moreno', 'Muñoz', 'Álvarez', 'Romero']
+AREAS = ['Ingeniería del Software', 'Inteligencia Artificial', 'Redes y Sistemas', 'Bases de Datos',
+         'Seguridad Informática', 'Computación Gráfica', 'Sistemas Distribuidos', 'Interacción Persona-Ordenador']
+TIPOS_TFG = ['Desarrollo', 'Investigación', 'Estudio comparativo', 'Prototipo']
+TEMAS = ['plataforma web', 'aplicación móvil', 'sistema de recomendación', 'analizador de datos',
+         'herramienta de monitorización', 'motor de búsqueda', 'asistente conversacional', 'gestor documental']
+DOMINIOS = ['la gestión universitaria', 'el sector sanitario', 'el comercio electrónico', 'la educación secundaria',
+            'la movilidad urbana', 'la industria 4.0', 'el turismo rural', 'la administración pública']
+PALABRAS_CLAVE = ['python', 'symfony', 'react', 'docker', 'machine learning', 'api rest', 'mysql',
+                  'microservicios', 'testing', 'accesibilidad', 'cloud', 'seguridad']
+DEPARTAMENTOS = ['Lenguajes y Sistemas Informáticos', 'Ciencias de la Computación', 'Ingeniería Telemática']
+
+def term_start(today=None):
+    """Primer lunes a partir de dentro de una semana (las defensas deben ser futuras)"""
+    day = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=7)
+    return day + timedelta(days=(7 - day.weekday()) % 7)
+
+def term_slots(start, count):
+    """Genera 'count' franjas horarias consecutivas de lunes a viernes"""
+    slots = []
+    day = start
+    while len(slots) < count:
+        if day.weekday() < 5:
+            slots.extend(day.replace(hour=hour) for hour in HORAS_DEFENSA)
+        day += timedelta(days=1)
+    return slots[:count]
+
+def build_plan(volumes, seed, tag, term_weeks=16, today=None):
+    """
+    Genera todos los registros del dataset de forma determinista. Las relaciones
+    se expresan por índice dentro del plan (p.ej. el tutor de un TFG es
+    profesores[3]); cada cargador las traduce a los IDs reales.
+    """
+    rng = random.Random(seed)
+    plan = {'seed': seed, 'tag': tag, 'volumes': dict(volumes), 'term_weeks': term_weeks}
+
+    def persona(rol, index):
+        nombre = rng.choice(NOMBRES)
+        apellidos = f"{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}"
+        return {
+            'email': f"{tag}.{rol}{index}@seed.uni.es",
+            'nombre': nombre,
+            'apellidos': apellidos,
+            'roles': ['ROLE_PROFESOR'] if rol == 'prof' else ['ROLE_ESTUDIANTE'],
+            'universidad': 'Universidad de Pruebas',
+            'departamento': rng.choice(DEPARTAMENTOS) if rol == 'prof' else None,
+        }
+
+    plan['profesores'] = [persona('prof', i) for i in range(volumes['profesores'])]
+    plan['estudiantes'] = [persona('est', i) for i in range(volumes['estudiantes'])]
+
+    # Un estudiante solo puede tener un TFG activo: como mucho un TFG por estudiante
+    n_tfgs = min(volumes['tfgs'], len(plan['estudiantes']))
+    estados = list(ESTADOS_TFG)
+    pesos = [ESTADOS_TFG[e] for e in estados]
+    plan['tfgs'] = []
+    for i in range(n_tfgs):
+        tema, dominio = rng.choice(TEMAS), rng.choice(DOMINIOS)
+        plan['tfgs'].append({
+            'estudiante': i,
+            'tutor': rng.randrange(len(plan['profesores'])),
+            'estado': rng.choices(estados, pesos)[0],
+            'titulo': f"Desarrollo de un {tema} para {dominio} [{tag}-{i}]",
+            'resumen': f"Trabajo fin de grado que diseña e implementa un {tema} orientado a {dominio}.",
+            'palabras_clave': rng.sample(PALABRAS_CLAVE, rng.randint(2, 5)),
+            'area_conocimiento': rng.choice(AREAS),
+            'tipo_tfg': rng.choice(TIPOS_TFG),
+        })
+
+    # Tribunales de tres profesores distintos; el presidente es quien lo crea
+    plan['tribunales'] = []
+    if len(plan['profesores']) >= 3:
+        for i in range(volumes['tribunales']):
+            presidente, secretario, vocal = rng.sample(range(len(plan['profesores'])), 3)
+            plan['tribunales'].append({
+                'nombre': f"Tribunal {i + 1} [{tag}]",
+                'descripcion': f"Tribunal sintético {i + 1} del dataset {tag}",
+                'presidente': presidente,
+                'secretario': secretario,
+                'vocal': vocal,
+            })
+
+    # Defensas sobre TFGs aprobados. En cada franja hay 'paralelas' defensas, cada una
+    # con un tribunal y un aula distintos, así que nunca hay conflictos de horario.
+    aprobados = [i for i, tfg in enumerate(plan['tfgs']) if tfg['estado'] == 'aprobado']
+    rng.shuffle(aprobados)
+    n_defensas = min(volumes['defensas'], len(aprobados)) if plan['tribunales'] else 0
+    plan['defensas'] = []
+    if n_defensas:
+        franjas_cuatrimestre = term_weeks * 5 * len(HORAS_DEFENSA)
+        paralelas = min(len(plan['tribunales']), math.ceil(n_defensas / franjas_cuatrimestre))
+        slots = term_slots(term_start(today), math.ceil(n_defensas / paralelas))
+        for k in range(n_defensas):
+            slot, lane = divmod(k, paralelas)
+            plan['defensas'].append({
+                'tfg': aprobados[k],
+                'tribunal': (slot * paralelas + lane) % len(plan['tribunales']),
+                'fecha_defensa': slots[slot].isoformat(),
+                'aula': f"Aula {lane + 1:03d} [{tag}]",
+                'duracion_estimada': DURACION_DEFENSA,
+            })
+
+    plan['notificaciones'] = {
+        'total': volumes['notificaciones'],
+        # Parte del total va a la cuenta de admin: /api/notificaciones solo lista las
+        # del usuario y el benchmark de paginación por cursor lo recorre como admin
+        'admin': min(DEEP_PAGES * PER_PAGE, volumes['notificaciones'] // 2),
+        'titulo': f"Aviso sintético [{tag}]",
+        'tipos': ['info', 'warning', 'success', 'error'],
+    }
+    return plan
+
+class Seeder:
+    """Base de los cargadores: manifiesto de IDs creados y reanudación"""
+    mode = None
+
+    def __init__(self, plan, manifest_path, batch_size=200, resume=False):
+        self.plan = plan
+        self.manifest_path = manifest_path
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.manifest = self.load_manifest() if resume else None
+        if self.manifest:
+            # Lo que falló la vez anterior se reintenta en esta ejecución
+            self.manifest['errors'] = []
+        else:
+            self.manifest = {
+                'seed': plan['seed'],
+                'tag': plan['tag'],
+                'volumes': plan['volumes'],
+                # Necesario para regenerar las fechas de las defensas del plan (defensas_batch.py)
+                'term_weeks': plan['term_weeks'],
+                'base_url': BASE_URL,
+                'mode': self.mode,
+                'created_at': datetime.now().isoformat(),
+                # IDs creados por índice del plan (como cadena, por ser claves JSON)
+                'ids': {'profesores': {}, 'estudiantes': {}, 'tfgs': {}, 'tribunales': {}, 'defensas': {}},
+                'notificaciones': {'creadas': 0, 'broadcasts': 0},
+                'errors': []
+            }
+
+    def load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if manifest.get('seed') != self.plan['seed'] or manifest.get('tag') != self.plan['tag']:
+            print(f"⚠️ El manifiesto {self.manifest_path} es de otra semilla; se empieza de cero")
+            return None
+        if manifest.get('mode') != self.mode:
+            print(f"⚠️ El manifiesto {self.manifest_path} es del modo {manifest.get('mode')}; se empieza de cero")
+            return None
+        return manifest
+
+    def save_manifest(self):
+        with self.lock:
+            tmp_path = f"{self.manifest_path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f, indent=1, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+
+    def print_header(self, details):
+        print("=" * 80)
+        print(f"🌱 DATASET SINTÉTICO [{self.plan['tag']}] - semilla {self.plan['seed']} (modo {self.mode})")
+        print("=" * 80)
+        for name, value in self.plan['volumes'].items():
+            print(f"   {name:<15}: {value}")
+        print(f"⚙️ {details} | Lote: {self.batch_size} | Manifiesto: {self.manifest_path}")
+        print("=" * 80)
+
+    def finish(self):
+        self.manifest['finished_at'] = datetime.now().isoformat()
+        self.save_manifest()
+        print("=" * 80)
+        print(f"📄 Manifiesto guardado en: {self.manifest_path}")
+        print(f"{'✅' if not self.manifest['errors'] else '⚠️'} Errores: {len(self.manifest['errors'])}")
+        return not self.manifest['errors']
+
+class ApiSeeder(Seeder):
+    """Carga un plan a través de la API REST con un pool de hilos y lotes"""
+    mode = 'api'
+
+    def __init__(self, plan, manifest_path, concurrency=8, batch_size=200, transport=None, resume=False):
+        super().__init__(plan, manifest_path, batch_size, resume)
+        self.concurrency = concurrency
+        self.transport = transport
+        self.local = threading.local()
+        self.admin_headers = {}
+        # Los manifiestos anteriores no guardaban las notificaciones del admin
+        self.manifest['ids'].setdefault('notificaciones_admin', {})
+
+    def session(self):
+        """Sesión HTTP propia de cada hilo del pool"""
+        if not hasattr(self.local, 'session'):
+            self.local.session = create_session(self.transport)
+            self.local.session.verify = False
+        return self.local.session
+
+    def login(self, email, password=SEED_PASSWORD):
+        response = self.session().post(f"{BASE_URL}/api/auth/login", json={'username': email, 'password': password})
+        if response.status_code != 200:
+            raise RuntimeError(f"login {email}: {response.status_code}")
+        return {'Authorization': f"Bearer {response.json()['token']}"}
+
+    def post(self, path, payload, headers):
+        response = self.session().post(f"{BASE_URL}{path}", json=payload, headers=headers)
+        if response.status_code not in [200, 201]:
+            raise RuntimeError(f"POST {path}: {response.status_code} - {response.text[:200]}")
+        return response.json()
+
+    def run_stage(self, executor, name, items, task):
+        """Ejecuta 'task(index, item)' por lotes, saltando lo que ya está en el manifiesto"""
+        ids = self.manifest['ids'][name]
+        pending = [(i, item) for i, item in enumerate(items) if str(i) not in ids]
+        if not pending:
+            print(f"✓ {name}: {len(items)} ya creados")
+            return
+
+        start = time.monotonic()
+        done = len(items) - len(pending)
+        errors = 0
+        for offset in range(0, len(pending), self.batch_size):
+            batch = pending[offset:offset + self.batch_size]
+            futures = [(i, executor.submit(task, i, item)) for i, item in batch]
+            for i, future in futures:
+                try:
+                    created_id = future.result()
+                    with self.lock:
+                        ids[str(i)] = created_id
+                    done += 1
+                except Exception as e:
+                    errors += 1
+                    with self.lock:
+                        self.manifest['errors'].append({'stage': name, 'index': i, 'error': str(e)})
+
+            self.save_manifest()
+            rate = (done - (len(items) - len(pending))) / max(time.monotonic() - start, 1e-6)
+            print(f"   {name}: {done}/{len(items)} ({rate:.1f}/s, errores: {errors})")
+
+        print(f"✓ {name}: {done}/{len(items)} en {time.monotonic() - start:.1f}s")
+
+    def create_user(self, index, persona):
+        payload = {key: value for key, value in persona.items() if value is not None}
+        payload['password'] = SEED_PASSWORD
+        return self.post('/api/users', payload, self.admin_headers)['id']
+
+    def create_tfg(self, index, tfg):
+        estudiante_id = self.manifest['ids']['estudiantes'].get(str(tfg['estudiante']))
+        tutor_id = self.manifest['ids']['profesores'].get(str(tfg['tutor']))
+        if not estudiante_id or not tutor_id:
+            raise RuntimeError("estudiante o tutor no creados")
+
+        # Solo el propio estudiante puede crear su TFG
+        headers = self.login(self.plan['estudiantes'][tfg['estudiante']]['email'])
+        payload = {key: tfg[key] for key in ('titulo', 'resumen', 'palabras_clave', 'area_conocimiento', 'tipo_tfg')}
+        payload['tutor_id'] = tutor_id
+        tfg_id = self.post('/api/tfgs', payload, headers)['id']
+
+        for estado in TRANSICIONES[tfg['estado']]:
+            response = self.session().put(
+                f"{BASE_URL}/api/tfgs/{tfg_id}/estado",
+                json={'estado': estado},
+                headers=self.admin_headers
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"TFG {tfg_id} a '{estado}': {response.status_code} (id {tfg_id} creado)")
+        return tfg_id
+
+    def create_tribunal(self, index, tribunal):
+        profesores = self.manifest['ids']['profesores']
+        miembros = [profesores.get(str(tribunal[rol])) for rol in ('presidente', 'secretario', 'vocal')]
+        if not all(miembros):
+            raise RuntimeError("miembros del tribunal no creados")
+
+        # El presidente del tribunal es el usuario que lo crea
+        headers = self.login(self.plan['profesores'][tribunal['presidente']]['email'])
+        payload = {
+            'nombre': tribunal['nombre'],
+            'descripcion': tribunal['descripcion'],
+            'secretario': miembros[1],
+            'vocal': miembros[2],
+        }
+        return self.post('/api/tribunales', payload, headers)['id']
+
+    def create_defensa(self, index, defensa):
+        tfg_id = self.manifest['ids']['tfgs'].get(str(defensa['tfg']))
+        tribunal_id = self.manifest['ids']['tribunales'].get(str(defensa['tribunal']))
+        if not tfg_id or not tribunal_id:
+            raise RuntimeError("TFG o tribunal no creados")
+
+        payload = {
+            'tfg_id': tfg_id,
+            'tribunal_id': tribunal_id,
+            'fecha_defensa': defensa['fecha_defensa'],
+            'aula': defensa['aula'],
+            'duracion_estimada': defensa['duracion_estimada'],
+        }
+        return self.post('/api/defensas', payload, self.admin_headers)['id']
+
+    def create_admin_notification(self, index, _):
+        """Notificación propia del admin (POST /api/notificaciones/test la crea para quien llama)"""
+        spec = self.plan['notificaciones']
+        data = self.post('/api/notificaciones/test', {
+            'titulo': spec['titulo'],
+            'mensaje': f"Notificación {index + 1} del admin en el dataset {self.plan['tag']}",
+            'tipo': spec['tipos'][index % len(spec['tipos'])],
+        }, self.admin_headers)
+        return data['notificacion']['id']
+
+    def create_notifications(self):
+        """
+        La API no tiene alta de notificaciones por usuario: se usan difusiones de
+        admin, que crean una notificación para cada usuario activo. Las del
+        admin ('admin' del plan) se crean aparte, en run().
+        """
+        spec = self.plan['notificaciones']
+        state = self.manifest['notificaciones']
+        rng = random.Random(self.plan['seed'])
+        start = time.monotonic()
+
+        while state['creadas'] < spec['total'] - spec['admin']:
+            data = self.post('/api/notificaciones/admin/broadcast', {
+                'titulo': spec['titulo'],
+                'mensaje': f"Difusión {state['broadcasts'] + 1} del dataset {self.plan['tag']}",
+                'tipo': rng.choice(spec['tipos']),
+            }, self.admin_headers)
+            state['broadcasts'] += 1
+            state['creadas'] += data.get('notificaciones_creadas', 0)
+            self.save_manifest()
+            print(f"   notificaciones: {state['creadas']}/{spec['total'] - spec['admin']}")
+            if not data.get('notificaciones_creadas'):
+                break
+
+        print(f"✓ notificaciones: {state['creadas']} en {state['broadcasts']} difusiones ({time.monotonic() - start:.1f}s)")
+
+    def run(self):
+        self.print_header(f"Concurrencia: {self.concurrency}")
+
+        admin_token = TokenCache(BASE_URL).login(self.session(), *ADMIN_CREDENTIALS)
+        if admin_token.status_code != 200:
+            print(f"❌ Error login admin: {admin_token.status_code}")
+            return False
+        self.admin_headers = {'Authorization': f"Bearer {admin_token.json()['token']}"}
+
+        # Cada etapa depende de los IDs de las anteriores
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            self.run_stage(executor, 'profesores', self.plan['profesores'], self.create_user)
+            self.run_stage(executor, 'estudiantes', self.plan['estudiantes'], self.create_user)
+            self.run_stage(executor, 'tfgs', self.plan['tfgs'], self.create_tfg)
+            self.run_stage(executor, 'tribunales', self.plan['tribunales'], self.create_tribunal)
+            self.run_stage(executor, 'defensas', self.plan['defensas'], self.create_defensa)
+            self.run_stage(executor, 'notificaciones_admin', list(range(self.plan['notificaciones']['admin'])),
+                           self.create_admin_notification)
+        self.create_notifications()
+        return self.finish()
+
+def connect_database(database_url):
+    """Conexión a MySQL/MariaDB a partir de una URL estilo DATABASE_URL de Symfony"""
+    if pymysql is None:
+        raise RuntimeError("--mode db requiere pymysql: pip install pymysql")
+
+    url = urlparse(database_url)
+    if not url.scheme.startswith(('mysql', 'mariadb')):
+        raise RuntimeError(f"--mode db solo admite MySQL/MariaDB (recibido: {url.scheme}://...)")
+
+    return pymysql.connect(
+        host=url.hostname or '127.0.0.1',
+        port=url.port or 3306,
+        user=unquote(url.username or ''),
+        password=unquote(url.password or ''),
+        database=url.path.lstrip('/'),
+        charset='utf8mb4',
+        autocommit=False
+    )
+
+class DbSeeder(Seeder):
+    """
+    Escribe el plan directamente en las tablas de las entidades Doctrine
+    (nombres de columna de la underscore_number_aware naming strategy).
+    executemany de pymysql agrupa cada lote en un único INSERT multi-fila y
+    los IDs se recuperan después por una columna única del plan.
+    """
+    mode = 'db'
+
+    def __init__(self, plan, manifest_path, database_url, batch_size=5000, resume=False):
+        super().__init__(plan, manifest_path, batch_size, resume)
+        self.database_url = database_url
+        self.connection = None
+        self.admin_id = None
+        self.now = datetime.now().replace(microsecond=0)
+
+    def insert_stage(self, name, table, columns, items, row, key_column, key):
+        """Inserta 'items' por lotes con row(item) y guarda el ID de cada uno por key(item)"""
+        ids = self.manifest['ids'][name]
+        pending = [(i, item) for i, item in enumerate(items) if str(i) not in ids]
+        if not pending:
+            print(f"✓ {name}: {len(items)} ya creados")
+            return
+
+        insert_sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+        start = time.monotonic()
+        done = len(items) - len(pending)
+        errors = 0
+
+        for offset in range(0, len(pending), self.batch_size):
+            batch, rows = [], []
+            for i, item in pending[offset:offset + self.batch_size]:
+                try:
+                    rows.append(row(item))
+                    batch.append((i, item))
+                except RuntimeError as e:
+                    errors += 1
+                    self.manifest['errors'].append({'stage': name, 'index': i, 'error': str(e)})
+            if not batch:
+                continue
+
+            keys = [key(item) for _, item in batch]
+            try:
+                with self.connection.cursor() as cursor:
+                    cursor.executemany(insert_sql, rows)
+                    cursor.execute(
+                        f"SELECT {key_column}, id FROM {table} WHERE {key_column} IN ({', '.join(['%s'] * len(keys))})",
+                        keys
+                    )
+                    found = {str(k): entity_id for k, entity_id in cursor.fetchall()}
+                self.connection.commit()
+            except pymysql.MySQLError as e:
+                self.connection.rollback()
+                errors += len(batch)
+                self.manifest['errors'].append({'stage': name, 'index': batch[0][0], 'count': len(batch), 'error': str(e)})
+                continue
+
+            for i, item in batch:
+                ids[str(i)] = found[str(key(item))]
+            done += len(batch)
+            self.save_manifest()
+            rate = (done - (len(items) - len(pending))) / max(time.monotonic() - start, 1e-6)
+            print(f"   {name}: {done}/{len(items)} ({rate:.0f}/s, errores: {errors})")
+
+        print(f"✓ {name}: {done}/{len(items)} en {time.monotonic() - start:.1f}s")
+
+    def require_id(self, name, index):
+        entity_id = self.manifest['ids'][name].get(str(index))
+        if not entity_id:
+            raise RuntimeError(f"{name}[{index}] no creado")
+        return entity_id
+
+    def user_row(self, persona):
+        return (
+            persona['email'], json.dumps(persona['roles']), self.password_hash,
+            persona['nombre'], persona['apellidos'], persona['universidad'], persona['departamento'],
+            True, self.now, self.now
+        )
+
+    def tfg_row(self, tfg):
+        # Igual que PUT /api/tfgs/{id}/estado: al aprobar se fija la fecha de fin real
+        fecha_fin_real = self.now.date() if tfg['estado'] in ('aprobado', 'defendido') else None
+        return (
+            self.require_id('estudiantes', tfg['estudiante']), self.require_id('profesores', tfg['tutor']),
+            tfg['titulo'], tfg['resumen'], json.dumps(tfg['palabras_clave'], ensure_ascii=False),
+            tfg['area_conocimiento'], tfg['tipo_tfg'], 'español', tfg['estado'], fecha_fin_real,
+            self.now, self.now
+        )
+
+    def tribunal_row(self, tribunal):
+        return (
+            tribunal['nombre'], self.require_id('profesores', tribunal['presidente']),
+            self.require_id('profesores', tribunal['secretario']), self.require_id('profesores', tribunal['vocal']),
+            tribunal['descripcion'], True, self.now, self.now
+        )
+
+    def defensa_row(self, defensa):
+        return (
+            self.require_id('tfgs', defensa['tfg']), self.require_id('tribunales', defensa['tribunal']),
+            datetime.fromisoformat(defensa['fecha_defensa']), defensa['aula'], defensa['duracion_estimada'],
+            'programada', False, self.now, self.now
+        )
+
+    def notification_user(self, index, user_id):
+        if self.admin_id and index < self.plan['notificaciones']['admin']:
+            return self.admin_id
+        return user_id
+
+    def insert_notifications(self):
+        """
+        Notificaciones repartidas entre los usuarios generados, salvo las
+        'admin' primeras, que van a la cuenta de admin. Cada lote usa su propia
+        semilla derivada, así que una carga reanudada genera las mismas filas.
+        """
+        spec = self.plan['notificaciones']
+        state = self.manifest['notificaciones']
+        user_ids = list(self.manifest['ids']['estudiantes'].values()) + list(self.manifest['ids']['profesores'].values())
+        if not user_ids or state['creadas'] >= spec['total']:
+            print(f"✓ notificaciones: {state['creadas']}")
+            return
+
+        insert_sql = (
+            "INSERT INTO notificaciones (usuario_id, tipo, titulo, mensaje, leida, enviada_por_email, metadata, created_at) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)"
+        )
+        metadata = json.dumps({'tipo_evento': 'seed', 'dataset': self.plan['tag']})
+        start = time.monotonic()
+        initial = state['creadas']
+
+        while state['creadas'] < spec['total']:
+            size = min(self.batch_size, spec['total'] - state['creadas'])
+            rng = random.Random(f"{self.plan['seed']}-notificaciones-{state['creadas']}")
+            rows = [
+                (
+                    self.notification_user(state['creadas'] + n, rng.choice(user_ids)),
+                    rng.choice(spec['tipos']), spec['titulo'],
+                    f"Notificación {state['creadas'] + n + 1} del dataset {self.plan['tag']}",
+                    rng.random() < 0.4, False, metadata,
+                    # Repartidas en los últimos seis meses para que la paginación por fecha sea realista
+                    self.now - timedelta(seconds=rng.randrange(180 * 24 * 3600))
+                )
+                for n in range(size)
+            ]
+            with self.connection.cursor() as cursor:
+                cursor.executemany(insert_sql, rows)
+            self.connection.commit()
+            state['creadas'] += size
+            self.save_manifest()
+            rate = (state['creadas'] - initial) / max(time.monotonic() - start, 1e-6)
+            print(f"   notificaciones: {state['creadas']}/{spec['total']} ({rate:.0f}/s)")
+
+        print(f"✓ notificaciones: {state['creadas']} en {time.monotonic() - start:.1f}s")
+
+    def run(self):
+        self.print_header(f"Base de datos: {urlparse(self.database_url).hostname}")
+
+        try:
+            self.connection = connect_database(self.database_url)
+        except Exception as e:
+            print(f"❌ No se pudo conectar a la base de datos: {str(e)}")
+            return False
+
+        try:
+            # Todos los usuarios generados comparten el hash de una cuenta con la misma contraseña
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT password FROM users WHERE email = %s", (PASSWORD_HASH_SOURCE,))
+                found = cursor.fetchone()
+            if not found:
+                print(f"❌ No existe {PASSWORD_HASH_SOURCE} para copiar el hash de la contraseña")
+                return False
+            self.password_hash = found[0]
+
+            with self.connection.cursor() as cursor:
+                cursor.execute("SELECT id FROM users WHERE email = %s", (ADMIN_CREDENTIALS[0],))
+                found = cursor.fetchone()
+            self.admin_id = found[0] if found else None
+            if not self.admin_id:
+                print(f"⚠️ No existe {ADMIN_CREDENTIALS[0]}: sus notificaciones se reparten entre los usuarios generados")
+
+            self.insert_stage(
+                'profesores', 'users',
+                ['email', 'roles', 'password', 'nombre', 'apellidos', 'universidad', 'departamento', 'is_active', 'created_at', 'updated_at'],
+                self.plan['profesores'], self.user_row, 'email', lambda persona: persona['email']
+            )
+            self.insert_stage(
+                'estudiantes', 'users',
+                ['email', 'roles', 'password', 'nombre', 'apellidos', 'universidad', 'departamento', 'is_active', 'created_at', 'updated_at'],
+                self.plan['estudiantes'], self.user_row, 'email', lambda persona: persona['email']
+            )
+            self.insert_stage(
+                'tfgs', 'tfgs',
+                ['estudiante_id', 'tutor_id', 'titulo', 'resumen', 'palabras_clave', 'area_conocimiento',
+                 'tipo_tfg', 'idioma', 'estado', 'fecha_fin_real', 'created_at', 'updated_at'],
+                self.plan['tfgs'], self.tfg_row, 'titulo', lambda tfg: tfg['titulo']
+            )
+            self.insert_stage(
+                'tribunales', 'tribunales',
+                ['nombre', 'presidente_id', 'secretario_id', 'vocal_id', 'descripcion', 'activo', 'created_at', 'updated_at'],
+                self.plan['tribunales'], self.tribunal_row, 'nombre', lambda tribunal: tribunal['nombre']
+            )
+            self.insert_stage(
+                'defensas', 'defensas',
+                ['tfg_id', 'tribunal_id', 'fecha_defensa', 'aula', 'duracion_estimada', 'estado',
+                 'acta_generada', 'created_at', 'updated_at'],
+                self.plan['defensas'], self.defensa_row, 'tfg_id', lambda defensa: self.require_id('tfgs', defensa['tfg'])
+            )
+            self.insert_notifications()
+        finally:
+            self.connection.close()
+
+        # Las defensas insertadas por SQL no pasan por el listener que mantiene el índice del calendario
+        print("ℹ️ Ejecuta 'ddev exec bin/console app:calendario:reconstruir' para indexar las defensas en el calendario")
+        return self.finish()
+
+def cleanup_database(manifest, database_url, chunk_size=5000):
+    """Borra en SQL lo cargado con --mode db, en orden inverso de dependencias"""
+    connection = connect_database(database_url)
+    print(f"🧹 LIMPIEZA DEL DATASET [{manifest.get('tag')}] (modo db)")
+    try:
+        with connection.cursor() as cursor:
+            # Por tramos para no generar una transacción de millones de filas
+            deleted = 0
+            while True:
+                cursor.execute("DELETE FROM notificaciones WHERE titulo = %s LIMIT %s",
+                               (f"Aviso sintético [{manifest['tag']}]", chunk_size * 10))
+                connection.commit()
+                deleted += cursor.rowcount
+                if cursor.rowcount == 0:
+                    break
+            print(f"✓ notificaciones: {deleted} eliminadas")
+
+            for name, table in [('defensas', 'defensas'), ('tfgs', 'tfgs'), ('tribunales', 'tribunales'),
+                                ('estudiantes', 'users'), ('profesores', 'users')]:
+                ids = list(manifest['ids'].get(name, {}).values())
+                for offset in range(0, len(ids), chunk_size):
+                    chunk = ids[offset:offset + chunk_size]
+                    cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(chunk))})", chunk)
+                connection.commit()
+                print(f"✓ {name}: {len(ids)} eliminados")
+    finally:
+        connection.close()
+    return True
+
+def cleanup_dataset(manifest_path, concurrency=8, transport=None, database_url=DEFAULT_DATABASE_URL):
+    """Elimina lo creado según un manifiesto, en orden inverso de dependencias"""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    if manifest.get('mode') == 'db':
+        return cleanup_database(manifest, database_url)
+
+    session = create_session(transport)
+    session.verify = False
+    admin_token = TokenCache(BASE_URL).login(session, *ADMIN_CREDENTIALS)
+    if admin_token.status_code != 200:
+        print(f"❌ Error login admin: {admin_token.status_code}")
+        return False
+    headers = {'Authorization': f"Bearer {admin_token.json()['token']}"}
+    local = threading.local()
+
+    def delete(path):
+        if not hasattr(local, 'session'):
+            local.session = create_session(transport)
+            local.session.verify = False
+        response = local.session.delete(f"{BASE_URL}{path}", headers=headers)
+        return response.status_code in [200, 204, 404]
+
+    print(f"🧹 LIMPIEZA DEL DATASET [{manifest.get('tag')}]")
+    ok = True
+    # Los usuarios se desactivan (borrado lógico) una vez eliminados sus TFGs y defensas
+    stages = [('notificaciones_admin', '/api/notificaciones'), ('defensas', '/api/defensas'), ('tfgs', '/api/tfgs'),
+              ('tribunales', '/api/tribunales'), ('estudiantes', '/api/users'), ('profesores', '/api/users')]
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for name, path in stages:
+            ids = list(manifest['ids'].get(name, {}).values())
+            results = list(executor.map(lambda entity_id: delete(f"{path}/{entity_id}"), ids))
+            failed = results.count(False)
+            ok = ok and not failed
+            print(f"{'✓' if not failed else '✗'} {name}: {len(ids) - failed}/{len(ids)} eliminados")
+
+    if manifest.get('notificaciones', {}).get('creadas'):
+        print(f"ℹ️ Las {manifest['notificaciones']['creadas']} notificaciones de difusión no se pueden borrar por la API")
+    return ok
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Genera un dataset sintético reproducible (API o directo a MySQL)")
+    parser.add_argument('--scale', choices=SCALES, default='small', help="Volumen base del dataset (por defecto: small)")
+    parser.add_argument('--seed', type=int, default=42, help="Semilla del generador (por defecto: 42)")
+    for name in SCALES['small']:
+        parser.add_argument(f'--{name}', type=int, help=f"Número de {name} (sobrescribe la escala)")
+    parser.add_argument('--mode', choices=['api', 'db'], default='api',
+                        help="api: a través de los endpoints (por defecto); db: INSERTs multi-fila directos en MySQL")
+    parser.add_argument('--database-url', default=DEFAULT_DATABASE_URL,
+                        help="URL de MySQL para --mode db (por defecto: $DATABASE_URL o la base de datos de DDEV)")
+    parser.add_argument('--term-weeks', type=int, default=16, help="Semanas del cuatrimestre en que se reparten las defensas")
+    parser.add_argument('--concurrency', type=int, default=8, help="Peticiones simultáneas (por defecto: 8)")
+    parser.add_argument('--batch-size', type=int, help="Registros por lote entre guardados del manifiesto (por defecto: 200 en api, 5000 en db)")
+    parser.add_argument('--manifest', help="Ruta del manifiesto (por defecto: /tmp/tfg_seed_manifest_s<seed>.json)")
+    parser.add_argument('--resume', action='store_true', help="Continúa una carga anterior usando su manifiesto")
+    parser.add_argument('--transport', default=None, help="Transporte HTTP (requests, async, http2)")
+    parser.add_argument('--cleanup', metavar='MANIFEST', help="Elimina los datos registrados en un manifiesto")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+
+    if args.cleanup:
+        sys.exit(0 if cleanup_dataset(args.cleanup, args.concurrency, args.transport, args.database_url) else 1)
+
+    volumes = dict(SCALES[args.scale])
+    for name in volumes:
+        if getattr(args, name) is not None:
+            volumes[name] = getattr(args, name)
+
+    tag = f"s{args.seed}"
+    manifest_path = args.manifest or f"/tmp/tfg_seed_manifest_{tag}.json"
+    plan = build_plan(volumes, args.seed, tag, args.term_weeks)
+
+    if args.mode == 'db':
+        seeder = DbSeeder(plan, manifest_path, args.database_url, args.batch_size or 5000, args.resume)
+    else:
+        seeder = ApiSeeder(plan, manifest_path, args.concurrency, args.batch_size or 200, args.transport, args.resume)
+    sys.exit(0 if seeder.run() else 1)
+
+if __name__ == "__main__":
+    main()
@@ -9,18 +9,21 @@ import urllib3
 import sys
 from datetime import datetime, timedelta
 
+from token_cache import TokenCache
+
 urllib3.disable_warnings()
 
 def setup_test_data():
     session = requests.Session()
     session.verify = False
+    # Reutiliza los tokens de ejecuciones anteriores en lugar de hacer login cada vez
+    token_cache = TokenCache('https://tfg-backend.ddev.site')
     
     print("=== CREANDO DATOS DE PRUEBA ===")
     
     # 1. Create TFG as estudiante
     print("1. Creando TFG como estudiante...")
-    login_data = {'username': 'estudiante@uni.es', 'password': '123456'}
-    response = session.post('https://tfg-backend.ddev.site/api/auth/login', json=login_data)
+    response = token_cache.login(session, 'estudiante@uni.es', '123456')
     
     if response.status_code != 200:
         print(f"Error login estudiante: {response.status_code}")
@@ -52,8 +55,7 @@ def setup_test_data():
     
     # 2. Login as admin to approve TFG
     print("2. Aprobando TFG como admin...")
-    login_data = {'username': 'admin@uni.es', 'password': '123456'}
-    response = session.post('https://tfg-backend.ddev.site/api/auth/login', json=login_data)
+    response = token_cache.login(session, 'admin@uni.es', '123456')
     
     if response.status_code != 200:
         print(f"Error login admin: {response.status_code}")
@@ -91,8 +93,7 @@ def setup_test_data():
     
     # 3. Create tribunal as presidente
     print("3. Creando tribunal como presidente...")
-    login_data = {'username': 'presidente@uni.es', 'password': '123456'}
-    response = session.post('https://tfg-backend.ddev.site/api/auth/login', json=login_data)
+    response = token_cache.login(session, 'presidente@uni.es', '123456')
     
     if response.status_code != 200:
         print(f"Error login presidente: {response.status_code}")
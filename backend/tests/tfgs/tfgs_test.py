@@ -3,24 +3,30 @@
 Tests para endpoints de gestión de TFGs
 Base URL: https://tfg-backend.ddev.site
 """
-import requests
 import json
 import sys
 import os
 import tempfile
 import urllib3
 
+# Capa de transporte compartida (backend/tests/http_client.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import create_session, run_concurrently
+
 # Deshabilitar warnings SSL para entorno de desarrollo DDEV
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://tfg-backend.ddev.site"
 
 class TFGTestSuite:
-    def __init__(self, tokens=None):
-        self.session = requests.Session()
+    def __init__(self, tokens=None, namespace=None, transport=None):
+        self.session = create_session(transport)
         # Deshabilitar verificación SSL para DDEV local
         self.session.verify = False
         self.tokens = tokens or {}
+        # Sufijo para distinguir los datos creados por cada worker en ejecuciones paralelas
+        self.namespace = namespace
+        self.suffix = f" [{namespace}]" if namespace else ""
         self.test_results = []
         self.created_tfgs = []  # Para cleanup
         
@@ -119,7 +125,7 @@ class TFGTestSuite:
             
         try:
             payload = {
-                "titulo": "TFG Test - Desarrollo de aplicación web",
+                "titulo": f"TFG Test - Desarrollo de aplicación web{self.suffix}",
                 "descripcion": "Este es un TFG de prueba para testear la API",
                 "resumen": "Resumen del TFG de prueba con tecnologías modernas",
                 "palabras_clave": ["web", "react", "symfony", "test"],
@@ -157,7 +163,7 @@ class TFGTestSuite:
             
         try:
             payload = {
-                "titulo": "TFG Test - Desarrollo de aplicación web (ACTUALIZADO)",
+                "titulo": f"TFG Test - Desarrollo de aplicación web (ACTUALIZADO){self.suffix}",
                 "descripcion": "Descripción actualizada del TFG de prueba",
                 "resumen": "Este es un resumen actualizado con más detalles sobre el desarrollo de aplicación web que cumple con el mínimo de cincuenta caracteres requeridos para la validación.",
                 "palabrasClave": "desarrollo web, aplicación, react, symfony, backend, frontend, testing, actualizado"
@@ -306,8 +312,10 @@ class TFGTestSuite:
         print("=== TESTS DE TFGs ===")
         
         # Tests de lectura
-        self.test_get_mis_tfgs_estudiante()
-        self.test_get_mis_tfgs_profesor()
+        run_concurrently(self.session, [
+            self.test_get_mis_tfgs_estudiante,
+            self.test_get_mis_tfgs_profesor
+        ])
         
         # Tests de creación y modificación
         tfg_id = self.test_create_tfg_estudiante()
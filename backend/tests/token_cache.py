@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Caché de tokens JWT compartida entre ejecuciones y procesos
+Se guarda en /tmp/tfg_test_tokens.json (el mismo fichero del que leen las
+suites) bajo la clave '_cache', indexada por base URL y usuario.
+
+Antes de hacer login con contraseña se intenta, por orden:
+  1. Reutilizar el token guardado si no caduca en los próximos REFRESH_MARGIN segundos
+     y GET /api/auth/me lo acepta (tras resetear la BD o rotar las claves JWT
+     un token sin caducar da 401: se descarta y se sigue con el paso 2)
+  2. Renovarlo con el refresh token (POST /api/token/refresh, gesdinet)
+  3. Login completo (POST /api/auth/login)
+"""
+import os
+import json
+import time
+import base64
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+TOKENS_FILE = '/tmp/tfg_test_tokens.json'
+CACHE_KEY = '_cache'
+# Segundos de margen antes de la expiración para renovar el token
+REFRESH_MARGIN = 300
+
+def jwt_expiry(token):
+    """Devuelve el 'exp' (epoch) del payload de un JWT, o None si no se puede leer"""
+    try:
+        payload = token.split('.')[1]
+        payload += '=' * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+class CachedLogin:
+    """Respuesta equivalente a la del login para los tokens que salen de la caché"""
+    status_code = 200
+
+    def __init__(self, entry, source):
+        self.entry = entry
+        self.source = source
+        self.text = json.dumps({'token': entry['token']})
+
+    def json(self):
+        return {'token': self.entry['token'], 'refresh_token': self.entry.get('refresh_token', '')}
+
+class TokenCache:
+    def __init__(self, base_url, path=TOKENS_FILE, margin=REFRESH_MARGIN):
+        self.base_url = base_url
+        self.path = path
+        self.margin = margin
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Bloqueo exclusivo entre procesos para leer-modificar-escribir el fichero"""
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data):
+        # Escritura atómica: otro proceso nunca ve el fichero a medias
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def _key(self, username):
+        return f"{self.base_url}|{username}"
+
+    def get(self, username):
+        with self._locked():
+            return self._read().get(CACHE_KEY, {}).get(self._key(username))
+
+    def store(self, username, token, refresh_token=''):
+        entry = {
+            'token': token,
+            'refresh_token': refresh_token or '',
+            'exp': jwt_expiry(token),
+            'stored_at': int(time.time())
+        }
+        with self._locked():
+            data = self._read()
+            data.setdefault(CACHE_KEY, {})[self._key(username)] = entry
+            self._write(data)
+        return entry
+
+    def evict(self, username):
+        with self._locked():
+            data = self._read()
+            if data.get(CACHE_KEY, {}).pop(self._key(username), None) is not None:
+                self._write(data)
+
+    def is_valid(self, session, entry):
+        """El servidor todavía acepta el token (comprobación barata con /api/auth/me)"""
+        try:
+            response = session.get(
+                f"{self.base_url}/api/auth/me",
+                headers={'Authorization': f"Bearer {entry['token']}"}
+            )
+        except Exception:
+            return True  # sin respuesta no se sabe: se reutiliza y la suite mostrará el error
+        return response.status_code != 401
+
+    def save_tokens(self, tokens):
+        """Guarda los tokens por rol que leen las suites sin perder la caché"""
+        with self._locked():
+            cache = self._read().get(CACHE_KEY)
+            data = dict(tokens)
+            if cache:
+                data[CACHE_KEY] = cache
+            self._write(data)
+
+    def is_fresh(self, entry):
+        # Sin 'exp' no se puede saber si sigue siendo válido: mejor renovar
+        return bool(entry and entry.get('exp') and entry['exp'] - time.time() > self.margin)
+
+    def login(self, session, username, password):
+        """
+        Obtiene un token para el usuario reutilizando la caché cuando se puede.
+        Devuelve la respuesta del login (o una CachedLogin equivalente).
+        """
+        entry = self.get(username)
+        if self.is_fresh(entry):
+            if self.is_valid(session, entry):
+                return CachedLogin(entry, 'cache')
+            self.evict(username)
+
+        if entry and entry.get('refresh_token'):
+            try:
+                response = session.post(
+                    f"{self.base_url}/api/token/refresh",
+                    json={'refresh_token': entry['refresh_token']}
+                )
+                if response.status_code == 200 and 'token' in response.json():
+                    data = response.json()
+                    entry = self.store(username, data['token'], data.get('refresh_token') or entry['refresh_token'])
+                    return CachedLogin(entry, 'refresh')
+            except Exception:
+                pass  # refresh token caducado o revocado: login completo
+
+        response = session.post(
+            f"{self.base_url}/api/auth/login",
+            json={'username': username, 'password': password}
+        )
+        if response.status_code == 200:
+            try:
+                data = response.json()
+                if 'token' in data:
+                    self.store(username, data['token'], data.get('refresh_token', ''))
+            except ValueError:
+                pass
+        return response
@@ -3,23 +3,29 @@
 Tests para endpoints de gestión de Tribunales
 Base URL: https://tfg-backend.ddev.site
 """
-import requests
 import json
 import sys
 import os
 import urllib3
 
+# Capa de transporte compartida (backend/tests/http_client.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import create_session, run_concurrently
+
 # Deshabilitar warnings SSL para entorno de desarrollo DDEV
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://tfg-backend.ddev.site"
 
 class TribunalesTestSuite:
-    def __init__(self, tokens=None):
-        self.session = requests.Session()
+    def __init__(self, tokens=None, namespace=None, transport=None):
+        self.session = create_session(transport)
         # Deshabilitar verificación SSL para DDEV local
         self.session.verify = False
         self.tokens = tokens or {}
+        # Sufijo para distinguir los datos creados por cada worker en ejecuciones paralelas
+        self.namespace = namespace
+        self.suffix = f" [{namespace}]" if namespace else ""
         self.test_results = []
         self.created_tribunales = []  # Para cleanup
         
@@ -127,7 +133,7 @@ class TribunalesTestSuite:
             
         try:
             payload = {
-                "nombre": "Tribunal Test Informática",
+                "nombre": f"Tribunal Test Informática{self.suffix}",
                 "presidente_id": 9,  # Usuario presidente@uni.es con ROLE_PRESIDENTE_TRIBUNAL
                 "secretario_id": 7,  # Usuario secretario@uni.es con ROLE_PROFESOR
                 "vocal_id": 8,       # Usuario vocal@uni.es con ROLE_PROFESOR
@@ -166,7 +172,7 @@ class TribunalesTestSuite:
             
         try:
             payload = {
-                "nombre": "Tribunal Test Presidente",
+                "nombre": f"Tribunal Test Presidente{self.suffix}",
                 "presidente_id": 9,
                 "secretario_id": 7,
                 "vocal_id": 8,
@@ -321,9 +327,11 @@ class TribunalesTestSuite:
         print("=== TESTS DE TRIBUNALES ===")
         
         # Tests de lectura
-        self.test_get_tribunales_profesor()
-        self.test_get_tribunales_admin()
-        self.test_get_tribunales_estudiante_forbidden()
+        run_concurrently(self.session, [
+            self.test_get_tribunales_profesor,
+            self.test_get_tribunales_admin,
+            self.test_get_tribunales_estudiante_forbidden
+        ])
         
         # Tests de creación
         self.test_create_tribunal_admin()
@@ -3,25 +3,34 @@
 Tests para endpoints de gestión de Usuarios (Solo Admin)
 Base URL: https://tfg-backend.ddev.site
 """
-import requests
 import json
 import sys
 import os
 import random
 import string
+import time
+import tracemalloc
+import requests
 import urllib3
 
+# Capa de transporte compartida (backend/tests/http_client.py)
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from http_client import create_session, run_concurrently, TimedSession
+from pagination_benchmark import run_deep_pagination, describe
+
 # Deshabilitar warnings SSL para entorno de desarrollo DDEV
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 BASE_URL = "https://tfg-backend.ddev.site"
 
 class UsersTestSuite:
-    def __init__(self, tokens=None):
-        self.session = requests.Session()
+    def __init__(self, tokens=None, namespace=None, transport=None):
+        self.session = create_session(transport)
         # Deshabilitar verificación SSL para DDEV local
         self.session.verify = False
         self.tokens = tokens or {}
+        # Namespace de los emails generados, para distinguir los usuarios de cada worker en ejecuciones paralelas
+        self.namespace = namespace
         self.test_results = []
         self.created_users = []  # Para cleanup
         
@@ -46,9 +55,16 @@ class UsersTestSuite:
         if details and not status:
             print(f"    Details: {details}")
     
+    def log_skip(self, test_name, reason):
+        """Registra un test omitido: no cuenta como pasado ni como fallido"""
+        print(f"[SKIP] {test_name}")
+        print(f"    {reason}")
+    
     def generate_random_email(self):
         """Genera un email aleatorio para tests"""
         random_string = ''.join(random.choices(string.ascii_lowercase + string.digits, k=8))
+        if self.namespace:
+            return f"test_{self.namespace}_{random_string}@uni.es"
         return f"test_{random_string}@uni.es"
     
     def test_get_users_admin(self):
@@ -470,6 +486,84 @@ class UsersTestSuite:
             self.log_test("POST user email duplicado", False, f"Exception: {str(e)}")
             return False
     
+    def test_users_cursor_deep_pagination(self):
+        """Benchmark GET /api/users?after=<cursor>: latencia plana en páginas profundas"""
+        if 'admin' not in self.headers:
+            self.log_test("Paginación profunda users (cursor)", False, "No hay token de admin")
+            return False
+            
+        try:
+            summary = run_deep_pagination(self.session, f"{BASE_URL}/api/users", self.headers['admin'])
+            if 'skipped' in summary:
+                self.log_skip("Paginación profunda users (cursor)", describe(summary))
+                return True
+            ok = summary['flat']
+            self.log_test("Paginación profunda users (cursor)", ok, describe(summary))
+            if ok:
+                print(f"    {describe(summary)}")
+            return ok
+                
+        except Exception as e:
+            self.log_test("Paginación profunda users (cursor)", False, f"Exception: {str(e)}")
+            return False
+    
+    def test_users_export_stream(self):
+        """GET /api/users/export en streaming: tiempo hasta la primera fila y memoria pico"""
+        if 'admin' not in self.headers:
+            self.log_test("Export users en streaming (CSV)", False, "No hay token de admin")
+            return False
+            
+        try:
+            # iter_lines necesita una respuesta de requests (el transporte httpx no expone stream=True)
+            session = self.session if isinstance(self.session, requests.Session) else TimedSession()
+            session.verify = False
+            
+            tracemalloc.start()
+            start = time.perf_counter()
+            first_row = None
+            rows = 0
+            with session.get(
+                f"{BASE_URL}/api/users/export",
+                params={'format': 'csv'},
+                headers=self.headers['admin'],
+                stream=True
+            ) as response:
+                if response.status_code != 200:
+                    tracemalloc.stop()
+                    self.log_test("Export users en streaming (CSV)", False, 
+                                f"Status: {response.status_code}, Body: {response.text[:200]}")
+                    return False
+                
+                lines = response.iter_lines(decode_unicode=True)
+                header = next(lines, '') or ''
+                for line in lines:
+                    if not line:
+                        continue
+                    if first_row is None:
+                        first_row = (time.perf_counter() - start) * 1000
+                    rows += 1
+                streamed = 'content-length' not in response.headers
+            
+            elapsed = (time.perf_counter() - start) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            
+            details = (f"{rows} filas en {elapsed:.0f}ms, primera fila a los "
+                       f"{first_row or 0:.0f}ms, memoria pico del cliente {peak / 1024:.0f} KiB")
+            ok = 'Email' in header and rows > 0 and streamed
+            if not streamed:
+                details += "; la respuesta trae Content-Length (no se envió en streaming)"
+            self.log_test("Export users en streaming (CSV)", ok, details)
+            if ok:
+                print(f"    {details}")
+            return ok
+                
+        except Exception as e:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.log_test("Export users en streaming (CSV)", False, f"Exception: {str(e)}")
+            return False
+    
     def cleanup_created_users(self):
         """Elimina los usuarios creados durante las pruebas"""
         if not self.created_users:
@@ -499,14 +593,14 @@ class UsersTestSuite:
         """Ejecuta todos los tests de usuarios"""
         print("=== TESTS DE USUARIOS ===")
         
-        # Tests de lectura
-        self.test_get_users_admin()
-        self.test_get_users_with_pagination_admin()
-        self.test_get_users_filter_role_admin()
-        
-        # Tests de permisos de lectura
-        self.test_get_users_profesor_forbidden()
-        self.test_get_users_estudiante_forbidden()
+        # Tests de lectura y de permisos de lectura
+        run_concurrently(self.session, [
+            self.test_get_users_admin,
+            self.test_get_users_with_pagination_admin,
+            self.test_get_users_filter_role_admin,
+            self.test_get_users_profesor_forbidden,
+            self.test_get_users_estudiante_forbidden
+        ])
         
         # Tests de creación
         self.test_create_user_estudiante_admin()
@@ -522,6 +616,12 @@ class UsersTestSuite:
         self.test_create_user_missing_fields()
         self.test_create_user_duplicate_email()
         
+        # Benchmark de paginación por cursor (significativo con un dataset de seed_dataset.py)
+        self.test_users_cursor_deep_pagination()
+        
+        # Exportación en streaming (CSV por lotes)
+        self.test_users_export_stream()
+        
         # Resumen
         passed = sum(1 for r in self.test_results if r['status'])
         total = len(self.test_results)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Perfilado de la compilación de la documentación
+
+Cada etapa instrumentada (capítulos, diagramas, combinado, pandoc, pasadas de
+xelatex) registra un intervalo con PROFILER.span(). Con --profile los scripts
+guardan los intervalos como eventos de traza de Chrome (se abren en
+chrome://tracing o https://ui.perfetto.dev) e imprimen un resumen con las
+etapas, capítulos y diagramas más lentos.
+"""
+import os
+import json
+import threading
+import contextlib
+from time import perf_counter
+
+DEFAULT_TRACE_FILE = "docs/build_profile.json"
+
+class BuildProfiler:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.origin = perf_counter()
+        self.events = []
+        self.threads = {}
+
+    def _thread_id(self):
+        # Identificadores pequeños y estables por hilo para que la traza sea legible
+        ident = threading.get_ident()
+        with self.lock:
+            if ident not in self.threads:
+                self.threads[ident] = (len(self.threads) + 1, threading.current_thread().name)
+            return self.threads[ident][0]
+
+    @contextlib.contextmanager
+    def span(self, name, category, **args):
+        """Mide el bloque y lo registra como evento completo ('X') de la traza"""
+        tid = self._thread_id()
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            end = perf_counter()
+            event = {
+                'name': name,
+                'cat': category,
+                'ph': 'X',
+                'ts': round((start - self.origin) * 1_000_000),
+                'dur': round((end - start) * 1_000_000),
+                'pid': os.getpid(),
+                'tid': tid,
+                'args': args
+            }
+            with self.lock:
+                self.events.append(event)
+
+    def trace(self):
+        """Traza en formato Chrome trace-event (JSON object format)"""
+        with self.lock:
+            metadata = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid, 'args': {'name': name}}
+                for tid, name in self.threads.values()
+            ]
+            return {'traceEvents': metadata + list(self.events), 'displayTimeUnit': 'ms'}
+
+    def save(self, path=DEFAULT_TRACE_FILE):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.trace(), f)
+        os.replace(temp_path, path)
+        return path
+
+    def _totals(self, key):
+        totals = {}
+        with self.lock:
+            for event in self.events:
+                label = key(event)
+                if label:
+                    totals[label] = totals.get(label, 0) + event['dur']
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def print_summary(self, top=10):
+        """Resumen de las etapas, capítulos y diagramas más lentos (en segundos)"""
+        sections = [
+            ("Etapas", self._totals(lambda e: e['cat'])),
+            # Tiempo acumulado por capítulo: lectura, escritura y sus diagramas
+            ("Capítulos más lentos", self._totals(lambda e: e['args'].get('chapter'))),
+            ("Diagramas más lentos", self._totals(lambda e: e['name'] if e['cat'] == 'diagram' else None)),
+            ("Procesos externos más lentos",
+             self._totals(lambda e: e['name'] if e['cat'] in ('pandoc', 'xelatex') else None)),
+        ]
+
+        print("=" * 70)
+        print(f"⏱️  PERFIL DE LA COMPILACIÓN (top {top})")
+        print("=" * 70)
+        for title, totals in sections:
+            if not totals:
+                continue
+            print(f"{title}:")
+            for label, duration in totals[:top]:
+                print(f"   {duration / 1_000_000:>8.2f}s  {label}")
+        print("=" * 70)
+
+# Perfilador global del proceso; registrar intervalos es barato, así que siempre
+# está activo y solo se guarda la traza si se pide con --profile
+PROFILER = BuildProfiler()
+
+def finish_profile(path, top=10):
+    """Guarda la traza e imprime el resumen (no hace nada si path es None)"""
+    if not path:
+        return
+    PROFILER.print_summary(top)
+    print(f"📈 Traza guardada en {PROFILER.save(path)} (ábrela en chrome://tracing o ui.perfetto.dev)")
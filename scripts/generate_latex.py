@@ -1,19 +1,24 @@
 #!/usr/bin/env python3
 import subprocess
 import sys
-import os
 from pathlib import Path
 
+# El markdown se lee con la misma capa AST que el PDF: los capítulos que ya
+# leyó generate_pdf_complete.py salen de docs/.pandoc_cache sin volver a parsearse
+from generate_pdf_complete import load_document
+from pandoc_ast import write_document
+
 def generate_latex_from_combined():
     """
-    Convierte el archivo combined_complete.md a LaTeX usando pandoc
+    Convierte los capítulos procesados (el contenido de combined_complete.md)
+    a LaTeX usando pandoc
     """
     print("🚀 Iniciando conversión de Markdown a LaTeX...")
     
-    # Verificar que existe el archivo combined_complete.md
-    combined_file = Path("docs/combined_complete.md")
-    if not combined_file.exists():
-        print("❌ Error: No se encuentra el archivo docs/combined_complete.md")
+    # Verificar que existen los capítulos procesados
+    processed_files = sorted(Path("docs/processed").glob("*.md"))
+    if not processed_files:
+        print("❌ Error: No se encuentran los capítulos procesados en docs/processed")
         print("   Ejecuta primero generate_pdf_complete.py para generar el archivo combinado")
         return False
     
@@ -31,40 +36,12 @@ def generate_latex_from_combined():
     # Archivo de salida LaTeX
     output_file = output_dir / "combined_complete.tex"
     
-    # Comando pandoc para convertir a LaTeX
-    pandoc_cmd = [
-        'pandoc', 'combined_complete.md',
-        '-f', 'markdown+table_captions+grid_tables',
-        '--template=template/template_complete.tex',
-        '--toc',
-        '--toc-depth=3', 
-        '--number-sections',
-        '--top-level-division=chapter',
-        '--listings',
-        '-t', 'latex',  # Salida en formato LaTeX
-        '-V', 'documentclass=report',
-        '-V', 'fontsize=12pt',
-        '-V', 'lang=es',
-        '--highlight-style=tango',
-        '-o', f'latex_output/{output_file.name}'
-    ]
-    
     try:
-        print("📝 Ejecutando Pandoc para generar LaTeX...")
-        # Cambiar al directorio docs para ejecutar pandoc
-        original_cwd = os.getcwd()
-        os.chdir('docs')
+        document = load_document(processed_files)
         
-        # Asegurarse de que el directorio latex_output existe y tiene permisos
-        latex_output_path = Path('latex_output')
-        latex_output_path.mkdir(exist_ok=True)
-        
-        # Usar ruta absoluta para el archivo de salida
-        abs_output_file = latex_output_path / 'combined_complete.tex'
-        pandoc_cmd[-1] = str(abs_output_file.absolute())
-        
-        subprocess.run(pandoc_cmd, check=True)
-        os.chdir(original_cwd)
+        print("📝 Ejecutando Pandoc para generar LaTeX...")
+        # Pandoc se ejecuta en docs para resolver la plantilla; salida en formato LaTeX
+        write_document(document, Path('latex_output') / output_file.name, ['-t', 'latex'])
         
         print(f"✅ Archivo LaTeX generado exitosamente: {output_file}")
         print("📄 El archivo LaTeX incluye:")
@@ -4,99 +4,577 @@ import subprocess
 import sys
 import os
 import shutil
+import hashlib
 import tempfile
+import threading
+import uuid
+import json
+import time
+import argparse
+import io
+import math
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    from PIL import Image
+    import PIL
+except ImportError:  # Sin Pillow los PNG se dejan tal cual los genera el renderizador
+    Image = None
+
+from build_profiler import DEFAULT_TRACE_FILE, finish_profile, PROFILER
+from pandoc_ast import ChapterAstCache, WRITER_OPTIONS, merge_chapters, write_document
+
+# Caché persistente de diagramas renderizados (fuera de docs/processed, que se regenera)
+DIAGRAM_CACHE_DIR = "docs/.diagram_cache"
+PLANTUML_OPTIONS = ['-tpng']
+MERMAID_OPTIONS = ['-b', 'white', '-s', '2']
+# Salida vectorial: mmdc escribe PDF directamente; PlantUML solo genera PDF con
+# librerías extra (batik/fop), así que se pide SVG y se convierte con rsvg-convert
+PLANTUML_VECTOR_OPTIONS = ['-tsvg']
+MERMAID_VECTOR_OPTIONS = ['-b', 'white', '--pdfFit']
+# Los PNG se reducen a PRINT_DPI para el tamaño con el que se imprimen: la
+# plantilla los limita a \linewidth (A4 con márgenes de 2.5cm) y 0.8\textheight
+PRINT_DPI = 300
+TEXT_WIDTH_INCHES = 16 / 2.54
+MAX_HEIGHT_INCHES = 0.8 * 23.7 / 2.54
+# Densidad que asume xelatex para un PNG sin metadatos de resolución
+DEFAULT_PNG_DPI = 72
+# Versiones de las herramientas, cacheadas por ruta y mtime del ejecutable
+TOOL_VERSIONS_FILE = "docs/.diagram_cache/tool_versions.json"
+# Hashes de las entradas de cada etapa de la última compilación
+BUILD_MANIFEST = "docs/.build_manifest.json"
+# Cabecera de todo fichero PNG, para validar las imágenes que devuelve PlantUML por la tubería
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def renderer_command(command):
+    """
+    Comando para lanzar el renderizador. Con PLANTUML_JAR definido se usa
+    'java -jar <jar>' en lugar del script 'plantuml' del sistema.
+    """
+    if command == 'plantuml' and os.environ.get('PLANTUML_JAR'):
+        return ['java', '-jar', os.environ['PLANTUML_JAR']]
+    return [command]
+
+def read_json(path, default):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+def write_json(path, data):
+    # Escritura atómica: una compilación interrumpida no deja el JSON a medias
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def write_if_changed(path, content):
+    """Escribe el fichero solo si el contenido cambia (conserva el mtime si no)"""
+    path = Path(path)
+    try:
+        if path.read_text(encoding='utf-8') == content:
+            return False
+    except OSError:
+        pass
+    path.write_text(content, encoding='utf-8')
+    return True
+
+@lru_cache(maxsize=None)
+def renderer_version(command):
+    """
+    Primera línea de la versión de la herramienta; forma parte de la clave de
+    caché de los diagramas y del manifiesto. Arrancar plantuml (JVM) o mmdc solo
+    para preguntar la versión es lento, así que se guarda en disco y solo se
+    vuelve a consultar si cambian la ruta o el mtime del ejecutable.
+    """
+    invocation = renderer_command(command)
+    executable = shutil.which(invocation[-1]) or invocation[-1]
+    try:
+        mtime = os.stat(executable).st_mtime_ns
+    except OSError:
+        mtime = None
+    
+    signature = {'path': executable, 'mtime': mtime}
+    cached = read_json(TOOL_VERSIONS_FILE, {}).get(command)
+    if mtime is not None and cached and cached.get('signature') == signature:
+        return cached['version']
+    
+    flag = '-version' if command == 'plantuml' else '--version'
+    try:
+        result = subprocess.run(invocation + [flag], capture_output=True, text=True, timeout=60)
+        lines = (result.stdout or result.stderr).strip().splitlines()
+        version = lines[0] if lines else 'desconocida'
+    except (OSError, subprocess.SubprocessError):
+        return 'desconocida'
+    
+    if mtime is not None:
+        versions = read_json(TOOL_VERSIONS_FILE, {})
+        versions[command] = {'signature': signature, 'version': version}
+        write_json(TOOL_VERSIONS_FILE, versions)
+    return version
+
+class BuildManifest:
+    """
+    Manifiesto de la compilación incremental: para cada etapa (capítulo,
+    combinado, PDF) guarda el hash de sus entradas. Una etapa se salta si sus
+    entradas no han cambiado y sus salidas siguen existiendo.
+    """
+    def __init__(self, path=BUILD_MANIFEST):
+        self.path = Path(path)
+        self.stages = read_json(self.path, {}).get('stages', {})
+    
+    def is_current(self, stage, inputs, outputs=()):
+        return self.stages.get(stage) == inputs and all(Path(o).exists() for o in outputs)
+    
+    def record(self, stage, inputs):
+        self.stages[stage] = inputs
+    
+    def forget(self, stage):
+        self.stages.pop(stage, None)
+    
+    def save(self):
+        write_json(self.path, {'stages': self.stages})
+
+# Cambios en este script invalidan todos los capítulos procesados
+PROCESSOR_VERSION = file_hash(__file__)
+
+# Bloque de diagrama localizado en un documento: position es su índice en la
+# lista de bloques del documento y source lo que recibe el renderizador
+Diagram = namedtuple('Diagram', 'kind position source key base_name index output_file')
+
+# Bloque de código delimitado: opening y closing son las líneas de las vallas
+# (closing es None si el bloque no se cierra) y body sus líneas de contenido
+CodeBlock = namedtuple('CodeBlock', 'opening info body closing')
+
+FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})(.*)$')
+
+# Lenguaje de los bloques sin etiquetar, según cómo empieza su contenido
+LANGUAGE_HINTS = [
+    ('bash', re.compile(r'#.*?bin.*?bash', re.DOTALL | re.IGNORECASE)),
+    ('json', re.compile(r'\{.*?".*?":.*?\}', re.DOTALL | re.IGNORECASE)),
+    ('sql', re.compile(r'SELECT.*?FROM', re.DOTALL | re.IGNORECASE)),
+    ('yaml', re.compile(r'version:.*?services:', re.DOTALL | re.IGNORECASE)),
+]
+
+def tokenize_markdown(content):
+    """
+    Divide un documento markdown, en una sola pasada por sus líneas, en una
+    lista de bloques: cada elemento es una línea de texto (str) o un CodeBlock.
+    Sigue las reglas de CommonMark para las vallas (``` o ~~~, hasta 3 espacios
+    de sangría, el cierre con el mismo carácter y al menos la misma longitud).
+    """
+    blocks = []
+    lines = content.split('\n')
+    i = 0
+    while i < len(lines):
+        match = FENCE.match(lines[i])
+        # En vallas de acentos graves la etiqueta no puede contener acentos graves
+        if not match or (match.group(1)[0] == '`' and '`' in match.group(2)):
+            blocks.append(lines[i])
+            i += 1
+            continue
+        
+        fence = match.group(1)
+        closing_fence = re.compile(rf'^ {{0,3}}{re.escape(fence[0])}{{{len(fence)},}}\s*$')
+        end = i + 1
+        while end < len(lines) and not closing_fence.match(lines[end]):
+            end += 1
+        closing = lines[end] if end < len(lines) else None
+        blocks.append(CodeBlock(lines[i], match.group(2).strip(), lines[i + 1:end], closing))
+        i = end + 1
+    return blocks
+
+def block_language(block):
+    return block.info.split()[0].lower() if block.info else ''
+
+def guess_language(block):
+    """Lenguaje para un bloque sin etiquetar (shebang bash, JSON, SQL, docker-compose)"""
+    text = '\n'.join(block.body)
+    for language, pattern in LANGUAGE_HINTS:
+        if pattern.match(text):
+            return language
+    return ''
+
+def render_markdown(blocks, replacements=None):
+    """
+    Vuelve a unir la lista de bloques en markdown con un único join. Los bloques
+    sin etiquetar reciben el lenguaje deducido y los de replacements (posición ->
+    línea) se sustituyen por esa línea.
+    """
+    replacements = replacements or {}
+    lines = []
+    for position, block in enumerate(blocks):
+        if isinstance(block, str):
+            lines.append(block)
+        elif position in replacements:
+            lines.append(replacements[position])
+        else:
+            opening = block.opening
+            if not block.info:
+                language = guess_language(block)
+                if language:
+                    opening = f"{opening.rstrip()}{language}"
+            lines.append(opening)
+            lines.extend(block.body)
+            if block.closing is not None:
+                lines.append(block.closing)
+    return '\n'.join(lines)
+
+def is_plantuml_image(data, image_format):
+    """Comprueba que PlantUML devolvió una imagen del formato pedido y no un mensaje de error"""
+    if image_format == 'png':
+        return data.startswith(PNG_SIGNATURE)
+    return b'<svg' in data[:1024]
+
+def optimize_png(data):
+    """
+    Reduce un PNG a PRINT_DPI para el tamaño con el que se imprime y lo vuelve a
+    comprimir sin pérdidas. La resolución se anota en el PNG para que xelatex lo
+    coloque con el mismo tamaño natural que el original. Sin Pillow no hace nada.
+    """
+    if Image is None:
+        return data
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except OSError:
+        return data  # Pillow no sabe leerlo: mejor el PNG original que perder el diagrama
+    with image:
+        source_dpi = float(image.info.get('dpi', (DEFAULT_PNG_DPI,))[0]) or DEFAULT_PNG_DPI
+        width_inches, height_inches = image.width / source_dpi, image.height / source_dpi
+        scale = min(1.0, TEXT_WIDTH_INCHES / width_inches, MAX_HEIGHT_INCHES / height_inches)
+        target_width = math.ceil(width_inches * scale * PRINT_DPI)
+        resized = target_width < image.width
+        if resized:
+            target_height = max(1, round(image.height * target_width / image.width))
+            image = image.resize((target_width, target_height), Image.LANCZOS)
+        dpi = image.width / width_inches
+        output = io.BytesIO()
+        image.save(output, 'PNG', optimize=True, dpi=(dpi, dpi))
+    optimized = output.getvalue()
+    return optimized if resized or len(optimized) < len(data) else data
+
+def png_options():
+    """Parámetros de optimize_png, para la clave de caché de los diagramas en PNG"""
+    return [f'print-dpi={PRINT_DPI}', f'pillow={PIL.__version__ if Image else "no"}']
+
+def svg_to_pdf(svg):
+    """Convierte un SVG (salida de PlantUML) en PDF vectorial con rsvg-convert"""
+    result = subprocess.run(['rsvg-convert', '-f', 'pdf'], input=svg, capture_output=True, check=True)
+    if not result.stdout.startswith(b'%PDF'):
+        raise OSError("rsvg-convert no devolvió un PDF")
+    return result.stdout
+
+class DiagramCache:
+    """
+    Caché direccionada por contenido: cada imagen se guarda como <sha256>.<ext>,
+    con el hash calculado sobre el renderizador, su versión, las opciones y el
+    código del diagrama. Un diagrama sin cambios no vuelve a renderizarse.
+    """
+    def __init__(self, cache_dir=DIAGRAM_CACHE_DIR):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def key(self, command, options, source):
+        digest = hashlib.sha256()
+        for part in (command, renderer_version(command), ' '.join(options), source):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+    
+    def path(self, key, suffix='.png'):
+        return self.cache_dir / f"{key}{suffix}"
+    
+    def fetch(self, key, destination):
+        """Copia la imagen cacheada a destination; devuelve False si no está en caché"""
+        if not self.path(key, Path(destination).suffix).exists():
+            with self.lock:
+                self.misses += 1
+            return False
+        self._link(key, destination)
+        with self.lock:
+            self.hits += 1
+        return True
+    
+    def store(self, key, rendered_file, destination):
+        """Mueve a la caché la imagen recién renderizada y la copia a destination"""
+        # rename atómico: una ejecución interrumpida nunca deja una entrada a medias
+        os.replace(rendered_file, self.path(key, Path(destination).suffix))
+        self._link(key, destination)
+    
+    def store_bytes(self, key, data, destination):
+        """Como store, para imágenes recibidas en memoria (salida de PlantUML en modo -pipe)"""
+        temp_path = self.cache_dir / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        self.store(key, temp_path, destination)
+    
+    def _link(self, key, destination):
+        destination = Path(destination)
+        cached = self.path(key, destination.suffix)
+        if destination.exists():
+            destination.unlink()
+        try:
+            os.link(cached, destination)
+        except OSError:
+            shutil.copy2(cached, destination)
+
 class DocumentProcessor:
-    def __init__(self, docs_dir="docs", output_dir="docs/processed"):
+    def __init__(self, docs_dir="docs", output_dir="docs/processed", cache_dir=DIAGRAM_CACHE_DIR, workers=None,
+                 plantuml_batch=True, vector=True):
         self.docs_dir = Path(docs_dir)
         self.output_dir = Path(output_dir)
         self.images_dir = self.output_dir / "images"
+        self.cache = DiagramCache(cache_dir)
+        # Procesos de renderizado simultáneos (por defecto, uno por CPU)
+        self.workers = workers
+        # Todos los PlantUML en una sola JVM (modo -pipe) en lugar de un proceso por diagrama
+        self.plantuml_batch = plantuml_batch
+        # Diagramas en PDF vectorial cuando el renderizador lo permite (si no, PNG optimizado)
+        self.vector = vector
         
         # Crear directorios
         self.output_dir.mkdir(exist_ok=True)
         self.images_dir.mkdir(exist_ok=True)
     
     # [Métodos de procesamiento anteriores aquí - igual que antes]
-    def extract_plantuml_diagrams(self, content, base_name):
-        pattern = r'```plantuml\n(.*?)\n```'
-        matches = re.findall(pattern, content, re.DOTALL)
-        
-        for i, diagram in enumerate(matches):
-            temp_file = f"temp_{base_name}_{i}.puml"
-            with open(temp_file, 'w') as f:
-                f.write(f"@startuml\n{diagram}\n@enduml")
+    def image_format(self, kind):
+        """'pdf' (vectorial) si se puede generar para este tipo de diagrama; si no, 'png'"""
+        if not self.vector or (kind == 'plantuml' and not shutil.which('rsvg-convert')):
+            return 'png'
+        return 'pdf'
+    
+    def render_options(self, kind, image_format):
+        """Opciones de línea de comandos del renderizador para el formato de salida"""
+        if kind == 'plantuml':
+            return PLANTUML_VECTOR_OPTIONS if image_format == 'pdf' else PLANTUML_OPTIONS
+        return MERMAID_VECTOR_OPTIONS if image_format == 'pdf' else MERMAID_OPTIONS
+    
+    def cache_options(self, kind, image_format):
+        """Opciones del renderizador más las del postproceso, que también cambian la imagen"""
+        options = self.render_options(kind, image_format)
+        if image_format == 'png':
+            return options + png_options()
+        if kind == 'plantuml':
+            return options + [renderer_version('rsvg-convert')]
+        return options
+    
+    def finish_image(self, diagram, data):
+        """Postproceso de la salida de PlantUML: SVG a PDF, o PNG reducido a PRINT_DPI"""
+        if diagram.output_file.endswith('.pdf'):
+            return svg_to_pdf(data)
+        return optimize_png(data)
+    
+    def collect_diagrams(self, blocks, base_name):
+        """Localiza los bloques PlantUML y Mermaid de un documento tokenizado sin renderizarlos"""
+        diagrams = []
+        counters = {'plantuml': 0, 'mermaid': 0}
+        for position, block in enumerate(blocks):
+            if isinstance(block, str) or block.closing is None:
+                continue
+            kind = block_language(block)
+            if kind not in counters:
+                continue
             
-            output_file = f"{base_name}_plantuml_{i}.png"
-            temp_output = f"temp_{base_name}_{i}.png"
+            i = counters[kind]
+            counters[kind] += 1
+            diagram = '\n'.join(block.body)
+            image_format = self.image_format(kind)
+            options = self.cache_options(kind, image_format)
+            if kind == 'plantuml':
+                # Los bloques de la memoria ya traen @startuml/@enduml; envolverlos otra vez
+                # deja un @enduml suelto que en modo -pipe produciría una imagen de más
+                source = diagram if diagram.lstrip().startswith('@start') else f"@startuml\n{diagram}\n@enduml"
+                key = self.cache.key('plantuml', options, source)
+            else:
+                source = diagram
+                key = self.cache.key('mmdc', options, source)
+            output_file = f"{base_name}_{kind}_{i}.{image_format}"
+            diagrams.append(Diagram(kind, position, source, key, base_name, i, output_file))
+        return diagrams
+    
+    def render_diagram(self, diagram):
+        """Deja la imagen del diagrama en images_dir (desde la caché o renderizándola)"""
+        if self.cache.fetch(diagram.key, self.images_dir / diagram.output_file):
+            return True
+        return self._render(diagram)
+    
+    def _render(self, diagram):
+        with PROFILER.span(diagram.output_file, 'diagram', chapter=f"{diagram.base_name}.md", kind=diagram.kind):
+            return self._render_uncached(diagram)
+    
+    def _render_uncached(self, diagram):
+        destination = self.images_dir / diagram.output_file
+        image_format = destination.suffix[1:]
+        label = 'PlantUML' if diagram.kind == 'plantuml' else 'Mermaid'
+        
+        if diagram.kind == 'plantuml':
+            # Modo -pipe: el código entra por stdin y la imagen sale por stdout, sin ficheros temporales
             try:
-                subprocess.run([
-                    'plantuml', '-tpng', 
-                    '-o', str(self.images_dir), 
-                    temp_file
-                ], check=True)
-                
-                # Rename the generated file to the expected name
-                temp_output_path = self.images_dir / temp_output
-                final_output_path = self.images_dir / output_file
-                if temp_output_path.exists():
-                    temp_output_path.rename(final_output_path)
-                
-                replacement = f"![Diagrama PlantUML {i+1}](processed/images/{output_file})"
-                content = content.replace(
-                    f"```plantuml\n{diagram}\n```", 
-                    replacement, 1
+                result = subprocess.run(
+                    renderer_command('plantuml') + self.render_options('plantuml', image_format) + ['-pipe'],
+                    input=diagram.source.encode('utf-8'), capture_output=True, check=True
                 )
-            except subprocess.CalledProcessError:
-                print(f"Error procesando diagrama PlantUML {i} en {base_name}")
-            finally:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
+                if not is_plantuml_image(result.stdout, image_format):
+                    raise OSError("PlantUML no devolvió una imagen")
+                self.cache.store_bytes(diagram.key, self.finish_image(diagram, result.stdout), destination)
+                return True
+            except (subprocess.CalledProcessError, OSError):
+                print(f"Error procesando diagrama {label} {diagram.index} en {diagram.base_name}")
+                return False
         
-        return content
+        temp_file = f"temp_{diagram.base_name}_mermaid_{diagram.index}.mmd"
+        rendered = self.cache.cache_dir / f"temp_{diagram.base_name}_mermaid_{diagram.index}.{image_format}"
+        try:
+            with open(temp_file, 'w') as f:
+                f.write(diagram.source)
+            subprocess.run(
+                renderer_command('mmdc') + ['-i', temp_file, '-o', str(rendered),
+                                            *self.render_options('mermaid', image_format)],
+                check=True
+            )
+            if image_format == 'png':
+                rendered.write_bytes(optimize_png(rendered.read_bytes()))
+            self.cache.store(diagram.key, rendered, destination)
+            return True
+        except (subprocess.CalledProcessError, OSError):
+            print(f"Error procesando diagrama {label} {diagram.index} en {diagram.base_name}")
+            return False
+        finally:
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
     
-    def extract_mermaid_diagrams(self, content, base_name):
-        pattern = r'```mermaid\n(.*?)\n```'
-        matches = re.findall(pattern, content, re.DOTALL)
+    def render_plantuml_batch(self, diagrams):
+        """
+        Renderiza todos los diagramas PlantUML con un único proceso (una sola
+        arrancada de la JVM) en modo -pipe: las fuentes van seguidas por stdin y
+        las imágenes vuelven por stdout separadas por un delimitador.
+        Devuelve (diagramas renderizados, diagramas a reintentar de uno en uno).
+        """
+        # Diagramas idénticos comparten imagen: se renderiza cada clave una vez
+        unique = {}
+        for diagram in diagrams:
+            unique.setdefault(diagram.key, diagram.source)
+        keys = list(unique)
+        image_format = self.image_format('plantuml')
         
-        for i, diagram in enumerate(matches):
-            temp_file = f"temp_{base_name}_mermaid_{i}.mmd"
-            with open(temp_file, 'w') as f:
-                f.write(diagram)
-            
-            output_file = f"{base_name}_mermaid_{i}.png"
-            try:
-                subprocess.run([
-                    'mmdc', '-i', temp_file, 
-                    '-o', str(self.images_dir / output_file),
-                    '-b', 'white', '-s', '2'
-                ], check=True)
-                
-                replacement = f"![Diagrama Mermaid {i+1}](processed/images/{output_file})"
-                content = content.replace(
-                    f"```mermaid\n{diagram}\n```", 
-                    replacement, 1
+        delimiter = f"@@tfg-diagram-{uuid.uuid4().hex}@@"
+        # Un único proceso: la traza solo puede mostrar el lote completo, no cada diagrama
+        try:
+            with PROFILER.span(f"plantuml -pipe (lote de {len(keys)})", 'diagram',
+                               diagrams=[d.output_file for d in diagrams]):
+                result = subprocess.run(
+                    renderer_command('plantuml') + self.render_options('plantuml', image_format)
+                    + ['-pipe', '-pipedelimitor', delimiter],
+                    input='\n'.join(unique[key] for key in keys).encode('utf-8'), capture_output=True
                 )
-            except subprocess.CalledProcessError:
-                print(f"Error procesando diagrama Mermaid {i} en {base_name}")
-            finally:
-                if os.path.exists(temp_file):
-                    os.remove(temp_file)
+        except OSError:
+            return set(), list(diagrams)
         
-        return content
-    
-    def enhance_code_blocks(self, content):
-        patterns = {
-            r'(```\n)(#.*?bin.*?bash)': r'```bash\n\2',
-            r'(```\n)(\{.*?".*?":.*?\})': r'```json\n\2',
-            r'(```\n)(SELECT.*?FROM)': r'```sql\n\2',
-            r'(```\n)(version:.*?services:)': r'```yaml\n\2'
-        }
+        # Tras cada imagen PlantUML escribe el delimitador y un salto de línea
+        chunks = result.stdout.split(delimiter.encode())
+        images = {}
+        for key, chunk in zip(keys, chunks):
+            chunk = chunk[2:] if chunk.startswith(b'\r\n') else chunk[1:] if chunk.startswith(b'\n') else chunk
+            if is_plantuml_image(chunk, image_format):
+                images[key] = chunk
+        
+        # Con errores PlantUML devuelve una imagen de error y código != 0 sin decir
+        # de qué diagrama es: se reintentan todos por separado para localizarlo
+        if result.returncode != 0:
+            return set(), list(diagrams)
         
-        for pattern, replacement in patterns.items():
-            content = re.sub(pattern, replacement, content, flags=re.DOTALL | re.IGNORECASE)
+        rendered, retry, finished = set(), [], {}
+        for diagram in diagrams:
+            if diagram.key in images and diagram.key not in finished:
+                try:
+                    finished[diagram.key] = self.finish_image(diagram, images[diagram.key])
+                except (subprocess.CalledProcessError, OSError):
+                    pass
+            if diagram.key in finished:
+                self.cache.store_bytes(diagram.key, finished[diagram.key], self.images_dir / diagram.output_file)
+                rendered.add(diagram)
+            else:
+                retry.append(diagram)
+        return rendered, retry
+    
+    def render_diagrams(self, diagrams, workers=None):
+        """
+        Renderiza en paralelo los diagramas que no están en caché: los PlantUML
+        en un único proceso por lotes (si plantuml_batch) y los Mermaid con un
+        proceso mmdc por hilo. Devuelve el conjunto de diagramas renderizados.
+        """
+        rendered, pending = set(), []
+        for diagram in diagrams:
+            if self.cache.fetch(diagram.key, self.images_dir / diagram.output_file):
+                rendered.add(diagram)
+            else:
+                pending.append(diagram)
+        if not pending:
+            return rendered
         
-        return content
+        batch = [d for d in pending if d.kind == 'plantuml'] if self.plantuml_batch else []
+        singles = [d for d in pending if d not in batch]
+        workers = workers or self.workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            batch_future = executor.submit(self.render_plantuml_batch, batch) if batch else None
+            results = list(executor.map(self._render, singles))
+            rendered.update(d for d, ok in zip(singles, results) if ok)
+            
+            if batch_future:
+                batch_rendered, retry = batch_future.result()
+                rendered.update(batch_rendered)
+                results = list(executor.map(self._render, retry))
+                rendered.update(d for d, ok in zip(retry, results) if ok)
+        return rendered
+    
+    def substitute_diagrams(self, blocks, diagrams, rendered):
+        """Markdown final del documento: diagramas como imágenes y bloques de código etiquetados"""
+        replacements = {}
+        for diagram in diagrams:
+            if diagram not in rendered:
+                continue  # Si falla el renderizado se conserva el bloque de código
+            label = 'PlantUML' if diagram.kind == 'plantuml' else 'Mermaid'
+            replacements[diagram.position] = f"![Diagrama {label} {diagram.index+1}](processed/images/{diagram.output_file})"
+        return render_markdown(blocks, replacements)
+    
+    def extract_plantuml_diagrams(self, content, base_name):
+        blocks = tokenize_markdown(content)
+        diagrams = [d for d in self.collect_diagrams(blocks, base_name) if d.kind == 'plantuml']
+        return self.substitute_diagrams(blocks, diagrams, self.render_diagrams(diagrams))
+    
+    def extract_mermaid_diagrams(self, content, base_name):
+        blocks = tokenize_markdown(content)
+        diagrams = [d for d in self.collect_diagrams(blocks, base_name) if d.kind == 'mermaid']
+        return self.substitute_diagrams(blocks, diagrams, self.render_diagrams(diagrams))
+    
+    def enhance_code_blocks(self, content):
+        return render_markdown(tokenize_markdown(content))
+    
+    def write_processed(self, file_path, content):
+        output_file = self.output_dir / file_path.name
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return output_file
     
     def process_file(self, file_path):
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -105,28 +583,79 @@ class DocumentProcessor:
         base_name = file_path.stem
         print(f"Procesando {file_path.name}...")
         
-        content = self.extract_plantuml_diagrams(content, base_name)
-        content = self.extract_mermaid_diagrams(content, base_name)
-        content = self.enhance_code_blocks(content)
-        
-        output_file = self.output_dir / file_path.name
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(content)
+        with PROFILER.span(f"{file_path.name} (lectura)", 'chapter', chapter=file_path.name):
+            blocks = tokenize_markdown(content)
+            diagrams = self.collect_diagrams(blocks, base_name)
+        rendered = self.render_diagrams(diagrams)
         
-        return output_file
+        with PROFILER.span(f"{file_path.name} (escritura)", 'chapter', chapter=file_path.name):
+            return self.write_processed(file_path, self.substitute_diagrams(blocks, diagrams, rendered))
     
-    def process_all_documents(self):
+    def process_all_documents(self, manifest=None):
+        """
+        Procesa los capítulos. Con un BuildManifest solo se reprocesan (y se
+        renderizan los diagramas de) los capítulos cuyas entradas han cambiado.
+        """
         md_files = sorted(self.docs_dir.glob("*.md"))
+        documents = []
         processed_files = []
+        images = set()
         
+        # 1. Leer todos los capítulos y localizar sus diagramas
         for file_path in md_files:
             # Skip combined_complete.md as it's our output file
             if file_path.name == "combined_complete.md":
                 continue
-            processed_file = self.process_file(file_path)
-            processed_files.append(processed_file)
+            with PROFILER.span(f"{file_path.name} (lectura)", 'chapter', chapter=file_path.name):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                blocks = tokenize_markdown(content)
+                diagrams = self.collect_diagrams(blocks, file_path.stem)
+            output_file = self.output_dir / file_path.name
+            processed_files.append(output_file)
+            images.update(d.output_file for d in diagrams)
+            
+            inputs = {
+                'source': text_hash(content),
+                'diagrams': [d.key for d in diagrams],
+                'processor': PROCESSOR_VERSION
+            }
+            outputs = [output_file] + [self.images_dir / d.output_file for d in diagrams]
+            if manifest and manifest.is_current(f"chapter:{file_path.name}", inputs, outputs):
+                continue
+            documents.append((file_path, blocks, diagrams, inputs))
+        
+        # 2. Renderizar los diagramas de todos los capítulos a la vez
+        all_diagrams = [d for _, _, diagrams, _ in documents for d in diagrams]
+        if all_diagrams:
+            print(f"🖼️  Preparando {len(all_diagrams)} diagramas...")
+        rendered = self.render_diagrams(all_diagrams)
         
+        # 3. Sustituir los bloques por las imágenes y escribir los capítulos
+        for file_path, blocks, diagrams, inputs in documents:
+            print(f"Procesando {file_path.name}...")
+            with PROFILER.span(f"{file_path.name} (escritura)", 'chapter', chapter=file_path.name):
+                self.write_processed(file_path, self.substitute_diagrams(blocks, diagrams, rendered))
+            if manifest:
+                # Un diagrama fallido deja el capítulo pendiente para la siguiente compilación
+                if all(d in rendered for d in diagrams):
+                    manifest.record(f"chapter:{file_path.name}", inputs)
+                else:
+                    manifest.forget(f"chapter:{file_path.name}")
+        
+        if manifest:
+            self.remove_stale_outputs(processed_files, images)
         return processed_files
+    
+    def remove_stale_outputs(self, processed_files, images):
+        """Borra capítulos e imágenes procesados que ya no corresponden a ningún diagrama o documento"""
+        names = {path.name for path in processed_files}
+        for path in self.output_dir.glob("*.md"):
+            if path.name not in names:
+                path.unlink()
+        for path in self.images_dir.glob("*"):
+            if path.is_file() and path.name not in images:
+                path.unlink()
 
 def create_portada():
     """Crea archivo de portada en LaTeX"""
@@ -217,10 +746,8 @@ tribunal y administradores.
 Sistema de Información, Automatización Universitaria.
 """
     
-    with open("docs/template/portada.tex", "w", encoding='utf-8') as f:
-        f.write(portada_content)
-    
-    print("✅ Archivo portada.tex creado en docs/template/")
+    if write_if_changed("docs/template/portada.tex", portada_content):
+        print("✅ Archivo portada.tex creado en docs/template/")
 
 def create_latex_template():
     """Crea plantilla LaTeX completa"""
@@ -362,93 +889,142 @@ $body$
 
 \end{document}"""
     
-    with open("docs/template/template_complete.tex", "w", encoding='utf-8') as f:
-        f.write(template)
-    
-    print("✅ Template LaTeX completo creado en docs/template/")
+    if write_if_changed("docs/template/template_complete.tex", template):
+        print("✅ Template LaTeX completo creado en docs/template/")
 
-def main():
-    print("🚀 Iniciando generación completa del PDF...")
-    
-    # 0. Limpiar archivos previos
-    print("🧹 Limpiando archivos previos...")
-    if os.path.exists("docs/processed"):
-        shutil.rmtree("docs/processed")
-    if os.path.exists("docs/combined_complete.md"):
-        os.remove("docs/combined_complete.md")
-    
-    # 1. Crear archivos de template y portada
-    create_portada()
-    create_latex_template()
+# "# 1. Visión general del proyecto" → "# Visión general del proyecto" (solo el primero)
+NUMBERED_TITLE = re.compile(r'^# \d+\. (.+?)$')
+# "## 1.1. Motivación" → "## Motivación"
+NUMBERED_SUBTITLE = re.compile(r'^(##+ )\d+\.[\d\.]*\s*(.+?)$', re.MULTILINE)
+# Subtítulo numerado sin texto en su línea: el \s* anterior sigue en las líneas siguientes
+OPEN_NUMBERED_SUBTITLE = re.compile(r'##+ \d+\.[\d\.]*\s*$')
+NON_WHITESPACE = re.compile(r'\S')
+
+def read_lines(file):
+    r"""Líneas de un fichero de texto sin el salto final, igual que file.read().split('\n')"""
+    line = ''
+    for line in file:
+        yield line[:-1] if line.endswith('\n') else line
+    if not line or line.endswith('\n'):
+        yield ''
+
+def strip_manual_numbering(lines):
+    """
+    Quita la numeración manual del primer título H1 y de todos los subtítulos,
+    línea a línea. Reproduce exactamente las sustituciones con re.sub sobre el
+    texto completo: un subtítulo numerado sin texto en su línea se une a la
+    siguiente línea con contenido, así que solo esas líneas se retienen.
+    """
+    title_found = False
+    pending = []
     
-    # 2. Procesar documentos
-    processor = DocumentProcessor()
-    processed_files = processor.process_all_documents()
+    for line in lines:
+        if not title_found:
+            line, title_found = NUMBERED_TITLE.subn(r'# \1', line, count=1)
+        
+        if pending:
+            pending.append(line)
+            if NON_WHITESPACE.search(line):
+                yield from NUMBERED_SUBTITLE.sub(r'\1\2', '\n'.join(pending), count=1).split('\n')
+                pending = []
+        elif OPEN_NUMBERED_SUBTITLE.match(line):
+            pending = [line]
+        else:
+            yield NUMBERED_SUBTITLE.sub(r'\1\2', line)
     
-    # 3. Combinar documentos como capítulos separados
-    combined_content = ""
-    for file_path in processed_files:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-            # 1. Procesar el título H1 principal: extraer solo el texto sin numeración
-            # "# 1. Visión general del proyecto" → "# Visión general del proyecto"
-            content = re.sub(r'^# \d+\. (.+?)$', r'# \1', content, flags=re.MULTILINE, count=1)
-            
-            # 2. Eliminar numeración manual de TODOS los subtítulos
-            # "## 1.1. Motivación" → "## Motivación"
-            # "### 1.2.1. Objetivo General" → "### Objetivo General"
-            content = re.sub(r'^(##+ )\d+\.[\d\.]*\s*(.+?)$', r'\1\2', content, flags=re.MULTILINE)
-            
-            # 3. Convertir títulos H1 internos (que no sean el primero) a H2
-            lines = content.split('\n')
-            processed_lines = []
-            first_h1_found = False
-            
-            for line in lines:
-                if line.startswith('# '):
-                    if not first_h1_found:
-                        # El primer H1 se mantiene como capítulo principal
-                        first_h1_found = True
-                        processed_lines.append(line)
-                    else:
-                        # Los demás H1 se convierten en H2 para no romper la estructura
-                        processed_lines.append('##' + line[1:])
-                else:
-                    processed_lines.append(line)
-            
-            content = '\n'.join(processed_lines)
+    if pending:
+        yield from NUMBERED_SUBTITLE.sub(r'\1\2', '\n'.join(pending), count=1).split('\n')
+
+def demote_inner_titles(lines):
+    """Convierte en H2 los títulos H1 que no son el primero, para no romper la estructura"""
+    first_h1_found = False
+    for line in lines:
+        if line.startswith('# '):
+            if first_h1_found:
+                line = '##' + line[1:]
+            first_h1_found = True
+        yield line
+
+def normalize_chapter(lines):
+    """Normaliza las líneas de un capítulo procesado en una sola pasada (generador)"""
+    return demote_inner_titles(strip_manual_numbering(lines))
+
+def combine_documents(processed_files, output_file):
+    """
+    Combina los capítulos procesados en output_file escribiendo línea a línea,
+    sin cargar los capítulos completos en memoria. Devuelve True si el
+    resultado cambia respecto al fichero anterior.
+    """
+    output_file = Path(output_file)
+    temp_file = output_file.with_name(f".{output_file.name}.{os.getpid()}.tmp")
+    with open(temp_file, 'w', encoding='utf-8') as out:
+        for file_path in processed_files:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for i, line in enumerate(normalize_chapter(read_lines(f))):
+                    out.write(f"\n{line}" if i else line)
             # Solo agregar al contenido (sin salto de página manual)
-            combined_content += content + "\n\n"
-    
-    with open("docs/combined_complete.md", "w", encoding='utf-8') as f:
-        f.write(combined_content)
+            out.write("\n\n")
     
-    # 4. Generar PDF
-    pandoc_cmd = [
-        'pandoc', 'combined_complete.md',
-        '-f', 'markdown+table_captions+grid_tables',
-        '--template=template/template_complete.tex',
-        '--toc',
-        '--toc-depth=3',
-        '--number-sections',
-        '--top-level-division=chapter',
-        '--listings',
-        '--pdf-engine=xelatex',
-        '-V', 'documentclass=report',
-        '-V', 'fontsize=12pt',
-        '-V', 'lang=es',
-        '--highlight-style=tango',
-        '-o', 'TFG_Plataforma_Gestion_FINAL.pdf'
-    ]
+    # Si no cambia se conserva el fichero anterior (y su mtime)
+    if output_file.exists() and file_hash(output_file) == file_hash(temp_file):
+        temp_file.unlink()
+        return False
+    os.replace(temp_file, output_file)
+    return True
+
+def normalized_chapter_text(file_path):
+    """Texto de un capítulo procesado tal y como queda en combined_complete.md"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return '\n'.join(normalize_chapter(read_lines(f)))
+
+def load_document(processed_files):
+    """
+    AST pandoc del documento completo, unido a partir del AST de cada capítulo
+    (cacheado por su contenido en docs/.pandoc_cache)
+    """
+    cache = ChapterAstCache(renderer_version('pandoc'))
+    document = merge_chapters(cache.parse_all(
+        (normalized_chapter_text(path) for path in processed_files),
+        labels=[path.name for path in processed_files]
+    ))
+    print(f"🌳 AST de capítulos: {cache.hits} desde caché, {cache.misses} leídos con pandoc")
+    return document
+
+# Opciones de pandoc solo para el PDF (el resto son las de pandoc_ast.WRITER_OPTIONS)
+PDF_OPTIONS = ['--pdf-engine=xelatex']
+PDF_OUTPUT = "docs/TFG_Plataforma_Gestion_FINAL.pdf"
+# Pandoc escribe aquí y después se renombra: un visor abierto nunca lee un PDF a medias
+PDF_TEMP_OUTPUT = "docs/.TFG_Plataforma_Gestion_FINAL.tmp.pdf"
+# Segundos sin cambios que espera --watch antes de recompilar
+WATCH_DEBOUNCE = 0.5
+
+def pdf_inputs():
+    """Entradas de la etapa final: markdown combinado, plantillas, imágenes y herramientas"""
+    files = [Path("docs/combined_complete.md")]
+    for folder in ("docs/template", "docs/images", "docs/processed/images"):
+        files.extend(sorted(p for p in Path(folder).glob("*") if p.is_file()))
+    bibliography = Path("docs/referencias.bib")
+    if bibliography.exists():
+        files.append(bibliography)
+    return {
+        'files': {str(path): file_hash(path) for path in files},
+        'command': WRITER_OPTIONS + PDF_OPTIONS,
+        'tools': {tool: renderer_version(tool) for tool in ('pandoc', 'xelatex')}
+    }
+
+def generate_pdf(manifest, processed_files):
+    inputs = pdf_inputs()
+    if manifest.is_current('pdf', inputs, [PDF_OUTPUT]):
+        print(f"✅ Sin cambios: {PDF_OUTPUT} está actualizado")
+        return True
     
     try:
+        document = load_document(processed_files)
         print("📝 Ejecutando Pandoc...")
-        # Cambiar al directorio docs para ejecutar pandoc
-        original_cwd = os.getcwd()
-        os.chdir('docs')
-        subprocess.run(pandoc_cmd, check=True)
-        os.chdir(original_cwd)
+        # Pandoc se ejecuta desde docs para que resuelva las rutas relativas
+        write_document(document, os.path.relpath(PDF_TEMP_OUTPUT, 'docs'), PDF_OPTIONS)
+        os.replace(PDF_TEMP_OUTPUT, PDF_OUTPUT)
+        manifest.record('pdf', inputs)
         print("✅ PDF generado exitosamente: docs/TFG_Plataforma_Gestion_FINAL.pdf")
         print("📄 El documento incluye:")
         print("   - Portada profesional")
@@ -460,8 +1036,189 @@ def main():
         print("   - Lista de figuras y tablas")
         print("   - Todos los capítulos procesados")
         print("   - Diagramas convertidos a imágenes")
+        return True
     except subprocess.CalledProcessError as e:
+        manifest.forget('pdf')
         print(f"❌ Error generando PDF: {e}")
+        return False
+
+def build(clean=False, vector=True):
+    """
+    Compilación incremental: cada etapa se salta si sus entradas coinciden con
+    las del manifiesto de la compilación anterior.
+    """
+    if clean:
+        # 0. Limpiar archivos previos (los diagramas se conservan en docs/.diagram_cache)
+        print("🧹 Limpiando archivos previos...")
+        if os.path.exists("docs/processed"):
+            shutil.rmtree("docs/processed")
+        if os.path.exists("docs/combined_complete.md"):
+            os.remove("docs/combined_complete.md")
+        if os.path.exists(BUILD_MANIFEST):
+            os.remove(BUILD_MANIFEST)
+    
+    manifest = BuildManifest()
+    
+    # 1. Crear archivos de template y portada (solo se reescriben si cambian)
+    create_portada()
+    create_latex_template()
+    
+    # 2. Procesar documentos
+    processor = DocumentProcessor(vector=vector)
+    processed_files = processor.process_all_documents(manifest)
+    if processor.cache.hits or processor.cache.misses:
+        print(f"🖼️  Diagramas: {processor.cache.hits} desde caché, {processor.cache.misses} renderizados")
+    
+    # 3. Combinar documentos como capítulos separados
+    with PROFILER.span("combinar capítulos", 'combine'):
+        combine_documents(processed_files, "docs/combined_complete.md")
+    
+    # 4. Generar PDF
+    ok = generate_pdf(manifest, processed_files)
+    manifest.save()
+    return ok
+
+def watched_files():
+    """Ficheros que afectan a la compilación: capítulos, plantillas e imágenes (ruta -> mtime, tamaño)"""
+    files = [p for p in Path("docs").glob("*.md") if p.name != "combined_complete.md"]
+    for folder in ("docs/template", "docs/images"):
+        files.extend(p for p in Path(folder).rglob("*") if p.is_file())
+    snapshot = {}
+    for path in files:
+        try:
+            stat = path.stat()
+            snapshot[str(path)] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            pass  # borrado entre el glob y el stat
+    return snapshot
+
+def is_watched(path):
+    path = Path(os.path.relpath(path))
+    if path.parent == Path("docs"):
+        return path.suffix == ".md" and path.name != "combined_complete.md"
+    return path.parts[:2] in (("docs", "template"), ("docs", "images"))
+
+class ChangeWatcher:
+    """
+    Espera cambios en los ficheros vigilados. Usa watchdog (inotify en Linux)
+    si está instalado y, si no, compara periódicamente mtime y tamaño.
+    """
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self.changed = set()
+        self.lock = threading.Lock()
+        self.event = threading.Event()
+        self.observer = None
+        self.snapshot = watched_files()
+        
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return
+        
+        watcher = self
+        
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                # watchdog también avisa de aperturas y cierres sin escritura: la propia compilación los provoca
+                if event.is_directory or event.event_type not in ('created', 'modified', 'moved', 'deleted'):
+                    return
+                for path in (event.src_path, getattr(event, 'dest_path', '')):
+                    if path and is_watched(path):
+                        watcher.notify(path)
+        
+        self.observer = Observer()
+        self.observer.schedule(Handler(), "docs", recursive=False)
+        for folder in ("docs/template", "docs/images"):
+            if os.path.isdir(folder):
+                self.observer.schedule(Handler(), folder, recursive=True)
+        self.observer.start()
+    
+    def notify(self, path):
+        with self.lock:
+            self.changed.add(os.path.relpath(path))
+        self.event.set()
+    
+    def poll(self):
+        snapshot = watched_files()
+        for path in set(snapshot) | set(self.snapshot):
+            if snapshot.get(path) != self.snapshot.get(path):
+                self.notify(path)
+        self.snapshot = snapshot
+    
+    def wait(self, debounce=WATCH_DEBOUNCE):
+        """Bloquea hasta que haya cambios y pasen `debounce` segundos sin más; devuelve las rutas"""
+        while not self.event.is_set():
+            if self.observer:
+                self.event.wait(self.interval)
+            else:
+                time.sleep(self.interval)
+                self.poll()
+        
+        # Agrupar ráfagas de cambios (guardados del editor, varios ficheros a la vez)
+        while self.event.is_set():
+            self.event.clear()
+            time.sleep(debounce)
+            if not self.observer:
+                self.poll()
+        
+        with self.lock:
+            changed, self.changed = self.changed, set()
+        return sorted(changed)
+    
+    def stop(self):
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+
+def watch(clean=False, interval=1.0, debounce=WATCH_DEBOUNCE, vector=True):
+    """Recompila de forma incremental cada vez que cambian los capítulos, plantillas o imágenes"""
+    build(clean=clean, vector=vector)
+    watcher = ChangeWatcher(interval)
+    mode = "inotify (watchdog)" if watcher.observer else f"sondeo cada {interval:g}s"
+    print(f"👀 Vigilando docs/*.md, docs/template/ y docs/images/ con {mode}. Ctrl+C para salir.")
+    
+    try:
+        while True:
+            changed = watcher.wait(debounce)
+            print(f"\n🔄 Cambios en: {', '.join(changed)}")
+            start = time.time()
+            try:
+                build(vector=vector)
+            except Exception as e:
+                # Un error de compilación no debe terminar la sesión de edición
+                print(f"❌ Error en la recompilación: {e}")
+            print(f"⏱️  Recompilado en {time.time() - start:.1f}s")
+    except KeyboardInterrupt:
+        print("\n👋 Fin del modo vigilancia")
+    finally:
+        watcher.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera el PDF de la memoria a partir de docs/*.md")
+    parser.add_argument('--clean', action='store_true',
+                        help="Descarta los capítulos procesados y el manifiesto y recompila todo")
+    parser.add_argument('--watch', action='store_true',
+                        help="Vigila docs/*.md, docs/template/ y docs/images/ y recompila al guardar")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help="Segundos entre comprobaciones si watchdog no está instalado (por defecto: 1)")
+    parser.add_argument('--png', action='store_true',
+                        help=f"Diagramas en PNG reducidos a {PRINT_DPI} ppp en lugar de PDF vectorial")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_FILE, metavar='TRAZA',
+                        help=f"Guarda una traza de Chrome de la compilación y muestra las etapas más lentas (por defecto: {DEFAULT_TRACE_FILE})")
+    args = parser.parse_args()
+    if args.watch and args.profile:
+        parser.error("--profile mide una única compilación; no se puede combinar con --watch")
+    
+    print("🚀 Iniciando generación completa del PDF...")
+    if args.watch:
+        watch(clean=args.clean, interval=args.interval, vector=not args.png)
+        return
+    ok = build(clean=args.clean, vector=not args.png)
+    finish_profile(args.profile)
+    if not ok:
+        sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
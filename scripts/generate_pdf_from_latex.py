@@ -1,11 +1,186 @@
 #!/usr/bin/env python3
+import re
 import subprocess
 import sys
 import os
+import hashlib
+import argparse
 from pathlib import Path
 import shutil
 
-def compile_latex_to_pdf():
+from build_profiler import DEFAULT_TRACE_FILE, finish_profile, PROFILER
+
+# Ficheros que xelatex escribe en una pasada y lee en la siguiente
+AUX_EXTENSIONS = ('.aux', '.toc', '.lof', '.lot', '.out')
+MAX_PASSES = 5
+# Formato con el preámbulo precompilado (mylatexformat) para las vistas previas
+PREAMBLE_FORMAT = "preamble"
+
+def auxiliary_state(jobname="combined_complete"):
+    """Hash de cada fichero auxiliar (None si todavía no existe)"""
+    state = {}
+    for ext in AUX_EXTENSIONS:
+        aux_file = Path(f"{jobname}{ext}")
+        state[ext] = hashlib.sha256(aux_file.read_bytes()).hexdigest() if aux_file.exists() else None
+    return state
+
+def run_xelatex(pass_number, tex_file="combined_complete.tex", fmt=None):
+    with PROFILER.span(f"xelatex {tex_file} (pasada {pass_number})", 'xelatex', formato=fmt or ''):
+        result = subprocess.run([
+            'xelatex',
+            '-interaction=nonstopmode',  # No parar por errores menores
+            *([f'&{fmt}'] if fmt else []),
+            tex_file
+        ], capture_output=True, text=True)
+
+    if result.returncode != 0:
+        print(f"❌ Error en la pasada {pass_number}:")
+        print("STDOUT:", result.stdout[-1000:])  # Más líneas del output
+        print("STDERR:", result.stderr[-1000:])
+    return result
+
+def compile_until_converged(max_passes=MAX_PASSES, tex_file="combined_complete.tex", fmt=None):
+    """
+    Ejecuta xelatex hasta que los auxiliares (.aux, .toc, .lof...) alcanzan un
+    punto fijo: si una pasada los deja igual que los leyó, el PDF ya tiene los
+    índices y referencias correctos. Los auxiliares de la compilación anterior
+    se conservan, así que tras una edición pequeña basta normalmente una pasada.
+    Devuelve el número de pasadas ejecutadas.
+    """
+    jobname = Path(tex_file).stem
+    state = auxiliary_state(jobname)
+    if any(state.values()):
+        print("♻️  Reutilizando los auxiliares de la compilación anterior")
+
+    for pass_number in range(1, max_passes + 1):
+        print(f"📝 Pasada {pass_number} con xelatex...")
+        run_xelatex(pass_number, tex_file, fmt)
+
+        new_state = auxiliary_state(jobname)
+        if new_state == state:
+            print(f"✅ Auxiliares estables tras {pass_number} pasada(s)")
+            return pass_number
+
+        changed = [ext for ext in AUX_EXTENSIONS if new_state[ext] != state[ext]]
+        print(f"   🔁 Han cambiado: {', '.join(changed)}")
+        state = new_state
+
+    if max_passes > 1:
+        print(f"⚠️  Los auxiliares no se estabilizaron en {max_passes} pasadas (revisa referencias cruzadas)")
+    return max_passes
+
+def split_latex_document(tex):
+    """
+    Divide el LaTeX generado por pandoc en (preámbulo, capítulos). Cada capítulo
+    es una tupla (título, texto) que empieza en su \\chapter{...}.
+    """
+    begin = tex.index('\\begin{document}')
+    end = tex.rindex('\\end{document}')
+    body = tex[begin + len('\\begin{document}'):end]
+
+    starts = [m.start() for m in re.finditer(r'^\\chapter\{', body, re.MULTILINE)]
+    chapters = []
+    for start, stop in zip(starts, starts[1:] + [len(body)]):
+        text = body[start:stop]
+        title = re.match(r'\\chapter\{([^}]*)\}', text)
+        chapters.append((' '.join(title.group(1).split()) if title else '', text))
+    return tex[:begin], chapters
+
+def find_chapter(chapters, selector):
+    """Capítulo por número (1, 2...) o por parte del título; devuelve (número, título, texto)"""
+    if selector.isdigit() and 1 <= int(selector) <= len(chapters):
+        number = int(selector)
+        return (number, *chapters[number - 1])
+    for number, (title, text) in enumerate(chapters, 1):
+        if selector.lower() in title.lower():
+            return number, title, text
+    return None
+
+def ensure_preamble_format(tex_file="combined_complete.tex"):
+    """
+    Precompila el preámbulo de tex_file en PREAMBLE_FORMAT.fmt con mylatexformat.
+    Solo se regenera si cambian el preámbulo o la versión de xelatex.
+    Devuelve el nombre del formato, o None si no se pudo crear.
+    """
+    preamble = split_latex_document(Path(tex_file).read_text(encoding='utf-8'))[0]
+    try:
+        version = subprocess.run(['xelatex', '--version'], capture_output=True, text=True).stdout.split('\n')[0]
+    except FileNotFoundError:
+        return None
+    digest = hashlib.sha256(f"{version}\n{preamble}".encode('utf-8')).hexdigest()
+
+    format_file = Path(f"{PREAMBLE_FORMAT}.fmt")
+    hash_file = Path(f"{PREAMBLE_FORMAT}.sha256")
+    if format_file.exists() and hash_file.exists() and hash_file.read_text().strip() == digest:
+        return PREAMBLE_FORMAT
+
+    print("🧱 Precompilando el preámbulo (mylatexformat)...")
+    with PROFILER.span(f"xelatex -ini {PREAMBLE_FORMAT}", 'xelatex'):
+        result = subprocess.run([
+            'xelatex', '-ini', '-interaction=nonstopmode',
+            f'-jobname={PREAMBLE_FORMAT}',
+            '&xelatex', 'mylatexformat.ltx', tex_file
+        ], capture_output=True, text=True)
+
+    if result.returncode != 0 or not format_file.exists():
+        print("⚠️  No se pudo precompilar el preámbulo; se compila sin formato")
+        print("   ¿Está instalado el paquete mylatexformat? (tlmgr install mylatexformat)")
+        print("STDOUT:", result.stdout[-1000:])
+        return None
+
+    hash_file.write_text(digest)
+    return PREAMBLE_FORMAT
+
+def preview_chapter(selector, max_passes=1):
+    """
+    Compila un único capítulo de combined_complete.tex en preview_NN.pdf usando
+    el preámbulo precompilado. Las referencias a otros capítulos quedan sin
+    resolver: es una vista previa, el libro completo se compila sin --preview.
+    """
+    latex_dir = Path("docs/latex_output")
+    latex_file = latex_dir / "combined_complete.tex"
+    if not latex_file.exists():
+        print("❌ Error: No se encuentra el archivo docs/latex_output/combined_complete.tex")
+        print("   Ejecuta primero generate_latex.py para generar el archivo LaTeX")
+        return False
+
+    original_cwd = os.getcwd()
+    os.chdir(latex_dir)
+    try:
+        preamble, chapters = split_latex_document(Path(latex_file.name).read_text(encoding='utf-8'))
+        found = find_chapter(chapters, selector)
+        if not found:
+            print(f"❌ No hay ningún capítulo que coincida con '{selector}'. Disponibles:")
+            for number, (title, _) in enumerate(chapters, 1):
+                print(f"   {number}. {title}")
+            return False
+
+        number, title, text = found
+        preview_file = Path(f"preview_{number:02d}.tex")
+        preview_file.write_text(
+            f"{preamble}\\begin{{document}}\n"
+            f"\\setcounter{{chapter}}{{{number - 1}}}\n"
+            f"{text}\n\\end{{document}}\n",
+            encoding='utf-8'
+        )
+
+        print(f"👁️  Vista previa del capítulo {number}: {title}")
+        fmt = ensure_preamble_format(latex_file.name)
+        compile_until_converged(max_passes, preview_file.name, fmt)
+
+        pdf_file = preview_file.with_suffix('.pdf')
+        if not pdf_file.exists():
+            print("❌ Error: No se pudo generar la vista previa")
+            return False
+        print(f"📄 Vista previa: {latex_dir / pdf_file.name}")
+        return True
+    except FileNotFoundError:
+        print("❌ Error: xelatex no está instalado o no se encuentra en el PATH")
+        return False
+    finally:
+        os.chdir(original_cwd)
+
+def compile_latex_to_pdf(max_passes=MAX_PASSES, use_format=False):
     """
     Compila el archivo LaTeX generado a PDF usando xelatex
     """
@@ -27,44 +202,8 @@ def compile_latex_to_pdf():
         original_cwd = os.getcwd()
         os.chdir(latex_dir)
         
-        print("📝 Primera pasada con xelatex...")
-        # Primera compilación - genera estructura básica
-        result1 = subprocess.run([
-            'xelatex',
-            '-interaction=nonstopmode',  # No parar por errores menores
-            'combined_complete.tex'
-        ], capture_output=True, text=True)
-
-        if result1.returncode != 0:
-            print("❌ Error en primera pasada:")
-            print("STDOUT:", result1.stdout[-1000:])  # Más líneas del output
-            print("STDERR:", result1.stderr[-1000:])
-
-        print("📝 Segunda pasada con xelatex (para generar índices)...")
-        # Segunda compilación - genera archivos .toc, .lof, etc.
-        result2 = subprocess.run([
-            'xelatex',
-            '-interaction=nonstopmode',
-            'combined_complete.tex'
-        ], capture_output=True, text=True)
-
-        if result2.returncode != 0:
-            print("❌ Error en segunda pasada:")
-            print("STDOUT:", result2.stdout[-1000:])
-            print("STDERR:", result2.stderr[-1000:])
-
-        print("📝 Tercera pasada con xelatex (para incluir índices en el PDF)...")
-        # Tercera compilación - incluye los índices generados en el PDF final
-        result3 = subprocess.run([
-            'xelatex',
-            '-interaction=nonstopmode',
-            'combined_complete.tex'
-        ], capture_output=True, text=True)
-
-        if result3.returncode != 0:
-            print("❌ Error en tercera pasada:")
-            print("STDOUT:", result3.stdout[-1000:])
-            print("STDERR:", result3.stderr[-1000:])
+        fmt = ensure_preamble_format() if use_format else None
+        compile_until_converged(max_passes, fmt=fmt)
         
         # Verificar que se generó el PDF
         pdf_file = Path("combined_complete.pdf")
@@ -81,7 +220,7 @@ def compile_latex_to_pdf():
             print(f"📏 Tamaño del PDF: {final_pdf.stat().st_size} bytes")
             
             # Mantener archivos auxiliares para debugging
-            print("ℹ️  Archivos auxiliares conservados para debugging (.toc, .lof, .aux)")
+            print("ℹ️  Archivos auxiliares conservados (.aux, .toc, .lof): la próxima compilación parte de ellos")
             # cleanup_auxiliary_files()
             
             return True
@@ -132,11 +271,10 @@ def show_compilation_info():
     print("📚 Información sobre la compilación LaTeX:")
     print("=" * 50)
     print("🔧 El script realiza:")
-    print("   1. Primera pasada con xelatex (genera estructura básica)")
-    print("   2. Segunda pasada con xelatex (genera archivos de índices .toc, .lof)")
-    print("   3. Tercera pasada con xelatex (incluye índices en el PDF final)")
-    print("   4. Limpia archivos auxiliares")
-    print("   5. Mueve el PDF final a docs/")
+    print("   1. Pasadas de xelatex hasta que .aux, .toc, .lof, .lot y .out dejan de cambiar")
+    print(f"      (máximo {MAX_PASSES}; reutiliza los auxiliares de la compilación anterior)")
+    print("   2. Conserva los archivos auxiliares para la próxima compilación")
+    print("   3. Mueve el PDF final a docs/")
     print("")
     print("⚙️  Configuración usada:")
     print("   - Motor: xelatex (soporta fuentes y Unicode)")
@@ -145,11 +283,29 @@ def show_compilation_info():
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description="Compila docs/latex_output/combined_complete.tex a PDF")
+    parser.add_argument('--max-passes', type=int,
+                        help=f"Máximo de pasadas de xelatex (por defecto: {MAX_PASSES}; 1 con --preview)")
+    parser.add_argument('--preview', metavar='CAPITULO',
+                        help="Compila solo un capítulo (número o parte del título) en docs/latex_output/preview_NN.pdf")
+    parser.add_argument('--format', action='store_true',
+                        help="Compila el libro completo con el preámbulo precompilado (mylatexformat)")
+    parser.add_argument('--profile', nargs='?', const=DEFAULT_TRACE_FILE, metavar='TRAZA',
+                        help=f"Guarda una traza de Chrome con la duración de cada pasada (por defecto: {DEFAULT_TRACE_FILE})")
+    args = parser.parse_args()
+    
+    if args.preview:
+        ok = preview_chapter(args.preview, args.max_passes or 1)
+        finish_profile(args.profile)
+        sys.exit(0 if ok else 1)
+    
     show_compilation_info()
     print("")
     
     # Compilar LaTeX a PDF
-    if compile_latex_to_pdf():
+    ok = compile_latex_to_pdf(args.max_passes or MAX_PASSES, use_format=args.format)
+    finish_profile(args.profile)
+    if ok:
         print("")
         print("🎉 ¡Compilación completada exitosamente!")
         print("📄 Tu documento PDF está listo")
@@ -64,6 +64,14 @@ else
     echo "✅ Mermaid CLI ya instalado"
 fi
 
+# librsvg: convierte el SVG de PlantUML en PDF vectorial
+if ! command -v rsvg-convert &> /dev/null; then
+    echo "🖼️  Instalando librsvg..."
+    brew install librsvg
+else
+    echo "✅ librsvg ya instalado"
+fi
+
 # Graphviz para diagramas DOT
 if ! command -v dot &> /dev/null; then
     echo "🔧 Instalando Graphviz..."
@@ -99,6 +107,7 @@ echo "Node.js: $(node --version 2>/dev/null || echo 'No instalado')"
 echo "Mermaid CLI: $(mmdc --version 2>/dev/null || echo 'Instalado pero requiere configuración')"
 echo "Graphviz: $(dot -V 2>&1 | head -1 || echo 'No instalado')"
 echo "PlantUML: $(plantuml -version 2>/dev/null | head -1 || echo 'Instalado')"
+echo "rsvg-convert: $(rsvg-convert --version 2>/dev/null || echo 'No instalado (los PlantUML se generarán en PNG)')"
 
 echo ""
 echo "✅ Instalación completada!"
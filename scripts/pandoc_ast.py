@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Capa de conversión con pandoc a través de su AST JSON
+
+Cada capítulo se lee con pandoc una sola vez ('-t json') y el AST se guarda en
+docs/.pandoc_cache con el hash del texto del capítulo, la versión de pandoc y
+el formato de lectura. El documento completo se monta uniendo los AST de los
+capítulos y de él salen tanto el PDF (generate_pdf_complete.py) como el LaTeX
+(generate_latex.py), sin volver a parsear el markdown.
+"""
+import os
+import json
+import hashlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from build_profiler import PROFILER
+
+AST_CACHE_DIR = "docs/.pandoc_cache"
+READER_FORMAT = 'markdown+table_captions+grid_tables'
+
+# Opciones comunes de escritura (rutas relativas a docs/)
+WRITER_OPTIONS = [
+    '--template=template/template_complete.tex',
+    '--toc',
+    '--toc-depth=3',
+    '--number-sections',
+    '--top-level-division=chapter',
+    '--listings',
+    '-V', 'documentclass=report',
+    '-V', 'fontsize=12pt',
+    '-V', 'lang=es',
+    '--highlight-style=tango',
+]
+
+class ChapterAstCache:
+    """AST JSON de cada capítulo, direccionado por el hash de su contenido"""
+
+    def __init__(self, pandoc_version, cache_dir=AST_CACHE_DIR):
+        self.pandoc_version = pandoc_version
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, text):
+        digest = hashlib.sha256()
+        for part in (self.pandoc_version, READER_FORMAT, text):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def load(self, key):
+        try:
+            with open(self.cache_dir / f"{key}.json", encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def store(self, key, ast):
+        path = self.cache_dir / f"{key}.json"
+        temp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(ast, f)
+        os.replace(temp_path, path)
+
+    def parse(self, text, label='capítulo'):
+        """AST de un capítulo: desde la caché o leyéndolo con pandoc"""
+        key = self.key(text)
+        ast = self.load(key)
+        if ast is not None:
+            self.hits += 1
+            return ast
+
+        self.misses += 1
+        with PROFILER.span(f"pandoc -t json {label}", 'pandoc', chapter=label):
+            result = subprocess.run(
+                ['pandoc', '-f', READER_FORMAT, '-t', 'json'],
+                input=text.encode('utf-8'), capture_output=True, check=True
+            )
+        ast = json.loads(result.stdout)
+        self.store(key, ast)
+        return ast
+
+    def parse_all(self, texts, workers=None, labels=None):
+        """AST de varios capítulos; los que no están en caché se leen en paralelo"""
+        texts = list(texts)
+        if not texts:
+            return []
+        labels = list(labels) if labels else [f"capítulo {i}" for i in range(1, len(texts) + 1)]
+        workers = workers or os.cpu_count() or 1
+        with ThreadPoolExecutor(max_workers=min(workers, len(texts))) as executor:
+            return list(executor.map(self.parse, texts, labels))
+
+def _headers(node):
+    """Recorre el AST y devuelve los bloques Header en orden de documento"""
+    if isinstance(node, dict):
+        if node.get('t') == 'Header':
+            yield node
+        for value in node.values():
+            yield from _headers(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _headers(item)
+
+def merge_chapters(asts):
+    """
+    Une los AST de los capítulos en un único documento. pandoc genera los
+    identificadores de los títulos por documento, así que al unir capítulos
+    leídos por separado se desambiguan los repetidos como haría pandoc con el
+    documento completo: 'id', 'id-1', 'id-2'...
+    """
+    if not asts:
+        raise ValueError("No hay capítulos que convertir")
+
+    meta = {}
+    blocks = []
+    for ast in asts:
+        meta.update(ast.get('meta', {}))
+        blocks.extend(ast['blocks'])
+
+    seen = set()
+    for header in _headers(blocks):
+        attributes = header['c'][1]
+        identifier = attributes[0]
+        if not identifier:
+            continue
+        if identifier in seen:
+            suffix = 1
+            while f"{identifier}-{suffix}" in seen:
+                suffix += 1
+            identifier = f"{identifier}-{suffix}"
+            attributes[0] = identifier
+        seen.add(identifier)
+
+    return {'pandoc-api-version': asts[0]['pandoc-api-version'], 'meta': meta, 'blocks': blocks}
+
+def write_document(document, output, extra_options=(), cwd='docs'):
+    """Escribe el documento (AST unido) con pandoc: PDF, LaTeX... según output y extra_options"""
+    with PROFILER.span(f"pandoc -o {Path(output).name}", 'pandoc'):
+        subprocess.run(
+            ['pandoc', '-f', 'json', *WRITER_OPTIONS, *extra_options, '-o', str(output)],
+            input=json.dumps(document).encode('utf-8'), check=True, cwd=cwd
+        )
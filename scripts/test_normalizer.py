@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests del normalizador de capítulos de generate_pdf_complete.py
+Comparan normalize_chapter con la versión anterior basada en re.sub sobre el
+texto completo, que es la referencia del formato de combined_complete.md.
+
+    python3 -m pytest scripts/test_normalizer.py
+"""
+import io
+import re
+import random
+
+import pytest
+
+from generate_pdf_complete import normalize_chapter, read_lines
+
+def legacy_normalize(content):
+    """Normalización original: re.sub sobre el capítulo completo y split/join"""
+    content = re.sub(r'^# \d+\. (.+?)$', r'# \1', content, flags=re.MULTILINE, count=1)
+    content = re.sub(r'^(##+ )\d+\.[\d\.]*\s*(.+?)$', r'\1\2', content, flags=re.MULTILINE)
+
+    processed_lines = []
+    first_h1_found = False
+    for line in content.split('\n'):
+        if line.startswith('# '):
+            if first_h1_found:
+                line = '##' + line[1:]
+            first_h1_found = True
+        processed_lines.append(line)
+    return '\n'.join(processed_lines)
+
+def streamed_normalize(content):
+    return '\n'.join(normalize_chapter(read_lines(io.StringIO(content))))
+
+CASES = {
+    'vacío': "",
+    'solo salto de línea': "\n",
+    'sin salto final': "# 1. Introducción\n\nTexto",
+    'con salto final': "# 1. Introducción\n\nTexto\n",
+    'varios saltos finales': "# 1. Introducción\n\n\n",
+    'subtítulos numerados': "# 2. Arquitectura\n## 2.1. Backend\n### 2.1.3. Servicios\n#### 2.1.3.1 Caché\n",
+    'solo el primer H1 numerado': "# 1. Uno\n\n# 2. Dos\n\n# 3. Tres\n",
+    'H1 sin numerar antes del numerado': "# Prefacio\n# 1. Introducción\n",
+    'H1 internos pasan a H2': "# Capítulo\n\n# Sección\n\n# Otra\n",
+    'subtítulo sin texto seguido de blancos': "# 1. Título\n## 1.1.\n\n   \n\nMotivación\nresto\n",
+    'subtítulo sin texto al final': "# 1. Título\n## 1.1.   \n\n",
+    'subtítulo sin texto sin salto final': "## 3.2.",
+    'subtítulos sin texto seguidos': "## 1.1.\n## 1.2. Objetivos\n",
+    'subtítulo sin texto antes de un H1': "# 1. A\n## 1.1.\n\n# 2. B\n",
+    'número sin punto no es numeración': "## 1 Motivación\n### 12 Objetivos\n",
+    'numeración sin espacio': "## 1.1.Motivación\n",
+    'tabulador tras la numeración': "## 1.1.\tMotivación\n",
+    'código y texto intactos': "# 1. Código\n\n```\n# 2. no es título\n## 2.1. tampoco\n```\n",
+    'retornos de carro': "# 1. Windows\r\n## 1.1. Sección\r\n\r\nTexto\r\n",
+}
+
+@pytest.mark.parametrize('content', CASES.values(), ids=CASES.keys())
+def test_normalize_chapter_matches_regex_version(content):
+    assert streamed_normalize(content) == legacy_normalize(content)
+
+def test_read_lines_matches_split():
+    for content in ["", "\n", "a", "a\n", "a\n\nb", "a\n\nb\n\n"]:
+        assert list(read_lines(io.StringIO(content))) == content.split('\n')
+
+def test_normalize_chapter_is_lazy():
+    """Con un subtítulo completo no hace falta leer más allá de su línea"""
+    def lines():
+        yield "# 1. Título"
+        yield "## 1.1. Motivación"
+        raise AssertionError("se han leído líneas de más")
+
+    normalized = normalize_chapter(lines())
+    assert next(normalized) == "# Título"
+    assert next(normalized) == "## Motivación"
+
+# Piezas para generar capítulos aleatorios con los casos límite combinados
+FRAGMENTS = ["# 1. Título", "# 2. Otro", "# Sin número", "## 1.1. Sección", "## 1.1.", "### 1.2.3.",
+             "#### 4.5 Apartado", "## 7.Pegado", "##", "# ", "", " ", "\t", "Texto", "```", "- lista"]
+
+@pytest.mark.parametrize('seed', range(200))
+def test_normalize_chapter_matches_regex_version_random(seed):
+    rng = random.Random(seed)
+    content = '\n'.join(rng.choice(FRAGMENTS) for _ in range(rng.randint(0, 12)))
+    content += rng.choice(["", "\n", "\n\n"])
+    assert streamed_normalize(content) == legacy_normalize(content)